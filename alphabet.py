@@ -0,0 +1,42 @@
+#######################################################################################
+#
+# Comparing words without accents
+#
+# normalize() is how every module compares headwords: lower case, with the accents
+# and vowel marks taken off by a single str.translate(). The exceptions to Unicode's
+# decompositions are in table below; folding.py generates the rest of the table.
+#
+# These live here rather than in main.py so that xref.py, shard.py and the others can
+# import them at the top without importing main.py (which imports them), and without
+# loading main.py a second time when it is run as a script.
+#
+#######################################################################################
+
+import folding
+
+# For removing accents and special characters, so we can run simple tests. Accents will 
+# be unmodified in final result. These are the exceptions: every other accented letter,
+# and combining marks, are folded by the table that folding.py generates from them.
+table = {'à': 'a', 'á': 'a', 'â': 'a', 'ã': 'a', 'ä': 'a', 'å': 'a', 'ā': 'a', 'ă': 'a',
+         'ἅ': 'a', 'ᾷ': 'a', 'ạ': 'a',
+         'è': 'e', 'é': 'e', 'ê': 'e', 'ë': 'e', 'ē': 'e', 'ĕ': 'e', 'ẽ': 'e',
+         'ì': 'i', 'í': 'i', 'î': 'i', 'ï': 'i', 'ī': 'i', 'ĭ': 'i', 'ΐ': 'i', 'ί': 'i',
+         'ἰ': 'i', 'ἴ': 'i', 'ϊ': 'i', 'ἶ': 'i',
+         'ò': 'o', 'ó': 'o', 'ô': 'o', 'õ': 'o', 'ö': 'o', 'ō': 'o', 'ŏ': 'o', 'ὁ': 'o',
+         'ὅ': 'o', 'ο': 'o', 'ὀ': 'o', 'ό': 'o', 'ὸ': 'o', 'ὄ': 'o',
+         'ù': 'u', 'ú': 'u', 'û': 'u', 'ü': 'u', 'ū': 'u', 'ů': 'u', 'ŭ': 'u',
+         'ý': 'y', 'ÿ': 'y', 'ȳ': 'y',
+         'æ': 'ae', 'ǽ': 'ae', 'ǣ': 'ae',
+         'œ': 'oe'}
+
+trans_table = folding.translation_table(table)
+
+def normalize(target):
+  # make word lowercase and remove accents
+  # We do not modify dictionary contents but when analyzing and comparing
+  # possible headwords this enables us to compare apples to apples in a 
+  # simple manner.
+  return target.lower().translate(trans_table)
+
+# L&S files I and J under I, and U and V under V.
+SECTION_ALIASES = {'J': 'I', 'U': 'V'}
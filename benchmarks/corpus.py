@@ -0,0 +1,148 @@
+#######################################################################################
+#
+# Synthetic Lewis and Short corpus
+#
+# OUTPUT: a file in the lewis-short.txt layout, e.g.
+#
+#   python benchmarks/corpus.py --scale 1 --seed 1 -o synthetic-lewis-short.txt
+#
+# The real lewis-short.txt has to be downloaded separately, so for benchmarks we make
+# up a dictionary of the same shape: some front matter, a line with a single letter
+# before each section, and one entry per line. The entries are built to exercise the
+# same patterns the parser looks for:
+#
+#   damnāticĭus or -tius, a, um, adj. ...
+#   intĕremptĭo (-emt-), ōnis, f. ...
+#   Genāva (less correctly Genēva), ae, f. ...
+#   alternē, alternīs, and alternă, advv., v. alternus fin.
+#
+# followed by bodies of citations and Greek of varying length. The same seed and size
+# always give the same file.
+#
+#######################################################################################
+
+import argparse
+import random
+
+# Roughly the number of entries in the real lewis-short.txt; --scale 1 makes this many.
+REAL_ENTRIES = 51000
+
+# L&S files J under I and U under V.
+LETTERS = 'ABCDEFGHILMNOPQRSTVXZ'
+
+ONSETS = ['', 'b', 'c', 'd', 'f', 'g', 'l', 'm', 'n', 'p', 'r', 's', 't', 'v',
+          'cr', 'pr', 'tr', 'st', 'sp', 'qu', 'gr', 'pl', 'fl']
+VOWELS = ['a', 'e', 'i', 'o', 'u', 'ā', 'ē', 'ī', 'ō', 'ū', 'ă', 'ĕ', 'ĭ', 'ŏ', 'ŭ', 'ae']
+CODAS = ['', '', '', 'n', 'r', 's', 'l', 'c', 'm', 'x']
+PREFIXES = [('ad', 'ac'), ('ad', 'af'), ('con', 'col'), ('in', 'im'), ('ex', 'ec'), ('sub', 'suf')]
+
+# (ending, rest of the header: genitive or principal parts, gender or part of speech)
+DECLENSIONS = [('a', 'ae, f.'), ('us', 'i, m.'), ('um', 'i, n.'), ('ĭo', 'ōnis, f.'),
+               ('o', 'āvi, ātum, 1, v. a.'), ('ĕo', 'ēre, ui, ĭtum, 2, v. n.'),
+               ('o', 'ĕre, xi, ctum, 3, v. a.'), ('ĭus', 'a, um, adj.'), ('is', 'e, adj.'),
+               ('or', 'ōris, m.'), ('ēs', 'is, f.'), ('ter', 'tri, m.')]
+
+GLOSSES = ['a separation', 'to strengthen', 'condemned, sentenced', 'destruction, slaughter',
+           'of or belonging to a temple', 'a small island', 'to turn around', 'coral',
+           'a plate, leaf', 'to drive back', 'the back scene', 'a sacrificial hymn',
+           'a vessel for drawing water', 'to plough again', 'towards the right', 'sometimes']
+
+AUTHORS = ['Cic. Att.', 'Cic. Off.', 'Liv.', 'Verg. A.', 'Hor. C.', 'Plaut. Most.', 'Ter. Eun.',
+           'Ov. M.', 'Plin.', 'Varr. L. L.', 'Tac. A.', 'Quint.', 'Sen. Ep.', 'Gell.']
+GREEK = ['λόγος', 'ἀρυταινη', 'Ἐρύθεια', 'Παρνασός', 'Ὑπερβόρεοι', 'λιπογάλακτος',
+         'Κρέων', 'Ἀλκμαίων', 'ὕλη', 'φιλοσοφία', 'ἀνήρ', 'θεός']
+
+# Real entries that are always included; main.verify() looks for dŭcentĭens.
+FIXED = {'D': ['dŭcentĭes or -ĭens, adv., two hundred times: Plaut. Aul. 3, 6, 31.']}
+
+def syllable(rnd):
+  return rnd.choice(ONSETS) + rnd.choice(VOWELS) + rnd.choice(CODAS)
+
+def stem(rnd, letter):
+  word = letter.lower() + rnd.choice(VOWELS) + rnd.choice(CODAS)
+  for i in range(rnd.randint(1, 3)):
+    word += syllable(rnd)
+  return word
+
+def vary(rnd, word):
+  # The same word with one vowel quantity or spelling changed.
+  positions = [i for i, ch in enumerate(word) if ch in 'aeiouāēīōūăĕĭŏŭ' and i > 0]
+  if not positions:
+    return word + 'e'
+  i = rnd.choice(positions)
+  return word[:i] + rnd.choice('aeiouāēīōū') + word[i + 1:]
+
+def body(rnd, long_bodies):
+  # Definition, then citations; sometimes very long and full of Greek.
+  parts = [rnd.choice(GLOSSES) + ':']
+  count = rnd.randint(1, 6)
+  if long_bodies and rnd.random() < 0.1:
+    count = rnd.randint(40, 200)
+  for i in range(count):
+    citation = f'{rnd.choice(AUTHORS)} {rnd.randint(1, 12)}, {rnd.randint(1, 90)}, {rnd.randint(1, 30)}'
+    if rnd.random() < 0.3:
+      citation += f'; = {rnd.choice(GREEK)} {rnd.choice(GREEK)}'
+    parts.append(citation + ';')
+  return ' '.join(parts)[:-1] + '.'
+
+def entry(rnd, letter, long_bodies=True):
+  base = stem(rnd, letter)
+  ending, parts = rnd.choice(DECLENSIONS)
+  word = base + ending
+  kind = rnd.random()
+
+  if kind < 0.55:
+    header = f'{word}, {parts}'
+  elif kind < 0.65:
+    header = f'{word} or {vary(rnd, word)}, {parts}'
+  elif kind < 0.69:
+    header = f'{base}cĭus or -tius, a, um, adj.'
+  elif kind < 0.73:
+    header = f'{base}cĭus (-tius), a, um, adj.'
+  elif kind < 0.76:
+    prefix, assimilated = rnd.choice(PREFIXES)
+    header = f'{prefix}{word} ({assimilated}-), {parts}'
+  elif kind < 0.80:
+    header = f'{word} (less correctly {vary(rnd, word)}), {parts}'
+  elif kind < 0.83:
+    header = f'{word} (less correctly {vary(rnd, word)} or {vary(rnd, word)}), {parts}'
+  elif kind < 0.87:
+    header = f'{word}, {vary(rnd, word)}, and {vary(rnd, word)}, {parts}'
+  elif kind < 0.90:
+    header = f'{word}, also {vary(rnd, word)}, {parts}'
+  elif kind < 0.93:
+    header = f'{word} and {vary(rnd, word)}, also {vary(rnd, word)} or -os, {parts}'
+  elif kind < 0.96:
+    # A pointer to another entry.
+    return f'{word} or {base} {ending}, v. {stem(rnd, letter)}{ending}.'
+  else:
+    header = f'{word} ({vary(rnd, word)} or {vary(rnd, word)}), {parts}'
+  return f'{header} {body(rnd, long_bodies)}'
+
+def generate(entries, seed=1, long_bodies=True):
+  # Yields the lines of a synthetic dictionary with about this many entries.
+  rnd = random.Random(seed)
+  yield 'A Latin Dictionary (synthetic)'
+  yield 'Founded on Andrews\' edition of Freund\'s Latin dictionary'
+  per_letter = max(1, entries // len(LETTERS))
+  for letter in LETTERS:
+    yield letter
+    lines = [entry(rnd, letter, long_bodies) for i in range(per_letter)]
+    lines += FIXED.get(letter, [])
+    lines.sort()
+    yield from lines
+
+def write(filename, entries, seed=1, long_bodies=True):
+  with open(filename, 'w') as f:
+    for line in generate(entries, seed, long_bodies):
+      f.write(line + '\n')
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description='Write a synthetic L&S-style dictionary.')
+  parser.add_argument('--scale', type=float, default=1.0, help=f'size relative to the real dictionary ({REAL_ENTRIES} entries)')
+  parser.add_argument('--seed', type=int, default=1)
+  parser.add_argument('-o', '--output', default='synthetic-lewis-short.txt')
+  args = parser.parse_args()
+
+  write(args.output, int(REAL_ENTRIES * args.scale), args.seed)
+  print(f'Saved to {args.output}.')
@@ -0,0 +1,148 @@
+#######################################################################################
+#
+# Benchmarks
+#
+# OUTPUT: benchmarks/results/<date>-<commit>.json
+#
+#   python benchmarks/run.py [--scale 1] [--seed 1] [--repeat 3] [--compare FILE]
+#
+# Generates a synthetic dictionary (see corpus.py) in a temporary directory and times:
+#
+#   build:    the whole run, main.build() followed by main.verify()
+#   apply_change, sim, normalize, first_words, examine_or_also_and_with_parenth,
+#   examine_subsequent_additions: each called over a fixed sample of inputs
+#
+# Each timing is the best of --repeat runs, in seconds (per call for the functions).
+# The results are saved with the current git commit and compared against the most
+# recent earlier results file, or the one given with --compare.
+#
+#######################################################################################
+
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCHMARK_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCHMARK_DIRECTORY)
+RESULTS_DIRECTORY = os.path.join(BENCHMARK_DIRECTORY, 'results')
+sys.path.insert(0, ROOT)
+
+import corpus
+
+# Examples from the comments in main.py.
+CHANGES = [('damnāticĭus', '-tius'), ('adfirmo', 'aff-'), ('postcaenium', '-cen-'),
+           ('spondalium', 'spondaulium'), ('coralium', 'coral-lum'), ('Tenedos', '-us'),
+           ('intĕremptĭo', '-emt-'), ('octōgĭes', '-iens'), ('ignĭcŏlor', '-ōrus'),
+           ('Solymus', '-on'), ('sŭpĕrumerale', '-humer-'), ('Erythēa', '-_ia')]
+
+SAMPLE_SIZE = 2000
+
+def git_commit():
+  try:
+    return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                          capture_output=True, text=True, check=True).stdout.strip()
+  except (OSError, subprocess.CalledProcessError):
+    return ''
+
+def best(function, repeat, number=1):
+  # Best time of repeat runs of function(), divided by number.
+  times = []
+  for i in range(repeat):
+    start = time.perf_counter()
+    function()
+    times.append(time.perf_counter() - start)
+  return min(times) / number
+
+def run(scale=1.0, seed=1, repeat=3):
+  entries = int(corpus.REAL_ENTRIES * scale)
+  directory = tempfile.mkdtemp(prefix='ls-benchmark-')
+  previous_directory = os.getcwd()
+  os.chdir(directory) # main.py reads and writes in the current directory
+  try:
+    corpus.write('lewis-short.txt', entries, seed)
+    with open('lewis-short.txt') as f:
+      lines = [line for line in f.read().splitlines() if len(line.strip()) > 1]
+    lines = random.Random(seed).sample(lines[2:], min(SAMPLE_SIZE, len(lines) - 2))
+
+    import main
+    timings = {}
+
+    def whole_run():
+      with contextlib.redirect_stdout(io.StringIO()):
+        main.build()
+        main.verify()
+    timings['build'] = best(whole_run, repeat)
+    print(f'build: {timings["build"]:.3f} s')
+
+    # The guess log and headwords left over from the build are kept; add()
+    # only skips pairs that are already there.
+    words = [main.first_words(line)[0] for line in lines]
+    pairs = list(zip(words, words[1:]))
+    functions = {
+      'apply_change': (lambda: [main.apply_change(o, c) for o, c in CHANGES], len(CHANGES)),
+      'sim': (lambda: [main.sim(main.n(a), main.n(b)) for a, b in pairs], len(pairs)),
+      'normalize': (lambda: [main.normalize(line) for line in lines], len(lines)),
+      'first_words': (lambda: [main.first_words(line) for line in lines], len(lines)),
+      'examine_or_also_and_with_parenth': (lambda: [main.examine_or_also_and_with_parenth(line) for line in lines], len(lines)),
+      'examine_subsequent_additions': (lambda: [main.examine_subsequent_additions(line) for line in lines], len(lines)),
+    }
+    for name, (function, number) in functions.items():
+      timings[name] = best(function, repeat, number)
+      print(f'{name}: {timings[name] * 1e6:.1f} µs per call')
+  finally:
+    os.chdir(previous_directory)
+    shutil.rmtree(directory, ignore_errors=True)
+
+  return {'date': datetime.datetime.now().isoformat(timespec='seconds'),
+          'commit': git_commit(),
+          'python': platform.python_version(),
+          'scale': scale, 'seed': seed, 'entries': entries, 'repeat': repeat,
+          'timings': timings}
+
+def latest_results():
+  if not os.path.isdir(RESULTS_DIRECTORY):
+    return None
+  files = sorted(f for f in os.listdir(RESULTS_DIRECTORY) if f.endswith('.json'))
+  if not files:
+    return None
+  return os.path.join(RESULTS_DIRECTORY, files[-1])
+
+def compare(old, new):
+  # Prints old and new timings side by side.
+  print('')
+  print(f'Compared with {old["commit"] or "?"} ({old["date"]}, scale {old["scale"]}):')
+  for name, seconds in new['timings'].items():
+    if name in old['timings']:
+      ratio = seconds / old['timings'][name] if old['timings'][name] else 0.0
+      print(f'  {name:34} {old["timings"][name]:12.6f} {seconds:12.6f}  x{ratio:.2f}')
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description='Time the headword parser on a synthetic dictionary.')
+  parser.add_argument('--scale', type=float, default=1.0, help=f'size relative to the real dictionary ({corpus.REAL_ENTRIES} entries), up to 10')
+  parser.add_argument('--seed', type=int, default=1)
+  parser.add_argument('--repeat', type=int, default=3)
+  parser.add_argument('--compare', metavar='FILE', help='earlier results file (default: the latest one)')
+  args = parser.parse_args()
+
+  previous = args.compare or latest_results()
+  results = run(args.scale, args.seed, args.repeat)
+
+  os.makedirs(RESULTS_DIRECTORY, exist_ok=True)
+  filename = os.path.join(RESULTS_DIRECTORY, f'{results["date"].replace(":", "")}-{results["commit"] or "unknown"}.json')
+  with open(filename, 'w') as f:
+    json.dump(results, f, indent=4)
+  print(f'Saved to {filename}.')
+
+  if previous:
+    with open(previous) as f:
+      compare(json.load(f), results)
@@ -0,0 +1,188 @@
+#######################################################################################
+#
+# Checking the outputs
+#
+# Reloading lewis_short_by_headword.json with json.load() and rebuilding the text
+# dictionary, only to look up one headword, takes nearly as long as writing them. So
+# the writers (main.py, spill.py) open the outputs with open_output(), which keeps
+# the size and sha256 of what goes into each file as it is written, and note how
+# many headwords, entries and citations they wrote:
+#
+#   written[filename]: Written(size, sha256, headwords, entries, citations)
+#
+# main.verify() then checks the files against that, one of two ways:
+#
+#   stream: read_json() and read_text() read each file once, in binary, hashing it
+#           and counting its headwords, entries and citations from the layout of
+#           its lines, without decoding more than the keyword's entries.
+#   sample: only the sizes are compared, and the entries of a random sample of
+#           headwords are looked up by seeking into each file and compared with the
+#           dictionary in memory. Much less is read, but a change the sample misses
+#           goes unnoticed.
+#
+#######################################################################################
+
+import hashlib
+import io
+import json
+import os
+import random
+
+import reader
+
+SAMPLE_SIZE = 100
+
+class Written():
+  # What went into one output file.
+  def __init__(self, filename):
+    self.filename = filename
+    self.size = 0
+    self.hash = hashlib.sha256()
+    self.headwords = None
+    self.entries = None
+    self.citations = None
+
+  @property
+  def sha256(self):
+    return self.hash.hexdigest()
+
+written = {} # filename -> Written, for the files written since the last build started
+
+class ChecksumWriter(io.BufferedWriter):
+  # Hashes the bytes on their way to the file. TextIOWrapper hands them over in
+  # chunks of a few kilobytes, so this costs little more than the hashing.
+  def __init__(self, raw, record):
+    super().__init__(raw)
+    self.record = record
+
+  def write(self, data):
+    self.record.hash.update(data)
+    self.record.size += len(data)
+    return super().write(data)
+
+def open_output(filename):
+  # Like open(filename, 'w'), and the same bytes end up in the file.
+  record = written[filename] = Written(filename)
+  return io.TextIOWrapper(ChecksumWriter(io.FileIO(filename, 'w'), record))
+
+def read_json(filename, keyword=None):
+  # Reads a JSON output once; returns its Written and the entries of keyword.
+  # Relies on the layout of json.dump(..., indent=4), as in compare.py.
+  found = Written(filename)
+  found.headwords = found.citations = 0
+  target = json.dumps(keyword).encode() + b': [' if keyword else None
+  entries = []
+  wanted = False
+  with open(filename, 'rb') as f:
+    for line in f:
+      found.hash.update(line)
+      found.size += len(line)
+      line = line.strip()
+      if line.startswith(b'"'):
+        if line.endswith(b'['):
+          found.headwords += 1
+          wanted = line == target
+        elif line.endswith((b'[]', b'[],')):
+          found.headwords += 1
+          wanted = False
+        else:
+          found.citations += 1
+          if wanted:
+            entries.append(json.loads(line.rstrip(b',')))
+  return found, entries
+
+def read_text(filename, keyword=None):
+  # The same for a text output.
+  found = Written(filename)
+  found.entries = found.citations = 0
+  headwords = set()
+  entries = []
+  wanted = False
+  with open(filename, 'rb') as f:
+    for line in f:
+      found.hash.update(line)
+      found.size += len(line)
+      if line.startswith(b'#'):
+        names = line[1:].rstrip(b'\r\n').split(b',')
+        found.entries += 1
+        found.citations += len(names)
+        headwords.update(names)
+        wanted = keyword is not None and keyword.encode() in names
+      elif wanted:
+        entries.append(line.decode().strip())
+        wanted = False
+  found.headwords = len(headwords)
+  return found, entries
+
+def differences(expected, found, names=('size', 'sha256', 'headwords', 'entries', 'citations')):
+  # What does not match, as messages.
+  problems = []
+  for name in names:
+    a, b = getattr(expected, name), getattr(found, name)
+    if a is not None and b is not None and a != b:
+      problems.append(f'{expected.filename}: {name} {b} does not match the {a} written')
+  return problems
+
+def verify_streaming(json_filename, text_filename, keyword=None):
+  # Reads both outputs once. Returns the problems found and the entries of
+  # keyword in each file.
+  problems = []
+  json_found, json_entries = read_json(json_filename, keyword)
+  text_found, text_entries = read_text(text_filename, keyword)
+  for filename, found in [(json_filename, json_found), (text_filename, text_found)]:
+    if filename in written:
+      problems += differences(written[filename], found)
+  # The two files hold the same citations of the same headwords.
+  if json_found.headwords != text_found.headwords or json_found.citations != text_found.citations:
+    problems.append(f'{json_filename} has {json_found.headwords} headwords and {json_found.citations} '
+                    f'citations, {text_filename} {text_found.headwords} and {text_found.citations}')
+  return problems, json_entries, text_entries
+
+def json_headword_at(f, offset):
+  # Seeks into a JSON output and reads the first headword after offset with
+  # its entries; returns (headword, entries), or None past the last one.
+  f.seek(offset)
+  if offset:
+    f.readline() # most likely the middle of a line
+  for line in f:
+    line = line.strip()
+    if line.startswith(b'"') and line.endswith(b'['):
+      headword = json.loads(line[:-1].rstrip()[:-1])
+      entries = []
+      for line in f:
+        line = line.strip()
+        if not line.startswith(b'"'):
+          return headword, entries
+        entries.append(json.loads(line.rstrip(b',')))
+  return None
+
+def verify_sampled(json_filename, text_filename, dictionary, samples=SAMPLE_SIZE, seed=None):
+  # Compares the sizes, and the entries of a sample of headwords in each file
+  # with dictionary (headword -> entries). Returns the problems found.
+  problems = []
+  for filename in (json_filename, text_filename):
+    if filename in written and os.path.getsize(filename) != written[filename].size:
+      problems.append(f'{filename}: size {os.path.getsize(filename)} does not match the {written[filename].size} written')
+  if problems:
+    return problems
+
+  rng = random.Random(seed)
+  size = os.path.getsize(json_filename)
+  with open(json_filename, 'rb') as f:
+    for i in range(samples):
+      found = json_headword_at(f, rng.randrange(size) if size else 0)
+      if found is None:
+        continue
+      headword, entries = found
+      if headword not in dictionary or entries != list(dictionary[headword]):
+        problems.append(f'{json_filename}: the entries of {headword} do not match')
+
+  # The text file is looked up through its index (see reader.py), which the
+  # later stages of the build have already made.
+  headwords = rng.sample(list(dictionary), min(samples, len(dictionary)))
+  with reader.TextDictionary(text_filename) as text:
+    for headword in headwords:
+      # In the order they come in the text file, which may differ.
+      if headword not in text or sorted(text[headword]) != sorted(dictionary[headword]):
+        problems.append(f'{text_filename}: the entries of {headword} do not match')
+  return problems
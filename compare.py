@@ -0,0 +1,281 @@
+#######################################################################################
+#
+# Comparing two builds
+#
+# INPUT:  two builds, each as lewis_short_by_headword.json, lewis_short_by_headword.txt
+#         or a fingerprint of either
+# OUTPUT: the headwords and citations one has and the other has not, by entry
+#         lewis_short_by_headword.fingerprint (written by every full build)
+#
+#   python compare.py before.fingerprint lewis_short_by_headword.json
+#   python compare.py --save old.fingerprint old/lewis_short_by_headword.txt
+#
+# Loading both JSON files and diffing them takes a lot of time and memory. Instead,
+# each build is read once, as a stream of (headword, entry) citations, and reduced to
+# a fingerprint: the digest of each entry, the start of its text (to show in the
+# report) and the headwords that cite it, sorted by digest, followed by every
+# headword, sorted. The sorting is done on disk in runs (see spill.py), so only
+# about memory_budget bytes are used however large the build. Two fingerprints are
+# then compared by going through them side by side.
+#
+# A fingerprint is much smaller than the outputs, and full builds save one, so a new
+# build can be compared with an old one that is no longer around:
+#
+#   cp lewis_short_by_headword.fingerprint before.fingerprint
+#   python main.py
+#   python compare.py before.fingerprint lewis_short_by_headword.fingerprint
+#
+# The report lists, for each entry whose citations changed, the headwords it lost
+# (-) and gained (+); an entry whose text changed shows up as one entry removed and
+# another added. It ends with the headwords that are new or gone altogether, and
+# compare.py exits with status 1 if the builds differ.
+#
+#######################################################################################
+
+import argparse
+import hashlib
+import itertools
+import json
+import marshal
+import os
+import shutil
+import struct
+import sys
+import tempfile
+from operator import itemgetter
+
+import reader
+import spill
+
+JSON_RESULT_FILE = 'lewis_short_by_headword.json'
+TEXT_RESULT_FILE = 'lewis_short_by_headword.txt'
+FINGERPRINT_FILE = 'lewis_short_by_headword.fingerprint'
+
+# Increase this whenever the layout changes.
+FINGERPRINT_VERSION = 1
+MAGIC = b'LSFP'
+
+DIGEST_SIZE = 8
+LABEL_LENGTH = 60 # characters of each entry kept for the report
+MEMORY_BUDGET = 64 * 1024 * 1024
+
+def json_lines(filename):
+  # Yields (headword, entry as JSON) for each citation in a JSON output, one
+  # line at a time. This relies on the layout of json.dump(..., indent=4), as
+  # main.py and spill.py write it: each headword and each entry on a line of
+  # its own.
+  with open(filename, 'r') as f:
+    headword = None
+    for number, line in enumerate(f, 1):
+      line = line.strip()
+      if line in ('{', '}', '{}', ']', '],', ''):
+        continue
+      if line.endswith(('[]', '[],')):
+        continue # a headword without entries
+      if line.endswith('['):
+        headword = json.loads(line[:-1].rstrip()[:-1])
+      elif line.startswith('"') and headword is not None:
+        yield headword, line[:-1] if line.endswith(',') else line
+      else:
+        raise ValueError(f'{filename}, line {number}: not laid out as main.py writes JSON')
+
+def json_citations(filename):
+  # Yields (headword, entry) for each citation in a JSON output.
+  for headword, value in json_lines(filename):
+    yield headword, json.loads(value)
+
+def text_citations(filename):
+  # The same for a text output.
+  for headwords, entry in reader.pairs(filename):
+    for headword in headwords:
+      yield headword, entry
+
+def citations(filename):
+  if filename.endswith('.json'):
+    return json_citations(filename)
+  return text_citations(filename)
+
+def write_blocks(f, records):
+  # Writes records to an open file in marshal blocks; returns how many.
+  count = 0
+  block = []
+  for record in records:
+    block.append(record)
+    count += 1
+    if len(block) == spill.BLOCK_SIZE:
+      marshal.dump(block, f)
+      block = []
+  if block:
+    marshal.dump(block, f)
+  return count
+
+def read_blocks(filename, offset, end):
+  # Yields the records written by write_blocks() between two offsets.
+  with open(filename, 'rb') as f:
+    f.seek(offset)
+    while f.tell() < end:
+      yield from marshal.load(f)
+
+def save_fingerprint(filename, fingerprint_file=FINGERPRINT_FILE, memory_budget=MEMORY_BUDGET):
+  # Reads a JSON or text output once and saves its fingerprint. Returns the
+  # number of headwords, entries and citations.
+  directory = tempfile.mkdtemp(prefix='ls-compare-', dir=os.path.dirname(os.path.abspath(fingerprint_file)))
+  try:
+    # The entry and headword sorts are filled at the same time, so each gets half.
+    # The entries are then drained first, and if they did not fit, the headwords
+    # are put on disk beforehand so that the merge has the whole budget.
+    run_length = max(spill.MINIMUM_RUN, memory_budget // 2 // spill.RECORD_SIZE)
+    by_entry = spill.ExternalSort(directory, run_length)
+    by_headword = spill.ExternalSort(directory, run_length)
+    entry = digest = None
+    count = 0
+    for headword, text in citations(filename):
+      if text != entry:
+        entry = text
+        digest = hashlib.blake2b(text.encode(), digest_size=DIGEST_SIZE).digest()
+      by_entry.add((digest, headword, text[:LABEL_LENGTH]))
+      by_headword.add((headword,))
+      count += 1
+    if by_entry.runs and by_headword.records:
+      by_headword.spill()
+
+    def entries():
+      for digest, records in itertools.groupby(by_entry.sorted(), key=itemgetter(0)):
+        records = list(records)
+        yield digest, records[0][2], tuple(sorted(set(map(itemgetter(1), records))))
+
+    def headwords():
+      for headword, records in itertools.groupby(by_headword.sorted()):
+        yield headword[0]
+
+    # The header says where the headwords start; it is filled in at the end.
+    temp = fingerprint_file + '.tmp'
+    with open(temp, 'wb') as f:
+      f.write(MAGIC + struct.pack('<IQ', FINGERPRINT_VERSION, 0))
+      entry_count = write_blocks(f, entries())
+      start = f.tell()
+      headword_count = write_blocks(f, headwords())
+      f.seek(len(MAGIC))
+      f.write(struct.pack('<IQ', FINGERPRINT_VERSION, start))
+    os.replace(temp, fingerprint_file)
+  finally:
+    shutil.rmtree(directory, ignore_errors=True)
+  return headword_count, entry_count, count
+
+class Fingerprint():
+  def __init__(self, filename):
+    self.filename = filename
+    with open(filename, 'rb') as f:
+      header = f.read(len(MAGIC) + 12)
+      end = f.seek(0, os.SEEK_END)
+    if len(header) != len(MAGIC) + 12 or not header.startswith(MAGIC):
+      raise ValueError(f'{filename} is not a fingerprint file.')
+    version, self.start = struct.unpack('<IQ', header[len(MAGIC):])
+    if version != FINGERPRINT_VERSION:
+      raise ValueError(f'{filename} was written by another version of compare.py.')
+    self.end = end
+
+  def entries(self):
+    # (digest, label, headwords) for each entry, by digest.
+    return read_blocks(self.filename, len(MAGIC) + 12, self.start)
+
+  def headwords(self):
+    # Every headword, sorted.
+    return read_blocks(self.filename, self.start, self.end)
+
+def side_by_side(old, new, key=lambda item: item):
+  # Goes through two sorted iterables together; yields (old item, new item)
+  # for each key, with None on the side that does not have it.
+  old, new = iter(old), iter(new)
+  a, b = next(old, None), next(new, None)
+  while a is not None or b is not None:
+    if b is None or (a is not None and key(a) < key(b)):
+      yield a, None
+      a = next(old, None)
+    elif a is None or key(b) < key(a):
+      yield None, b
+      b = next(new, None)
+    else:
+      yield a, b
+      a, b = next(old, None), next(new, None)
+
+def compare(old, new, out=sys.stdout):
+  # Reports the differences between two Fingerprints; returns the counts.
+  counts = dict.fromkeys(['entries removed', 'entries added', 'entries changed',
+                          'citations removed', 'citations added',
+                          'headwords removed', 'headwords added'], 0)
+  for a, b in side_by_side(old.entries(), new.entries(), key=itemgetter(0)):
+    if b is None:
+      counts['entries removed'] += 1
+      counts['citations removed'] += len(a[2])
+      print(f'- {a[1]}', file=out)
+      print(f'    - {", ".join(a[2])}', file=out)
+    elif a is None:
+      counts['entries added'] += 1
+      counts['citations added'] += len(b[2])
+      print(f'+ {b[1]}', file=out)
+      print(f'    + {", ".join(b[2])}', file=out)
+    elif a[2] != b[2]:
+      removed = [headword for headword in a[2] if headword not in b[2]]
+      added = [headword for headword in b[2] if headword not in a[2]]
+      counts['entries changed'] += 1
+      counts['citations removed'] += len(removed)
+      counts['citations added'] += len(added)
+      print(f'~ {b[1]}', file=out)
+      if removed:
+        print(f'    - {", ".join(removed)}', file=out)
+      if added:
+        print(f'    + {", ".join(added)}', file=out)
+
+  removed = []
+  added = []
+  for a, b in side_by_side(old.headwords(), new.headwords()):
+    if b is None:
+      removed.append(a)
+    elif a is None:
+      added.append(b)
+  counts['headwords removed'] = len(removed)
+  counts['headwords added'] = len(added)
+  if removed:
+    print(f'Headwords removed: {", ".join(removed)}', file=out)
+  if added:
+    print(f'Headwords added: {", ".join(added)}', file=out)
+  return counts
+
+def open_fingerprint(filename, directory, memory_budget=MEMORY_BUDGET):
+  # A Fingerprint of an output or fingerprint file.
+  try:
+    return Fingerprint(filename)
+  except ValueError:
+    if filename.endswith('.fingerprint'):
+      raise
+  fingerprint_file = os.path.join(directory, f'{len(os.listdir(directory))}.fingerprint')
+  save_fingerprint(filename, fingerprint_file, memory_budget)
+  return Fingerprint(fingerprint_file)
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description='Compare two builds of the headword index.')
+  parser.add_argument('old', help='JSON or text output, or a fingerprint of one')
+  parser.add_argument('new', nargs='?', help='the same for the other build')
+  parser.add_argument('--save', metavar='FINGERPRINT', help='only save the fingerprint of OLD to this file')
+  parser.add_argument('--memory-budget', type=int, default=MEMORY_BUDGET // 1024 // 1024, metavar='MB',
+                      help=f'memory for sorting, in megabytes (default {MEMORY_BUDGET // 1024 // 1024})')
+  args = parser.parse_args()
+  memory_budget = args.memory_budget * 1024 * 1024
+
+  if args.save:
+    headwords, entries, count = save_fingerprint(args.old, args.save, memory_budget)
+    print(f'Saved to {args.save}. {headwords} headwords, {entries} entries, {count} citations.')
+    sys.exit(0)
+  if not args.new:
+    parser.error('give two builds to compare, or --save')
+
+  directory = tempfile.mkdtemp(prefix='ls-compare-')
+  try:
+    old = open_fingerprint(args.old, directory, memory_budget)
+    new = open_fingerprint(args.new, directory, memory_budget)
+    counts = compare(old, new)
+  finally:
+    shutil.rmtree(directory, ignore_errors=True)
+  print(', '.join(f'{count} {name}' for name, count in counts.items()))
+  sys.exit(1 if any(counts.values()) else 0)
@@ -0,0 +1,191 @@
+#######################################################################################
+#
+# English to Latin index
+#
+# INPUT:  lewis_short_by_headword.txt
+# OUTPUT: lewis_short_by_headword.english
+#
+#   python main.py --english-index
+#   python english.py plough again
+#
+# An inverted index of the English in each entry, so that the dictionary can be
+# searched from English without reading every entry. The header of each entry (the
+# forms, principal parts and part of speech; see gloss.py) is skipped, and so are Greek,
+# words with Latin vowel marks, author abbreviations (Cic., Plin.) and L&S's own
+# abbreviations (adj., sq.). What is left is mostly the English definitions, though
+# unmarked Latin in the quotations gets in too.
+#
+# Each term is saved with the sorted numbers of the entries it appears in (numbered
+# as in the text file; see reader.py), as the differences between successive numbers
+# in LEB128 varints, so that most take a single byte:
+#
+#   terms:    every term, sorted
+#   starts:   array of unsigned ints; the postings of terms[i] are
+#             postings[starts[i]:starts[i + 1]]
+#   counts:   array of unsigned ints, the number of entries for each term
+#   postings: bytes
+#
+# search() finds the entries that contain all the words of a query, starting from the
+# rarest word.
+#
+#######################################################################################
+
+import argparse
+import marshal
+import os
+import re
+from array import array
+from bisect import bisect_left
+
+import gloss
+import reader
+
+TEXT_RESULT_FILE = 'lewis_short_by_headword.txt'
+ENGLISH_FILE = 'lewis_short_by_headword.english'
+
+# Increase this whenever the layout above changes.
+ENGLISH_VERSION = 1
+MAGIC = b'LSEN'
+
+# A run of letters, with its period if it has one.
+WORD = re.compile('[^\W\d_]+\.?')
+
+STOP_WORDS = {'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'in', 'into',
+              'is', 'it', 'its', 'of', 'on', 'or', 'that', 'the', 'this', 'to', 'with'}
+ABBREVIATIONS = {'abl.', 'acc.', 'act.', 'adj.', 'adv.', 'al.', 'cf.', 'comp.', 'dat.',
+                 'dep.', 'dim.', 'e.', 'fem.', 'fin.', 'fig.', 'gen.', 'h.', 'i.', 'id.',
+                 'ib.', 'init.', 'lit.', 'masc.', 'neutr.', 'nom.', 'orig.', 'part.', 'perf.',
+                 'plur.', 'poet.', 'prep.', 'pron.', 'q.', 'sc.', 'sing.', 'sq.', 'sqq.',
+                 'sup.', 'trop.', 'v.', 'voc.', 'll.', 'l.'}
+
+def terms(text):
+  # The index terms in a piece of text, in order, repeats included.
+  for word in WORD.findall(text):
+    if word.endswith('.'):
+      if word[0].isupper() or word.lower() in ABBREVIATIONS:
+        continue # Cic., adj.
+      word = word[:-1]
+    if not word.isascii():
+      continue # Greek, or Latin with vowel marks
+    word = word.lower()
+    if len(word) > 1 and word not in STOP_WORDS:
+      yield word
+
+def encode(numbers):
+  # Sorted numbers -> their differences as LEB128 varints.
+  data = bytearray()
+  previous = 0
+  for number in numbers:
+    delta = number - previous
+    previous = number
+    while delta >= 0x80:
+      data.append(delta & 0x7f | 0x80)
+      delta >>= 7
+    data.append(delta)
+  return data
+
+def decode(data):
+  # The reverse of encode().
+  numbers = []
+  number = 0
+  delta = 0
+  shift = 0
+  for byte in data:
+    delta |= (byte & 0x7f) << shift
+    if byte & 0x80:
+      shift += 7
+    else:
+      number += delta
+      numbers.append(number)
+      delta = 0
+      shift = 0
+  return numbers
+
+def build_english_index(text_filename=TEXT_RESULT_FILE, filename=ENGLISH_FILE):
+  # Indexes the definitions in the text file and saves the index; returns the
+  # number of terms.
+  stat = os.stat(text_filename)
+  index = {} # term -> array of entry numbers
+  for number, (headwords, entry) in enumerate(reader.pairs(text_filename)):
+    for term in set(terms(entry[gloss.definition_start(entry):])):
+      numbers = index.get(term)
+      if numbers is None:
+        numbers = index[term] = array('I')
+      numbers.append(number) # in order, as the entries are read in order
+
+  sorted_terms = sorted(index)
+  starts = array('I', [0])
+  counts = array('I')
+  postings = bytearray()
+  for term in sorted_terms:
+    postings += encode(index[term])
+    starts.append(len(postings))
+    counts.append(len(index[term]))
+
+  data = (ENGLISH_VERSION, stat.st_size, stat.st_mtime_ns, tuple(sorted_terms),
+          starts.tobytes(), counts.tobytes(), bytes(postings))
+  temp = filename + '.tmp'
+  with open(temp, 'wb') as f:
+    f.write(MAGIC)
+    marshal.dump(data, f)
+  os.replace(temp, filename)
+  return len(sorted_terms)
+
+class EnglishIndex():
+  def __init__(self, filename=ENGLISH_FILE):
+    with open(filename, 'rb') as f:
+      if f.read(len(MAGIC)) != MAGIC:
+        raise ValueError(f'{filename} is not an English index.')
+      data = marshal.load(f)
+    if not isinstance(data, tuple) or len(data) != 7 or data[0] != ENGLISH_VERSION:
+      raise ValueError(f'{filename} was written by another version of english.py.')
+    version, self.size, self.mtime, self.terms, starts, counts, self.data = data
+    self.starts = array('I', starts)
+    self.counts = array('I', counts)
+
+  def is_stale(self, text_filename=TEXT_RESULT_FILE):
+    # True if the text file has changed since the index was built.
+    stat = os.stat(text_filename)
+    return (self.size, self.mtime) != (stat.st_size, stat.st_mtime_ns)
+
+  def find(self, term):
+    # Position of term in self.terms, or -1.
+    i = bisect_left(self.terms, term)
+    return i if i < len(self.terms) and self.terms[i] == term else -1
+
+  def postings(self, term):
+    # The entry numbers for one term, in order.
+    i = self.find(term)
+    if i == -1:
+      return []
+    return decode(self.data[self.starts[i]:self.starts[i + 1]])
+
+  def search(self, query):
+    # The numbers of the entries that contain every term of the query.
+    positions = [self.find(term) for term in dict.fromkeys(terms(query))]
+    if not positions or -1 in positions:
+      return []
+    positions.sort(key=lambda i: self.counts[i]) # rarest first
+    result = decode(self.data[self.starts[positions[0]]:self.starts[positions[0] + 1]])
+    for i in positions[1:]:
+      if not result:
+        break
+      found = set(decode(self.data[self.starts[i]:self.starts[i + 1]]))
+      result = [number for number in result if number in found]
+    return result
+
+def lookup(dictionary, index, query):
+  # The entries of a reader.TextDictionary that contain every term of the query.
+  return [dictionary.entry(number) for number in index.search(query)]
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description='Find Lewis and Short entries by the English in them.')
+  parser.add_argument('words', nargs='+')
+  parser.add_argument('--index', default=ENGLISH_FILE, help=f'index made by main.py --english-index (default {ENGLISH_FILE})')
+  parser.add_argument('--input', default=TEXT_RESULT_FILE, help=f'text output of main.py (default {TEXT_RESULT_FILE})')
+  args = parser.parse_args()
+
+  index = EnglishIndex(args.index)
+  with reader.TextDictionary(args.input) as dictionary:
+    for entry in lookup(dictionary, index, ' '.join(args.words)):
+      print(entry[:160])
@@ -0,0 +1,202 @@
+#######################################################################################
+#
+# StarDict and dictd export
+#
+# INPUT:  lewis_short_by_headword.txt
+# OUTPUT: export/stardict/lewis-short.ifo, .idx, .dict.dz
+#         export/dictd/lewis-short.index, .dict.dz
+#
+#   python export.py [--input lewis_short_by_headword.txt] [--output export]
+#
+# Both formats keep the entries in a .dict.dz data file and look them up through a
+# sorted index of (headword, offset, length). Every headword of the text file gets an
+# index line for each entry it cites, so the variants found by the parser (e.g.
+# dŭcentĭens for dŭcentĭes) can be looked up like any other headword; each entry is
+# stored only once.
+#
+# The text file is read a pair of lines at a time and the entries are compressed as
+# they are read. Only the index lines are kept until the end, to be sorted:
+#
+#   StarDict (.idx): headword, NUL, then 32-bit big-endian offset and size, in the
+#                    order of g_ascii_strcasecmp(), ties broken by strcmp()
+#   dictd (.index):  headword, offset and length in dictd's base64 digits, separated
+#                    by tabs and sorted case-insensitively; the database is marked
+#                    as UTF-8 with all characters significant (00-database-utf8,
+#                    00-database-allchars)
+#
+# .dict.dz files are dictzip files: gzip files whose data is compressed in chunks of
+# CHUNK_LENGTH bytes, each of which can be decompressed on its own, with a table of
+# the compressed chunk sizes in the gzip header. Plain gzip tools read them as usual.
+#
+#######################################################################################
+
+import argparse
+import os
+import struct
+import zlib
+
+import reader
+
+TEXT_RESULT_FILE = 'lewis_short_by_headword.txt'
+EXPORT_DIRECTORY = 'export'
+NAME = 'lewis-short'
+
+TITLE = 'Lewis and Short: A Latin Dictionary'
+DESCRIPTION = ('Lewis and Short, A Latin Dictionary (1879), indexed by headword and by the '
+               'variant headwords found in each entry.')
+URL = 'https://github.com/telemachus/plaintext-lewis-short'
+
+# Uncompressed bytes per dictzip chunk, as dictzip itself uses.
+CHUNK_LENGTH = 58315
+
+class DictzipWriter():
+  # Compresses a stream of bytes into a dictzip file. The chunk table goes in
+  # the header, before the data, so the compressed chunks are kept in a
+  # temporary file until close().
+  def __init__(self, filename):
+    self.filename = filename
+    self.chunks = open(filename + '.chunks', 'w+b')
+    self.compressor = zlib.compressobj(9, zlib.DEFLATED, -zlib.MAX_WBITS)
+    self.buffer = bytearray()
+    self.sizes = []
+    self.crc = 0
+    self.size = 0
+
+  def write(self, data):
+    self.crc = zlib.crc32(data, self.crc)
+    self.size += len(data)
+    self.buffer += data
+    # The last chunk is held back, as it is the one finished with Z_FINISH.
+    while len(self.buffer) > CHUNK_LENGTH:
+      self.compress(self.buffer[:CHUNK_LENGTH], zlib.Z_FULL_FLUSH)
+      del self.buffer[:CHUNK_LENGTH]
+
+  def compress(self, chunk, mode):
+    data = self.compressor.compress(bytes(chunk)) + self.compressor.flush(mode)
+    self.chunks.write(data)
+    self.sizes.append(len(data))
+
+  def close(self):
+    self.compress(self.buffer, zlib.Z_FINISH)
+    self.buffer = bytearray()
+    length = 6 + 2 * len(self.sizes)
+    if length + 4 > 0xffff:
+      raise ValueError(f'{self.filename}: too much data for one dictzip file')
+
+    name = os.path.basename(self.filename)
+    if name.endswith('.dz'):
+      name = name[:-3]
+    with open(self.filename, 'wb') as f:
+      # gzip header with FEXTRA and FNAME; no timestamp; maximum compression, Unix
+      f.write(struct.pack('<BBBBIBB', 0x1f, 0x8b, 8, 0x04 | 0x08, 0, 2, 3))
+      f.write(struct.pack('<H', length + 4))
+      f.write(b'RA' + struct.pack('<HHHH', length, 1, CHUNK_LENGTH, len(self.sizes)))
+      f.write(struct.pack(f'<{len(self.sizes)}H', *self.sizes))
+      f.write(name.encode('latin-1', 'replace') + b'\0')
+      self.chunks.seek(0)
+      for block in iter(lambda: self.chunks.read(1 << 20), b''):
+        f.write(block)
+      f.write(struct.pack('<II', self.crc, self.size & 0xffffffff))
+    self.chunks.close()
+    os.remove(self.filename + '.chunks')
+
+def stardict_key(word):
+  # g_ascii_strcasecmp(), then strcmp() on the UTF-8 bytes.
+  return word.lower(), word
+
+BASE64 = 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/'
+
+def dictd_number(number):
+  # Offsets and lengths in dictd indexes are written in base 64.
+  digits = BASE64[number % 64]
+  while number >= 64:
+    number //= 64
+    digits = BASE64[number % 64] + digits
+  return digits
+
+class StarDictWriter():
+  def __init__(self, directory, name=NAME):
+    os.makedirs(directory, exist_ok=True)
+    self.base = os.path.join(directory, name)
+    self.data = DictzipWriter(self.base + '.dict.dz')
+    self.index = [] # (headword bytes, offset, size)
+    self.offset = 0
+
+  def add(self, headwords, entry):
+    data = entry.encode('utf-8')
+    self.data.write(data)
+    for headword in headwords:
+      self.index.append((headword.encode('utf-8'), self.offset, len(data)))
+    self.offset += len(data)
+
+  def close(self):
+    self.data.close()
+    self.index.sort(key=lambda item: stardict_key(item[0]))
+    with open(self.base + '.idx', 'wb') as f:
+      for headword, offset, size in self.index:
+        f.write(headword + b'\0' + struct.pack('>II', offset, size))
+      index_size = f.tell()
+    with open(self.base + '.ifo', 'w', encoding='utf-8', newline='\n') as f:
+      f.write("StarDict's dict ifo file\n"
+              'version=2.4.2\n'
+              f'wordcount={len(self.index)}\n'
+              f'idxfilesize={index_size}\n'
+              f'bookname={TITLE}\n'
+              f'description={DESCRIPTION}\n'
+              f'website={URL}\n'
+              'sametypesequence=m\n')
+    return len(self.index)
+
+class DictdWriter():
+  def __init__(self, directory, name=NAME):
+    os.makedirs(directory, exist_ok=True)
+    self.base = os.path.join(directory, name)
+    self.data = DictzipWriter(self.base + '.dict.dz')
+    self.index = [] # (headword, offset, length)
+    self.offset = 0
+    # dictd reads these entries for the database's name and settings.
+    for headword, text in [('00-database-allchars', ''),
+                           ('00-database-info', DESCRIPTION),
+                           ('00-database-short', TITLE),
+                           ('00-database-url', URL),
+                           ('00-database-utf8', '')]:
+      self.add([headword], f'{headword}\n{text}'.rstrip())
+
+  def add(self, headwords, entry):
+    data = (entry + '\n').encode('utf-8')
+    self.data.write(data)
+    for headword in headwords:
+      self.index.append((headword, self.offset, len(data)))
+    self.offset += len(data)
+
+  def close(self):
+    self.data.close()
+    self.index.sort(key=lambda item: item[0].lower())
+    with open(self.base + '.index', 'w', encoding='utf-8', newline='\n') as f:
+      for headword, offset, length in self.index:
+        f.write(f'{headword}\t{dictd_number(offset)}\t{dictd_number(length)}\n')
+    return len(self.index)
+
+def export(filename=TEXT_RESULT_FILE, directory=EXPORT_DIRECTORY, formats=('stardict', 'dictd')):
+  # Writes the chosen formats from the text output; returns the number of
+  # index lines written for each.
+  writers = {}
+  if 'stardict' in formats:
+    writers['stardict'] = StarDictWriter(os.path.join(directory, 'stardict'))
+  if 'dictd' in formats:
+    writers['dictd'] = DictdWriter(os.path.join(directory, 'dictd'))
+  for headwords, entry in reader.pairs(filename):
+    for writer in writers.values():
+      writer.add(headwords, entry)
+  return {name: writer.close() for name, writer in writers.items()}
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description='Export the headword index as StarDict and dictd dictionaries.')
+  parser.add_argument('--input', default=TEXT_RESULT_FILE, help=f'text output of main.py (default {TEXT_RESULT_FILE})')
+  parser.add_argument('--output', default=EXPORT_DIRECTORY, help=f'directory for the stardict/ and dictd/ folders (default {EXPORT_DIRECTORY})')
+  parser.add_argument('--format', choices=['stardict', 'dictd'], action='append', help='only export this format (may be repeated)')
+  args = parser.parse_args()
+
+  counts = export(args.input, args.output, args.format or ('stardict', 'dictd'))
+  for name, count in counts.items():
+    print(f'Saved {name} dictionary with {count} index entries to {os.path.join(args.output, name)}.')
@@ -0,0 +1,120 @@
+#######################################################################################
+#
+# Folding table for normalize()
+#
+# OUTPUT: folding.table (a cache, next to this file)
+#
+# alphabet.normalize() compares words without their accents with a single
+# str.translate(). The table for it is generated from Unicode's decompositions rather
+# than written out by hand, so that every accented letter of the alphabets below is
+# covered, and so that a word spelled with combining marks (a + U+0304) folds the same
+# as its precomposed form (ā):
+#
+#   - a letter with a decomposition becomes its base letter(s): ā -> a, ὅ -> ο
+#   - a combining mark becomes nothing
+#   - the letters in alphabet.table (æ -> ae, œ -> oe, and some Greek letters found in
+#     Latin words, such as ο -> o) are folded as alphabet.table says, whether they
+#     stand alone or are what is left of a decomposition (ǽ -> æ -> ae)
+#
+# Where alphabet.table folds an accented letter differently from its decomposition
+# (ἅ -> a, where the decomposition gives α), alphabet.table wins, so that normalize()
+# gives the same results as before for everything it already handled. The bare base
+# letter is then folded the same way (α -> a), or the decomposed form (α + U+0314 +
+# U+0301) would not fold as the precomposed one does.
+#
+# Generating the table takes longer than loading it, so it is saved in marshal format
+# with the Unicode version and a checksum of alphabet.table, and rebuilt when either
+# changes.
+#
+# Usage:
+#
+#   import folding
+#   trans_table = folding.translation_table(table)
+#   'ā'.translate(trans_table) == 'ā'.translate(trans_table) # True
+#
+#######################################################################################
+
+import hashlib
+import marshal
+import os
+import unicodedata
+
+FOLDING_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'folding.table')
+
+# Increase this whenever the table is generated differently.
+FOLDING_VERSION = 2
+MAGIC = b'LSFT'
+
+# The blocks the dictionary and its queries are written in.
+ALPHABETS = [(0x0000, 0x024f), # Basic Latin to Latin Extended-B
+             (0x0300, 0x036f), # Combining Diacritical Marks
+             (0x0370, 0x03ff), # Greek and Coptic
+             (0x1dc0, 0x1dff), # Combining Diacritical Marks Supplement
+             (0x1e00, 0x1eff), # Latin Extended Additional
+             (0x1f00, 0x1fff), # Greek Extended
+             (0x20d0, 0x20ff), # Combining Diacritical Marks for Symbols
+             (0xfe20, 0xfe2f)] # Combining Half Marks
+
+def fold(ch, extra):
+  # What one character folds to, or None to delete it.
+  if unicodedata.combining(ch) or unicodedata.category(ch) == 'Mn':
+    return None
+  if ch in extra:
+    return extra[ch]
+  return ''.join(extra.get(c, c) for c in base_letter(ch))
+
+def base_letter(ch):
+  # ch without its combining marks.
+  return ''.join(c for c in unicodedata.normalize('NFD', ch) if not unicodedata.combining(c))
+
+def with_bases(extra):
+  # extra, plus the bare base letter of each of its letters, folded the same
+  # way, where that base is a single letter extra does not fold itself.
+  result = dict(extra)
+  for ch, folded in extra.items():
+    base = base_letter(ch)
+    if len(base) == 1 and base != ch and base not in extra:
+      result.setdefault(base, folded)
+  return result
+
+def build_table(extra):
+  # Ordinal -> folded string (or None) for every character of ALPHABETS that
+  # changes, plus the characters of extra.
+  extra = with_bases(extra)
+  result = {}
+  characters = [chr(i) for low, high in ALPHABETS for i in range(low, high + 1)]
+  for ch in characters + [ch for ch in extra if len(ch) == 1]:
+    folded = fold(ch, extra)
+    if folded != ch:
+      result[ord(ch)] = folded
+  return result
+
+def table_checksum(extra):
+  h = hashlib.sha256()
+  for ch, folded in sorted(extra.items()):
+    h.update(f'{ch}\0{folded}\0'.encode('utf-8'))
+  return h.hexdigest()
+
+def translation_table(extra, filename=FOLDING_FILE):
+  # The table for str.translate(), from the cache if it is up to date.
+  # extra is alphabet.table.
+  key = (FOLDING_VERSION, unicodedata.unidata_version, table_checksum(extra))
+  try:
+    with open(filename, 'rb') as f:
+      if f.read(len(MAGIC)) == MAGIC:
+        data = marshal.load(f)
+        if isinstance(data, tuple) and len(data) == 2 and data[0] == key:
+          return data[1]
+  except (OSError, EOFError, ValueError, TypeError):
+    pass
+
+  result = build_table(extra)
+  temp = filename + '.tmp'
+  try:
+    with open(temp, 'wb') as f:
+      f.write(MAGIC)
+      marshal.dump((key, result), f)
+    os.replace(temp, filename)
+  except OSError:
+    pass # e.g. a read-only directory; the table is generated again next time
+  return result
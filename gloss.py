@@ -0,0 +1,187 @@
+#######################################################################################
+#
+# Short glosses
+#
+# INPUT:  lewis_short_by_headword.txt
+# OUTPUT: lewis_short_by_headword.gloss
+#
+# A lookup that only needs to show what a word means (e.g. in a tooltip) does not need
+# the whole entry with all its citations. For each entry, build_glosses() keeps just
+#
+#   forms: the headwords that cite it                        ăb, ā, abs
+#   parts: the principal parts or genitive, as written       ēvi (ui), ĭtum, 2
+#   pos:   the part of speech, as abbreviated in L&S          prep. with abl.
+#   gloss: the first English gloss, cut at GLOSS_LENGTH      from, away from
+#
+# taken from the start of the entry:
+#
+#   ăbŏlĕo, ēvi (ui), ĭtum, 2, v. a., orig., to retard the growth of.
+#   <form>  <parts>            <pos>  (skipped) <gloss>
+#
+# Before the gloss, a semicolon, a word of etymology (adj. damno, condemned), an
+# abbreviation (orig., I.) or a Greek equivalent (= Ἀλκμαίων) is skipped. An entry
+# that only points to another (v. antea) gets no gloss; see xref.py for those. The
+# glosses are saved apart from the entries, with entries numbered as in the text file
+# (see reader.py).
+#
+# Usage:
+#
+#   import reader, gloss
+#   LS_DICTIONARY = reader.TextDictionary()
+#   glosses = gloss.Glosses()
+#   gloss.lookup(LS_DICTIONARY, glosses, 'dŭcentĭens') # [Summary(forms=..., ...)]
+#
+#######################################################################################
+
+import marshal
+import os
+import re
+from array import array
+from collections import namedtuple
+
+import reader
+
+TEXT_RESULT_FILE = 'lewis_short_by_headword.txt'
+GLOSS_FILE = 'lewis_short_by_headword.gloss'
+
+# Increase this whenever the layout changes.
+GLOSS_VERSION = 1
+MAGIC = b'LSGL'
+
+Summary = namedtuple('Summary', 'forms parts pos gloss')
+
+# Parts of speech as they follow the principal parts, e.g. ', v. a.,' or ', f.'.
+# Only looked for in the header, before the first colon.
+PART_OF_SPEECH = re.compile('''
+  (?:^|,\s*|\s)
+  ( v\.\s(?:a|n|dep|freq|inch|impers|defect|desid|intens)\.(?:\s(?:a|n)\.)?
+  | (?:adjj?|advv?|conj|interj|pron|num|[pP]art|comm|indecl|subst|sup|comp)\.
+  | prep\.(?:\swith\s(?:abl|acc|gen|dat)\.(?:\sand\s(?:abl|acc|gen|dat)\.)?)?
+  | [mfn]\.(?:\s(?:plur|indecl|sing)\.)?
+  )
+  (?=[\s,:;]|$)
+''', re.VERBOSE)
+
+HEADER_LENGTH = 300 # characters in which to look for the part of speech
+# The first gloss ends where the citations start, or at the first numbered sense
+# ('from, away from. I. Of space').
+GLOSS_END = re.compile('[:;]|\.\s+(?:[IVX]+|[A-H]|\d+)\.\s')
+GLOSS_LENGTH = 100
+
+# A pointer to another entry (v. antea, cf. ante), which xref.py resolves; it is
+# not a gloss.
+REDIRECT = re.compile('(?:^|,)\s*(?:v|cf)\.\s')
+
+def first_comma(entry):
+  # Position of the first comma outside parentheses, or -1.
+  depth = 0
+  for i, ch in enumerate(entry):
+    if ch == '(':
+      depth += 1
+    elif ch == ')':
+      depth = max(0, depth - 1)
+    elif ch == ',' and not depth:
+      return i
+  return -1
+
+def shorten(text):
+  # Cuts a gloss down to GLOSS_LENGTH on a word boundary.
+  text = text.strip(' ,')
+  if text.endswith('.'):
+    text = text[:-1]
+  if len(text) > GLOSS_LENGTH:
+    text = text[:GLOSS_LENGTH].rsplit(' ', 1)[0].rstrip(' ,') + '…'
+  return text
+
+def read_header(entry):
+  # Returns the header (the start of the entry, up to any colon), the position
+  # of its first comma (or -1), and the match of the part of speech (or None).
+  header = entry[:HEADER_LENGTH].split(':', 1)[0]
+  comma = first_comma(header)
+  m = PART_OF_SPEECH.search(header, comma + 1) if comma != -1 else None
+  return header, comma, m
+
+def definition_start(entry):
+  # Where the definition begins: after the part of speech, or if there is
+  # none after the first form.
+  header, comma, m = read_header(entry)
+  return m.end() if m else comma + 1
+
+def summarize(forms, entry):
+  # The Summary of one entry.
+  header, comma, m = read_header(entry)
+  if m is None:
+    # An entry laid out some other way: all we can offer is what follows the
+    # first form, unless that is a pointer (v. antea).
+    rest = entry[comma + 1:] if comma != -1 else ''
+    rest = GLOSS_END.split(rest, 1)[0]
+    return Summary(forms, '', '', '' if REDIRECT.search(rest) else shorten(rest))
+
+  parts = header[comma + 1:m.start()].strip(' ,')
+  pos = re.sub('\s+', ' ', m.group(1))
+  rest = entry[m.end():].lstrip()
+  if rest.startswith(';'):
+    rest = rest[1:] # the definition may follow a semicolon, as in 'v. a. ; to nourish'
+  chunks = GLOSS_END.split(rest, 1)[0].split(',')
+  if not chunks[0].strip():
+    chunks = chunks[1:] # the part of speech was followed by a comma
+  elif len(chunks) > 1 and len(chunks[0].split()) == 1:
+    chunks = chunks[1:] # etymology, as in 'adj. damno, condemned'
+  while len(chunks) > 1 and (chunks[0].strip().startswith('=') or
+                             (chunks[0].strip().endswith('.') and len(chunks[0].split()) == 1)):
+    chunks = chunks[1:] # = Greek, orig., I.
+  text = ','.join(chunks)
+  return Summary(forms, parts, pos, '' if REDIRECT.match(text) else shorten(text))
+
+def build_glosses(text_filename=TEXT_RESULT_FILE, filename=GLOSS_FILE):
+  # Summarizes every entry of the text file and saves the table; returns the
+  # number of entries with a gloss.
+  stat = os.stat(text_filename)
+  forms = []
+  parts = []
+  glosses = []
+  pos_names = {'': 0}
+  pos = array('B')
+  for headwords, entry in reader.pairs(text_filename):
+    summary = summarize(headwords, entry)
+    forms.append(','.join(summary.forms))
+    parts.append(summary.parts)
+    pos.append(pos_names.setdefault(summary.pos, len(pos_names)))
+    glosses.append(summary.gloss)
+
+  data = (GLOSS_VERSION, stat.st_size, stat.st_mtime_ns, tuple(pos_names), pos.tobytes(),
+          tuple(forms), tuple(parts), tuple(glosses))
+  temp = filename + '.tmp'
+  with open(temp, 'wb') as f:
+    f.write(MAGIC)
+    marshal.dump(data, f)
+  os.replace(temp, filename)
+  return sum(1 for gloss in glosses if gloss)
+
+class Glosses():
+  def __init__(self, filename=GLOSS_FILE):
+    with open(filename, 'rb') as f:
+      if f.read(len(MAGIC)) != MAGIC:
+        raise ValueError(f'{filename} is not a gloss file.')
+      data = marshal.load(f)
+    if not isinstance(data, tuple) or len(data) != 8 or data[0] != GLOSS_VERSION:
+      raise ValueError(f'{filename} was written by another version of gloss.py.')
+    version, self.size, self.mtime, self.pos_names, pos, self.forms, self.parts, self.glosses = data
+    self.pos = array('B', pos)
+
+  def is_stale(self, text_filename=TEXT_RESULT_FILE):
+    # True if the text file has changed since the glosses were built.
+    stat = os.stat(text_filename)
+    return (self.size, self.mtime) != (stat.st_size, stat.st_mtime_ns)
+
+  def summary(self, number):
+    # The Summary of the n-th entry in the text file.
+    return Summary(self.forms[number].split(','), self.parts[number],
+                   self.pos_names[self.pos[number]], self.glosses[number])
+
+  def __len__(self):
+    return len(self.glosses)
+
+def lookup(dictionary, glosses, headword):
+  # The summaries of the entries of headword in a reader.TextDictionary.
+  return [glosses.summary(number) for number in dictionary.entry_numbers(headword)]
@@ -0,0 +1,132 @@
+#######################################################################################
+#
+# Stage timing and memory report
+#
+# OUTPUT: a JSON file, e.g.
+#
+#   python main.py --report stages.json [--cprofile build.prof]
+#
+# For each pipeline stage (input read, line cleanup, add, the two examine_* functions,
+# JSON write, text write and verification) the report records the number of calls,
+# wall time, CPU time and the tracemalloc peak of traced memory while the stage was
+# running. Stages nest (add is called from the examine_* functions), so times are
+# given both in total and 'self', i.e. without time spent in nested stages. The peak
+# is only taken around outermost stages; a nested stage shows the highest peak of the
+# stages it ran in.
+#
+# Nothing here runs unless a report is requested: main.py swaps its stage functions
+# for the wrapped versions made by Report.wrap().
+#
+#######################################################################################
+
+import json
+import platform
+import time
+import tracemalloc
+
+REPORT_VERSION = 1
+
+class Stage():
+  # Running totals for one stage.
+  def __init__(self):
+    self.calls = 0
+    self.wall = 0.0
+    self.wall_self = 0.0
+    self.cpu = 0.0
+    self.cpu_self = 0.0
+    self.peak_memory = 0
+
+  def as_dict(self):
+    return {'calls': self.calls,
+            'wall': round(self.wall, 6), 'wall_self': round(self.wall_self, 6),
+            'cpu': round(self.cpu, 6), 'cpu_self': round(self.cpu_self, 6),
+            'peak_memory': self.peak_memory}
+
+class Report():
+  def __init__(self, memory=True):
+    self.memory = memory
+    self.stages = {}
+    # One frame per running stage: [wall start, cpu start, nested wall,
+    # nested cpu, names of the stages nested in it]
+    self.stack = []
+    self.peak_memory = 0
+    self.started = time.perf_counter()
+    self.cpu_started = time.process_time()
+    if memory and not tracemalloc.is_tracing():
+      tracemalloc.start()
+
+  def enter(self):
+    # The traced peak is only reset and read around outermost stages: doing it
+    # for every call of a nested stage such as add costs more than the stage.
+    if self.memory and not self.stack:
+      tracemalloc.reset_peak()
+    self.stack.append([time.perf_counter(), time.process_time(), 0.0, 0.0, set()])
+
+  def exit(self, name):
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    frame = self.stack.pop()
+    wall -= frame[0]
+    cpu -= frame[1]
+
+    stage = self.stages.get(name)
+    if stage is None:
+      stage = self.stages[name] = Stage()
+    stage.calls += 1
+    stage.wall += wall
+    stage.wall_self += wall - frame[2]
+    stage.cpu += cpu
+    stage.cpu_self += cpu - frame[3]
+
+    if self.stack:
+      parent = self.stack[-1]
+      parent[2] += wall
+      parent[3] += cpu
+      parent[4].add(name)
+      parent[4] |= frame[4]
+    elif self.memory:
+      # A nested stage is given the peak of the outermost stage around it.
+      peak = tracemalloc.get_traced_memory()[1]
+      for nested in frame[4] | {name}:
+        self.stages[nested].peak_memory = max(self.stages[nested].peak_memory, peak)
+      self.peak_memory = max(self.peak_memory, peak)
+
+  def wrap(self, name, function):
+    # Returns function, timed under the given stage name.
+    def timed(*args, **kwargs):
+      self.enter()
+      try:
+        return function(*args, **kwargs)
+      finally:
+        self.exit(name)
+    timed.__name__ = function.__name__
+    timed.__wrapped__ = function
+    return timed
+
+  def iterate(self, name, iterable):
+    # Times each step of a (streaming) iterable under the given stage name.
+    iterator = iter(iterable)
+    while True:
+      self.enter()
+      try:
+        item = next(iterator)
+      except StopIteration:
+        return
+      finally:
+        self.exit(name)
+      yield item
+
+  def as_dict(self, **extra):
+    result = {'version': REPORT_VERSION,
+              'python': platform.python_version(),
+              'wall': round(time.perf_counter() - self.started, 6),
+              'cpu': round(time.process_time() - self.cpu_started, 6)}
+    if self.memory:
+      result['peak_memory'] = max(self.peak_memory, tracemalloc.get_traced_memory()[1])
+    result.update(extra)
+    result['stages'] = {name: stage.as_dict() for name, stage in self.stages.items()}
+    return result
+
+  def write(self, filename, **extra):
+    with open(filename, 'w') as f:
+      json.dump(self.as_dict(**extra), f, indent=4)
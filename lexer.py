@@ -0,0 +1,237 @@
+#######################################################################################
+#
+# Header lexer
+#
+# The analysis in main.py only ever looks at the first few words of an entry, but it
+# used to find them by splitting the whole entry (often many kilobytes) again and
+# again, and by running regexes over all of it to find commas, brackets and
+# or/and/also. A Header reads an entry from the start, once, into typed tokens with
+# their character offsets, and only as far as the analysis asks:
+#
+#   word        ăbŏlĕo, adj., 2
+#   stem        -tius, aff-, -emt-         (a word that begins or ends with a dash)
+#   connector   or, and, also
+#   open        (
+#   close       )
+#   comma       ,
+#   semicolon   ;
+#   dagger      ‡
+#   greek       a run of Greek letters, e.g. Ἐρύθεια
+#
+# Each token is a tuple (kind, text, start, end), with start and end its offsets in
+# the entry, as in line[start:end]. Whitespace is not a token; it shows as a gap
+# between one token's end and the next one's start. Tokens with no gap and no comma
+# between them belong to the same word, so e.g. '(-tius),' is open, stem, close, comma.
+#
+# words(), chunks() and spans() give the words of the header, as first_words() and
+# str.split() used to, from those tokens. stripped() is the entry with its
+# parentheticals taken out; its tokens are the same ones, less those in brackets.
+#
+#######################################################################################
+
+import re
+from itertools import islice
+
+CONNECTORS = {'or', 'and', 'also'}
+
+GREEK = 'Ͱ-Ͽἀ-῿'
+TEXT = f'[^\\s,;()‡{GREEK}]' # any other character but whitespace
+TOKEN = re.compile(f'''
+   (?P<comma>,)
+  |(?P<semicolon>;)
+  |(?P<open>\\()
+  |(?P<close>\\))
+  |(?P<dagger>‡)
+  |(?P<greek>[{GREEK}]+)
+  |(?P<connector>(?:or|and|also)(?!{TEXT}))
+  |(?P<stem>-{TEXT}+|{TEXT}+-(?!{TEXT}))
+  |(?P<word>{TEXT}+)
+''', re.VERBOSE)
+WHITESPACE = re.compile('\s+')
+
+# Tokens are read this many at a time at first, which is as far as the analysis looks
+# into most entries, and half as many at a time after that.
+READ_AHEAD = 20
+
+def tokenize(line, pos=0, count=None):
+  # The tokens of line from character pos on (only the first count of them, if
+  # given). They are plain tuples because most entries have a few dozen of them
+  # read, and a namedtuple would take as long again to make.
+  return [(m.lastgroup, m.group(), m.start(), m.end())
+          for m in islice(TOKEN.finditer(line, pos), count)]
+
+class Header:
+  # The tokens of one entry, read as far as they have been asked for. repaired is
+  # the text the analysis reads instead, when main.py rewrites the start of the
+  # entry (see repair_dashed_first_word()); .repaired is this Header if that
+  # changes nothing.
+  def __init__(self, line, repaired=None):
+    self.line = line
+    self.tokens = []
+    self.found = {} # (number, commas) -> words()
+    self.without = None # stripped()
+    if repaired is None or repaired == line:
+      self.repaired = self
+    else:
+      self.repaired = Header(repaired)
+
+  def read(self, count):
+    # Reads up to count more tokens; False if there were none left.
+    tokens = self.tokens
+    more = tokenize(self.line, tokens[-1][3] if tokens else 0, count)
+    tokens += more
+    return bool(more)
+
+  def token(self, i):
+    # The i-th token, or None after the last one.
+    tokens = self.tokens
+    while len(tokens) <= i:
+      if not self.read(max(READ_AHEAD // 2 if tokens else READ_AHEAD, i + 1 - len(tokens))):
+        return None
+    return tokens[i]
+
+  def words(self, number=12, commas=True):
+    # The first (number) words, exactly as
+    #   re.split('\s+', line.replace(',', ' '))[0:number]
+    # would give them (so possibly with an empty first or last word). With
+    # commas=False only whitespace separates words.
+    key = number, commas
+    if key in self.found:
+      return self.found[key]
+    result = []
+    current = None # the word being read, or None after a separator
+    last_end = 0
+    tokens = self.tokens
+    i = 0
+    while len(result) < number:
+      token = tokens[i] if i < len(tokens) else self.token(i)
+      if token is None:
+        if last_end < len(self.line):
+          # Trailing separators.
+          if current is not None:
+            result.append(current)
+            current = None
+          elif not result:
+            result.append('')
+        result.append('' if current is None else current)
+        break
+      i += 1
+      kind, text, start, end = token
+      if commas and kind == 'comma':
+        continue
+      if start > last_end:
+        # Whitespace (or commas) since the last token.
+        if current is not None:
+          result.append(current)
+          current = None
+        elif not result:
+          result.append('')
+      last_end = end
+      current = text if current is None else current + text
+    result = self.found[key] = result[0:number]
+    return result
+
+  def chunks(self, number):
+    # The first (number) whitespace-separated words, as line.split()[0:number].
+    return [word for word in self.words(number + 1, commas=False) if word][0:number]
+
+  def spans(self, number):
+    # (start, end) of each of the first (number) whitespace-separated words.
+    result = []
+    i = 0
+    while (token := self.token(i)) is not None:
+      kind, text, start, end = token
+      if result and start == result[-1][1]:
+        result[-1] = (result[-1][0], end)
+      elif len(result) == number:
+        break
+      else:
+        result.append((start, end))
+      i += 1
+    return result
+
+  def parenthetical(self, number):
+    # What is inside the first parenthetical among the first (number) chunks, with
+    # each run of whitespace as one space, as
+    #   re.search('^.*?\((.*?)\)', ' '.join(line.split()[0:number])).group(1)
+    # would give it; None if there is none.
+    spans = self.spans(number)
+    if not spans:
+      return None
+    limit = spans[-1][1]
+    opened = None
+    i = 0
+    while (token := self.token(i)) is not None and token[3] <= limit:
+      kind, text, start, end = token
+      if opened is None:
+        if kind == 'open':
+          opened = end
+      elif kind == 'close':
+        return WHITESPACE.sub(' ', self.line[opened:start])
+      i += 1
+    return None
+
+  def parentheticals(self):
+    # Yields (start, end) of each parenthetical in the whole line, as
+    # re.finditer('\(.*?\)', line) would. Past the header only the brackets matter,
+    # so this looks for them rather than reading tokens.
+    line = self.line
+    start = line.find('(')
+    while start != -1:
+      end = line.find(')', start)
+      if end == -1:
+        return
+      newline = line.find('\n', start, end)
+      if newline != -1:
+        start = line.find('(', newline)
+        continue
+      yield start, end + 1
+      start = line.find('(', end + 1)
+
+  def stripped(self, count=0):
+    # A Header for line with its (first count) parentheticals taken out, as
+    # re.sub('\(.*?\)', '', line, count) would leave it; this Header if there are
+    # none. Its tokens are taken from this Header rather than read again.
+    if not count and self.without is not None:
+      return self.without
+    cuts = []
+    for cut in self.parentheticals():
+      cuts.append(cut)
+      if len(cuts) == count:
+        break
+    without = Stripped(self, cuts) if cuts else self
+    if not count:
+      self.without = without
+    return without
+
+  def outside(self, cuts):
+    # Yields the tokens not inside any of cuts, at their offsets once the cuts are
+    # taken out. No token crosses a cut, as brackets are tokens of their own.
+    removed = 0
+    k = 0
+    i = 0
+    while (token := self.token(i)) is not None:
+      i += 1
+      kind, text, start, end = token
+      while k < len(cuts) and start >= cuts[k][1]:
+        removed += cuts[k][1] - cuts[k][0]
+        k += 1
+      if k < len(cuts) and start >= cuts[k][0]:
+        continue
+      if removed:
+        token = (kind, text, start - removed, end - removed)
+      yield token
+
+class Stripped(Header):
+  # A Header for the line of another with cuts taken out (see stripped()), whose
+  # tokens are the other's rather than read again.
+  def __init__(self, header, cuts):
+    line = header.line
+    kept = zip([0] + [end for start, end in cuts], [start for start, end in cuts] + [len(line)])
+    super().__init__(''.join([line[start:end] for start, end in kept]))
+    self.unread = header.outside(cuts)
+
+  def read(self, count):
+    more = list(islice(self.unread, count))
+    self.tokens += more
+    return bool(more)
@@ -22,31 +22,51 @@
 
 import re
 import os
+import sys
+import time
+import json
+import argparse
+import textwrap
+
+import checksum
+import compare
+import english
+import gloss
+import instrument
+import lexer
+import perseus
+import reader
+import shard
+import snapshot
+import spill
+import xref
 
 INPUT_FILE = 'lewis-short.txt'
 
 TEXT_RESULT_FILE = 'lewis_short_by_headword.txt'
 JSON_RESULT_FILE = 'lewis_short_by_headword.json'
 
-# For removing accents and special characters, so we can run simple tests. Accents will 
-# be unmodified in final result.
-table = {'à': 'a', 'á': 'a', 'â': 'a', 'ã': 'a', 'ä': 'a', 'å': 'a', 'ā': 'a', 'ă': 'a',
-         'ἅ': 'a', 'ᾷ': 'a', 'ạ': 'a',
-         'è': 'e', 'é': 'e', 'ê': 'e', 'ë': 'e', 'ē': 'e', 'ĕ': 'e', 'ẽ': 'e',
-         'ì': 'i', 'í': 'i', 'î': 'i', 'ï': 'i', 'ī': 'i', 'ĭ': 'i', 'ΐ': 'i', 'ί': 'i',
-         'ἰ': 'i', 'ἴ': 'i', 'ϊ': 'i', 'ἶ': 'i',
-         'ò': 'o', 'ó': 'o', 'ô': 'o', 'õ': 'o', 'ö': 'o', 'ō': 'o', 'ŏ': 'o', 'ὁ': 'o',
-         'ὅ': 'o', 'ο': 'o', 'ὀ': 'o', 'ό': 'o', 'ὸ': 'o', 'ὄ': 'o',
-         'ù': 'u', 'ú': 'u', 'û': 'u', 'ü': 'u', 'ū': 'u', 'ů': 'u', 'ŭ': 'u',
-         'ý': 'y', 'ÿ': 'y', 'ȳ': 'y',
-         'æ': 'ae', 'ǽ': 'ae', 'ǣ': 'ae',
-         'œ': 'oe'}
-
-trans_table = str.maketrans(table)
+# normalize() and its table are in alphabet.py, where the other modules can
+# import them without importing this one.
+from alphabet import table, trans_table, normalize, SECTION_ALIASES
+
+# Time each rule of the examine_* functions (see Guess.check()). Only on when the
+# rule statistics are saved (--rule-stats or --report), as there are dozens of
+# rules for each entry those functions see.
+RULE_TIMES = False
 
 class Guess():
   # A system for cataloguing a large number of guesses. Works in a subdirectory, /results/,
   # and creates a different file for each type of guess. Deletes old files each round.
+  #
+  # It also keeps a running tally for each identifier, whether or not the guess is
+  # silent: on how many entries it fired, how many headwords add() was told it
+  # produced, and how long was spent evaluating it. Each rule calls check() just
+  # before its test, and is charged for the time from there to the next rule's
+  # check(), so a rule whose test is expensive is charged for it whether or not it
+  # fires (with RULE_TIMES only). Each examine_* function is timed as a whole with
+  # stage(); the rest of each entry's time is charged to the scan itself. See
+  # rule_statistics().
   files = {}
   count = 1
   
@@ -64,9 +84,113 @@ class Guess():
       os.remove('results/'+file)
     self.count = 1
     self.files = {}
+    self.stats = {} # (stage, identifier) -> [entries, headwords added, seconds]
+    self.stages = {} # stage -> [entries, headwords added, seconds]; None is the scan
+    self.fired = None # identifiers seen in the current entry
+    self.current_stage = None
+    self.evaluating = None # the rule last passed to check(); None outside any rule
+    self.clock = time.perf_counter() # when the current entry started
+    self.since = self.clock # when check() was last called
+    self.nested = 0.0 # time spent in stages during the current entry
+    if not RULE_TIMES:
+      self.check = self.untimed
+
+  def start_entry(self):
+    self.finish_entry()
+    self.fired = set()
+    self.evaluating = None
+    self.clock = self.since = time.perf_counter()
+    self.nested = 0.0
+
+  def finish_entry(self):
+    if self.fired is not None:
+      self.check(None)
+      stats = self.stage_stats(None)
+      stats[0] += 1
+      stats[2] += time.perf_counter() - self.clock - self.nested
+      self.fired = None
+
+  def stage_stats(self, stage):
+    stats = self.stages.get(stage)
+    if stats is None:
+      stats = self.stages[stage] = [0, 0, 0.0]
+    return stats
+
+  def stage(self, name, function, *args):
+    # Calls function(*args), timed under the given stage whatever it finds.
+    stats = self.stage_stats(name)
+    self.check(None)
+    outer, self.current_stage = self.current_stage, name
+    start = time.perf_counter()
+    try:
+      return function(*args)
+    finally:
+      elapsed = time.perf_counter() - start
+      self.check(None)
+      stats[0] += 1
+      stats[2] += elapsed
+      if outer is None:
+        self.nested += elapsed
+      self.current_stage = outer
+
+  def rule_stats(self, identifier):
+    key = self.current_stage, identifier
+    stats = self.stats.get(key)
+    if stats is None:
+      stats = self.stats[key] = [0, 0, 0.0]
+    return stats
+
+  def check(self, identifier):
+    # Called just before a rule's test: the time since the last check() goes to
+    # the rule evaluated then, and from now on to this one (None for time spent
+    # outside any rule). Returns True, so that it can lead the test of an elif.
+    now = time.perf_counter()
+    self.rule_stats(self.evaluating)[2] += now - self.since
+    self.evaluating = identifier
+    self.since = now
+    return True
+
+  @staticmethod
+  def untimed(identifier):
+    # check() when RULE_TIMES is off.
+    return True
+
+  def rule(self, identifier):
+    # Notes that a rule fired, for the tallies above.
+    stats = self.rule_stats(identifier)
+    if self.fired is None:
+      # Outside the main loop, e.g. apply_change() called on its own.
+      stats[0] += 1
+    elif identifier not in self.fired:
+      self.fired.add(identifier)
+      stats[0] += 1
+
+  def added(self, rule):
+    # Called by add() for each new headword/entry pair, with the rule that
+    # produced it.
+    self.rule_stats(rule)[1] += 1
+    self.stage_stats(self.current_stage)[1] += 1
+
+  def rule_statistics(self):
+    # The tallies by stage, most expensive first, each with the rules that
+    # were evaluated or fired in it, also most expensive first.
+    result = {}
+    for stage, (entries, headwords, seconds) in sorted(self.stages.items(), key=lambda item: -item[1][2]):
+      rules = {}
+      for (rule_stage, identifier), (fired, added, spent) in sorted(self.stats.items(), key=lambda item: -item[1][2]):
+        if rule_stage == stage:
+          rules['(no rule)' if identifier is None else identifier] = {
+            'entries': fired, 'headwords': added, 'seconds': round(spent, 6)}
+      result['(scan)' if stage is None else stage] = {
+        'entries': entries, 'headwords': headwords, 'seconds': round(seconds, 6), 'rules': rules}
+    return result
     
   # Records a guess, and pertinent examples thereof.
-  def g(self, identifier, items, silent = False):
+  # Bookkeeping messages that are not extraction rules pass rule=False, so
+  # that they are not counted as rules in rule_statistics().
+  def g(self, identifier, items, silent = False, rule = True):
+    if rule:
+      self.rule(identifier)
 
     # To see all guesses, comment out the next two lines and rerun.
     if silent:
@@ -99,10 +223,12 @@ class Guess():
     
 
 
-def add(keyword, entry):
+def add(keyword, entry, rule=None):
   # For each headword per entry that we discover, we use this function to link
   # that headword to its entry. This includes a little checking to avoid
   # confusing principle parts with variations on headwords.
+  # rule is the identifier of the rule that found the headword, which is
+  # credited with it in rule_statistics().
   
   rejects = {'us','ae', 'li', 'onis'}
   if n(keyword) in rejects:
@@ -116,7 +242,7 @@ def add(keyword, entry):
 
   if n(keyword) in concerning:
     g.g('concerning keyword', [keyword,entry],
-       True)
+       True, False)
     
   if not keyword:
     return
@@ -128,9 +254,17 @@ def add(keyword, entry):
   keyword = re.sub('[/;,]', '', keyword)
   keyword = re.sub('\W', '', keyword)
   if re.search('\W', keyword):
-    g.g('weird keyword', [keyword,entry])
+    g.g('weird keyword', [keyword,entry], rule=False)
   if '.' in keyword:
-    g.g('period', [keyword, entry])
+    g.g('period', [keyword, entry], rule=False)
+
+  if headword_spill is not None:
+    # Low-memory build: the pair goes to disk instead (see spill.py).
+    if not headword_spill.add(keyword, entry):
+      g.g('duplicate keyword-entry combo avoided', [keyword, entry], True, False)
+      return
+    g.added(rule)
+    return
   
   if keyword not in dictionary:
     dictionary[keyword] = {}
@@ -139,10 +273,11 @@ def add(keyword, entry):
     # Avoid duplicate entries.
     if entry in dictionary[keyword]:
       #print('skipping',keyword)
-      g.g('duplicate keyword-entry combo avoided', [keyword, entry], True)
+      g.g('duplicate keyword-entry combo avoided', [keyword, entry], True, False)
       return
   #dictionary[keyword].append(entry)
   dictionary[keyword][entry] = ''
+  g.added(rule)
   return
   
 def repair_dashed_first_word(string):
@@ -169,19 +304,87 @@ def sim(s1, s2):
     return s1[x_longest - longest: x_longest]
   return 2. * len(longest_common_substring(s1, s2)) / (len(s1) + len(s2)) * 100
 
-def normalize(target):
-  # make word lowercase and remove accents
-  # We do not modify dictionary contents but when analyzing and comparing
-  # possible headwords this enables us to compare apples to apples in a 
-  # simple manner.
-  return target.lower().translate(trans_table)
-
 def first_words(string):
   # Returns th first (number) words of an entry.
+  # Commas count as spaces. See lexer.py: this only reads as far into the
+  # entry as it needs to.
   number = 12
-  string = string.replace(',', ' ')
-  a = re.split('\s+', string)[0:number]
-  return a
+  return lexer.Header(string).words(number)
+
+# The pattern in repair_dashed_first_word(), which only ever applies at the start.
+DASHED_FIRST_WORD = re.compile('^(\w+)\s{0,2}\-(\w)')
+
+# Pieces of the patterns that connector_follows(), third_connected() and listed()
+# stand in for, matched against single words of the header.
+WORD = re.compile('\w+')
+WORD_COMMA = re.compile('\w+,{0,1}')
+UP_TO_STOP = re.compile('(\S+?)[\s\.,]')
+LISTED = re.compile('([\w-]+),')
+
+def read_header(entry):
+  # The tokens of entry (see lexer.py), read once and shared by classify() and the
+  # examine_* functions; .repaired is the entry as repair_dashed_first_word()
+  # leaves it.
+  if DASHED_FIRST_WORD.match(entry):
+    return lexer.Header(entry, repair_dashed_first_word(entry))
+  return lexer.Header(entry)
+
+def connector_follows(header):
+  # Whether the entry starts 'word or', 'word, and' etc., as
+  #   re.search('^\w+,{0,1}\s(or|and|also)[,\s]', line)
+  # would find.
+  i = 0
+  end = 0
+  while (token := header.token(i)) is not None and token[2] == end and token[0] != 'comma':
+    end = token[3]
+    i += 1
+  if not end or not WORD.fullmatch(header.line, 0, end):
+    return False
+  if token is not None and token[0] == 'comma' and token[2] == end:
+    end = token[3]
+    i += 1
+    token = header.token(i)
+  if token is None or token[0] != 'connector' or token[2] != end + 1:
+    return False
+  following = header.token(i + 1)
+  if following is None:
+    return token[3] < len(header.line) # trailing whitespace
+  return following[2] > token[3] or following[0] == 'comma'
+
+def third_connected(header):
+  # The third word of 'word or word2, and word3', as
+  #   re.search('^\w+,{0,1} (or|and|also) \S+,{0,1} (or|and|also) (\S+?)[\s\.,]', line).group(3)
+  # would give it; None if the entry does not start like that.
+  spans = header.spans(5)
+  line = header.line
+  if len(spans) < 5 or spans[0][0] != 0:
+    return None
+  if any(line[before[1]:after[0]] != ' ' for before, after in zip(spans, spans[1:])):
+    return None
+  chunks = [line[start:end] for start, end in spans[0:4]]
+  if not WORD_COMMA.fullmatch(chunks[0]) or chunks[1] not in lexer.CONNECTORS or chunks[3] not in lexer.CONNECTORS:
+    return None
+  if b := UP_TO_STOP.match(line, spans[4][0]):
+    return b.group(1)
+  return None
+
+def listed(header):
+  # The three words of 'a, b, and c,' at the start of the entry, as the groups of
+  #   re.search('^([\w-]+), ([\w-]+), (and|or|also) ([\w-]+),', line)
+  # would give them; None if it does not start like that.
+  spans = header.spans(4)
+  line = header.line
+  if len(spans) < 4 or spans[0][0] != 0:
+    return None
+  if any(line[before[1]:after[0]] != ' ' for before, after in zip(spans, spans[1:])):
+    return None
+  chunks = [line[start:end] for start, end in spans]
+  if not LISTED.fullmatch(chunks[0]) or not LISTED.fullmatch(chunks[1]) or chunks[2] not in lexer.CONNECTORS:
+    return None
+  if b := LISTED.match(chunks[3]):
+    return chunks[0][:-1], chunks[1][:-1], b.group(1)
+  return None
+
   
 def apply_change(original, change):
   # This deals with word modifications / variations. For example:
@@ -204,7 +407,7 @@ def apply_change(original, change):
   original = original.replace('‡', '')
   original = original.replace('-','')
 
-  g.g('changelog', [f'{original} -> {change}'], True)
+  g.g('changelog', [f'{original} -> {change}'], True, False)
 
   # Need to address
   # Acalcĕŏlārĭus (calcĭŏl-), ii, m. calceolus,
@@ -282,7 +485,7 @@ def apply_change(original, change):
     letter=n(new_stem)[0]
     location = n(original).find(letter, 1)
     if location == -1:
-      g.g('error in apply_change',[original,change])
+      g.g('error in apply_change',[original,change], rule=False)
     if n(original)[location + 1] == letter:
       location += 1
     letter2 = n(new_stem)[-1]
@@ -332,16 +535,25 @@ def apply_change(original, change):
   exit(1)
 
 
-def examine_or_also_and_with_parenth(line):
+def examine_or_also_and_with_parenth(line, families=None, header=None):
+  # families, from classify(), lets us skip the checks for the 'connector'
+  # and 'parenth' parts below when they cannot apply. header is the entry's
+  # tokens from read_header(), if scan() has them already.
   entry = line
-  line = repair_dashed_first_word(line)
+  if header is None:
+    header = read_header(entry)
+  entry_header = header
+  header = header.repaired
+  line = header.line
   # Is it an or / and / also line?
-  if re.search('^\w+,{0,1}\sor[,\s]', line) or re.search('^\w+,{0,1}\sand[,\s]', line) or  re.search('^\w+,{0,1}\salso[,\s]', line):
+  if families is not None and 'connector' not in families:
+    pass
+  elif connector_follows(header):
   
     # This establishes it as an 'or' or an 'and'.
 
     
-    first = first_words(line)
+    first = header.words()
     original = first[0]
     second = first[2] # e.g. word1 and word2, second=word2 now.
     
@@ -355,6 +567,7 @@ def examine_or_also_and_with_parenth(line):
 
     third = ''
     fourth = ''
+    g.check('deleted_parenth_after_orandalso')
     if second.startswith('('):  # word, or (in Augustine etc) word2
       # There are only a handful of these - delete them all.
       # It goes like this:
@@ -363,24 +576,29 @@ def examine_or_also_and_with_parenth(line):
       # And continue processing same line.
       g.g('deleted_parenth_after_orandalso', [original,second,line], True)
       # This seems to work.
-      line = re.sub('\(.*?\)', '', line, 1)
-      first = first_words(line)
+      header = header.stripped(1)
+      line = header.line
+      first = header.words()
       second = first[2]
 
     # We are back to __ or/and/also ___
 
     # ărātro and contr. artro, āre, v. a.
+    g.check('contr.euphon.uncontr.abbrev.sync.')
     if second == 'contr.' or second == 'euphon.' or second == 'uncontr.' or second == 'abbrev.' or second == 'sync.':
       g.g('contr.euphon.uncontr.abbrev.sync.', [first[3], line], True)
       # Repairing second.
       second = first[3]
+    g.check(None)
     if 'ŭtĭquĕ, and that, v. ut (uti) and que.' in line:
       second = ''
+    g.check('skipping derivv.')
     if second == 'derivv.':
       g.g('skipping derivv.', [line], True)
       # Skip this second. This appears to work.
       second = ''
     # circumverto or circum verto (-vorto), ĕre, v. a.,
+    g.check('found in')
     if second == 'in':
       g.g('found in', [second,line], True)
       if original == 'caerŭlĕus':
@@ -395,6 +613,7 @@ def examine_or_also_and_with_parenth(line):
         second = 'perjūro'
 
     
+    g.check('second is spaced vers. of first')
     if n(original) == (n(first[2]) + n(first[3])).replace('-', ''): 
       # ignoring this second because it's the same as headword.
       # antĕāquam or antea quam, v. antea, IV.
@@ -406,10 +625,11 @@ def examine_or_also_and_with_parenth(line):
       g.g('second is spaced vers. of first', [original,line], True)
     #elif b:=re.search('anal\. to the Gr\., (\S+)',line):
     #  g.g('anal\. to the Gr\., (\S+)', [b.group(1), line])
-    if b:=re.search('^\w+,{0,1} (or|and|also) \S+,{0,1} (or|and|also) (\S+?)[\s\.,]', line):
+    g.check('positively found third')
+    if (b := third_connected(header)) is not None:
       # Second is done
       # But there's a third.
-      third = b.group(3)
+      third = b
       g.g('positively found third', [third,line], True)
 
       # Here we have a small number of false positives in 'third'.
@@ -453,10 +673,12 @@ def examine_or_also_and_with_parenth(line):
       g.g('triple_or_and_also',
           [original,second,third,fourth,line],
           True)
+    g.check('or, acc\. to many MSS\., (\S+)')
     if b:=re.search('or, acc\. to many MSS\., (\S+?)[\s,]',line):
       # dissĭpo, or, acc. to many MSS., dis-sŭpo, āvi, ā
       g.g('or, acc\. to many MSS\., (\S+)',[b.group(1),line], True)
       second = b.group(1)
+    g.check('archaic with a bad symbol')
     if second == 'archaic':
       if b:=re.search('archaic,{0,1} (.*?),', line[0:100]):
         # multātĭcus, or, archaic, ‡ moltā-tĭcus, a, um, adj. i
@@ -465,20 +687,25 @@ def examine_or_also_and_with_parenth(line):
       else:
         print('no archaic')
         exit(1)
+    g.check(None)
     if original=='dēmĭurgus':
       second = 'dāmĭurgus'
+    g.check('or in late Lat\., (\w+),')
     if b:=re.search('or in late Lat\., (\w+),',line):
       second = b.group(1)
       g.g('or in late Lat\., (\w+),',[second,line], True)
+    g.check('and abbreviated')
     if second == 'abbreviated':
       second = first[3]
       g.g('and abbreviated', [second,line], True)
+    g.check(None)
     if 'or, in the orig. form, perjūro' in line:
       second = 'perjūro'
     if 'or, in the uncontr. primary form, fĭgŭlīnus' in line:
       second = 'fĭgŭlīnus'
     if 'dēlonge, or in two words, de longe, adv.' in line:
       second = ''
+    g.check('or_separated_separately_')
     if re.search('separate\w*', second) or re.search('separate\w*', first[3]):
       if b := re.search('separate\w*,{0,1}(.*?)[\(,]', line):
         second = b.group(1)
@@ -487,6 +714,7 @@ def examine_or_also_and_with_parenth(line):
       else:
         print('no separate')
         exit(1)
+    g.check(None)
     if 'necnon, also separately, nec non or nĕquĕ non, partic. of emphatic affirmation' in line:
       #second = 'nĕquĕ non'
       second = ''
@@ -502,12 +730,14 @@ def examine_or_also_and_with_parenth(line):
     if original == 'nonnumquam':
       # non-numquam or -nunquam, adv., 
       second = 'nonnunquam' # apply_change wouldn't figure this one out.
+    g.check('error-period_in_second')
     if '.' in second:
       g.g('error-period_in_second',[original,second,line])
       second = ''
 
     # In theory we have a working 'second' word. Maybe a third or fourth.
     # now - so we file it.
+    g.check('deleting-mid-dash-in-second')
     if re.search('\w+-\w+', second):
       # There are only about 20 of these.
       g.g('deleting-mid-dash-in-second', [second, line], True)
@@ -518,18 +748,19 @@ def examine_or_also_and_with_parenth(line):
       #  g.g('changed backups', [second, backup, new, line])
       second = new
 
+    g.check('approvd_second_found_after_orandalso')
     if third:
       g.g('changes',[f'{original}, {second}, {third}, {fourth}', entry], True)
     
     if second:
       original = apply_change(original, second)
-      add(original, entry)
+      add(original, entry, 'approvd_second_found_after_orandalso')
     if third:
       original = apply_change(original, third)
-      add(original, entry)
+      add(original, entry, 'positively found third')
     if fourth:
       original = apply_change(original, fourth)
-      add(original, entry)
+      add(original, entry, 'found a fourth')
 
     if second and third and fourth:
       g.g ('approvd_second_found_after_orandalso', 
@@ -543,8 +774,12 @@ def examine_or_also_and_with_parenth(line):
            [second,line], True)
     
   
-  line = repair_dashed_first_word(entry)
-  first = first_words(entry)
+  if families is not None and 'parenth' not in families:
+    return
+  g.check(None)
+  header = entry_header.repaired
+  line = header.line
+  first = entry_header.words()
   original=first[0]
   second=third=fourth=''
   # Is it word or word followed by ( ?
@@ -553,17 +788,18 @@ def examine_or_also_and_with_parenth(line):
     # Isolate the contents of the parenthesis.
 
     # CLEAN UP A BIT
-    line = re.sub('\((tri|dis|quadri)syl\.\)', '', line)
-    line = re.sub('\(sc\.\)', '', line)
+    if 'syl.)' in line or '(sc.)' in line:
+      line = re.sub('\((tri|dis|quadri)syl\.\)', '', line)
+      line = re.sub('\(sc\.\)', '', line)
+      header = lexer.Header(line)
 
     # If still there..
       
-    if b := re.search('^.*?\((.*?)\)', ' '.join(line.split()[0:20])):
+    if (c := header.parenthetical(20)) is not None:
       # Found the parenthetical contents.
-      c = b.group(1)
       d = c.split()
-      g.g('all parentheticals to examine', [b.group(1),line], True)
-      if len(d) == 1: # ONE WORD IN PARENTHESES
+      g.g('all parentheticals to examine', [c,line], True)
+      if g.check('approved single parenth, keeping') and len(d) == 1: # ONE WORD IN PARENTHESES
         e = d[0] 
         #if e in ['poet.', 'post-class.', 'post-Aug.', 'anteclass.', 'class.', 'Ciceron.', 'ante-class.', 'postAug.', 'plur.', 'pentasyl.', 'eccl.', 'Lindem.', 'postclass.', 'Ptol.',
         #        'Plut.', 'iron.', 'Liv.', 'Vitr.', 'obsc.', 'delin.', 'Pseud.', 'Andron.', 'Plautin.', 'Hilar.', 'trop.', 'dissyll.', 'pcet.', 'Class.', 'Appul.', 'Vitruv', 'Hebr. ',
@@ -579,9 +815,9 @@ def examine_or_also_and_with_parenth(line):
           second='-caen-'
           third='-coen-'
           add(apply_change(original,second), 
-             entry)
+             entry, 'approved single parenth, keeping')
           add(apply_change(original, third),
-             entry)
+             entry, 'approved single parenth, keeping')
           e=''
         if '-' in e and not e.startswith('-') and not e.endswith('-') and not first[1].startswith('('):
           e = ''
@@ -631,12 +867,12 @@ def examine_or_also_and_with_parenth(line):
           g.g('rejected single parenth', [e, line], True)
           e = ''
         if e:
-          add(apply_change(original, e), entry)
+          add(apply_change(original, e), entry, 'approved single parenth, keeping')
           third = e
           g.g('approved single parenth, keeping', [e, line], True)
           if not first[1].startswith('('):
             g.g('suspect single parenth', [e, line], True)
-      elif len(d) == 2:
+      elif g.check('parenth..guessing') and len(d) == 2:
         if d[0] == 'v.' or d[0] == 'cf.':
           # Skip this. 'vide.'
           pass
@@ -662,16 +898,16 @@ def examine_or_also_and_with_parenth(line):
               d[1] = '-viges-'
             if d[1]:
               g.g('parenth..guessing', [d[1],line], True)
-              add(apply_change(original, d[1]), entry)
+              add(apply_change(original, d[1]), entry, 'parenth..guessing')
         else:
           g.g('len d is 2, omitting', d + [line], True)
       elif len(d) > 2:
-        if d[0] == 'falsely' or c.startswith('the form'):
+        if g.check('skippinig falsely or form') and (d[0] == 'falsely' or c.startswith('the form')):
           g.g('skippinig falsely or form', [d[0],line],True)
-        elif b:=re.search('^less correctly written (\S+)[\s,]*',c):
+        elif g.check('less correctly written') and (b:=re.search('^less correctly written (\S+)[\s,]*',c)):
           g.g('less correctly written',[b.group(1),line],True)
-          add(apply_change(original, b.group(1)), entry)          
-        elif b:=re.search('^less correctly ([\w-]+)[\s,]*',c):
+          add(apply_change(original, b.group(1)), entry, 'less correctly written')          
+        elif g.check('less correctly') and (b:=re.search('^less correctly ([\w-]+)[\s,]*',c)):
           # (less correctly fēn-, foen-)
           # (less correctly fēn-, foen-, -tius)
           change = b.group(1).replace(';','')
@@ -682,7 +918,7 @@ def examine_or_also_and_with_parenth(line):
             g.g('less correctly-rejected', [original,change,line],True)
             change = ''
           else:
-            add(apply_change(original, change), entry)
+            add(apply_change(original, change), entry, 'less correctly')
           change2=change3=''
           #Genāva (less correctly Genna or Genēva), ae, 
           #..(less correctly hoedus, and archaic aedus or ēdus;
@@ -693,7 +929,7 @@ def examine_or_also_and_with_parenth(line):
               change2 = ''
 
             elif '-' in change2 or (original[0].islower() and change2[0].islower()) or (change2[0].isalpha() and n(change2)[0].lower() == n(original)[0].lower()):
-              add(apply_change(original, change2), entry)
+              add(apply_change(original, change2), entry, 'less correctly')
             else:
               change2=''
           #faenĕrātĭcĭus (less correctly fēn-, foen-, -tius),
@@ -702,22 +938,22 @@ def examine_or_also_and_with_parenth(line):
             if change3 in ['v', 'not']:
               change3 = ''
             #if '-' in change3:
-            add(apply_change(original, change3), entry)
+            add(apply_change(original, change3), entry, 'less correctly')
             #else:
             #  change3 = ''
           g.g('less correctly',[change,change2,change3,line],True)
-        elif b:=re.search('^collat\. form (\S+?),',c):
+        elif g.check('collat form') and (b:=re.search('^collat\. form (\S+?),',c)):
           g.g('collat form', [b.group(1),line], True)
           #add(apply_change(original, b.group(1)), entry)
           pass
           ##### SKIPPING: IT MIGHT BE MORE HELPFUL NOT TO RECORD THE COLLATERAL FORM #####
-        elif b:=re.search('^or better, (\S+)',c):
+        elif g.check('or better') and (b:=re.search('^or better, (\S+)',c)):
           g.g('or better', [b.group(1),line],True)
-          add(apply_change(original, b.group(1)), entry)
-        elif b:=re.search('in the best MSS\. (also ){0,1}([\w-]+)',c):
+          add(apply_change(original, b.group(1)), entry, 'or better')
+        elif g.check('in the best MSS., guessing') and (b:=re.search('in the best MSS\. (also ){0,1}([\w-]+)',c)):
           g.g('in the best MSS., guessing', [b.group(2),line], True)
-          add(apply_change(original, b.group(2)), entry)
-        elif b:=re.search('in MSS\. sometimes ([\w-]+)',c):
+          add(apply_change(original, b.group(2)), entry, 'in the best MSS., guessing')
+        elif g.check('in MSS sometimes') and (b:=re.search('in MSS\. sometimes ([\w-]+)',c)):
           ## PROBABLY SKIP THIS ONE ##
           ##         turn off       ##
           ## IT TURNS CUR INTO COR  ##
@@ -729,46 +965,47 @@ def examine_or_also_and_with_parenth(line):
           if change2:
             #add(apply_change(original, change2), entry)
             pass
-        elif b:=re.search('in many MSS\. also( written)* ([\w-]+)',c):
+        elif g.check('in many MSS also written') and (b:=re.search('in many MSS\. also( written)* ([\w-]+)',c)):
           g.g('in many MSS also written', [b.group(2),line],True)
-          add(apply_change(original, b.group(2)), entry)
-        elif b:=re.search('also ([\w-]+) and ([\w-]+)',c[0:160]):
+          add(apply_change(original, b.group(2)), entry, 'in many MSS also written')
+        elif g.check('also___and___') and (b:=re.search('also ([\w-]+) and ([\w-]+)',c[0:160])):
           #(also ante- and postclass. form gnārŭris,
           change3=change4=''
           if any(i in ['ante-','postclass.','separately'] for i in [b.group(1), b.group(2)]):
             # Skip
             pass
           else:
-            add(apply_change(original, b.group(1)), entry)
-            add(apply_change(original, b.group(2)), entry)
+            add(apply_change(original, b.group(1)), entry, 'also___and___')
+            add(apply_change(original, b.group(2)), entry, 'also___and___')
             # (also -găno and -găbo, or -găvo, -găo, ōnis, m.
             if z:=re.search('also [\w-]+ and [\w-]+, or ([\w-]+), ([\w-]+),',c[0:160]):
               change3=z.group(1)
               change4=z.group(2)
-              add(apply_change(original, change3), entry)
-              add(apply_change(original, change4), entry)
+              add(apply_change(original, change3), entry, 'also___and___')
+              add(apply_change(original, change4), entry, 'also___and___')
             g.g('also___and___', [b.group(1), b.group(2), change3,change4,line],True)
-        elif b:=re.search('^anciently written (\S+)',c):
+        elif g.check('anciently written') and (b:=re.search('^anciently written (\S+)',c)):
           g.g('anciently written', [b.group(1), line],True)
-          add(apply_change(original, b.group(1)), entry)
-        elif b:=re.search('^less cor\. rectly (\S+)',c):
+          add(apply_change(original, b.group(1)), entry, 'anciently written')
+        elif g.check('less cor_rectly') and (b:=re.search('^less cor\. rectly (\S+)',c)):
           g.g('less cor_rectly', [b.group(1),line],True)
-          add(apply_change(original, b.group(1)), entry)
-        elif b := re.search('(\S+) or (\S+)',c):
+          add(apply_change(original, b.group(1)), entry, 'less cor_rectly')
+        elif g.check('parenth __ or __') and (b := re.search('(\S+) or (\S+)',c)):
           if len(d) == 3 and any(w.startswith('(') for w in first_words(entry)[0:6]): 
             # Only these two words are parenthzd
             g.g('parenth __ or __', [b.group(1), b.group(2), line], True)
-            add(apply_change(original, b.group(1)), entry)
-            add(apply_change(original, b.group(2)), entry)
+            add(apply_change(original, b.group(1)), entry, 'parenth __ or __')
+            add(apply_change(original, b.group(2)), entry, 'parenth __ or __')
           else:
             # Could revisit this later but it produces
             # almost nothing usable so skip these safely.
             g.g('(___ or ___ .. but len d was not 3, skip',[c,b.group(1),b.group(2),line],True)
-        elif b:=re.search('^sync\. (\S+) and (\S+)',c):
+        elif g.check('sync ___ and ___') and (b:=re.search('^sync\. (\S+) and (\S+)',c)):
           g.g('sync ___ and ___', [b.group(1), b.group(2),line], True)
-          add(apply_change(original, b.group(1)), entry)
-          add(apply_change(original, b.group(2)), entry)
+          add(apply_change(original, b.group(1)), entry, 'sync ___ and ___')
+          add(apply_change(original, b.group(2)), entry, 'sync ___ and ___')
         else:
+          g.check('Guessing due to Comma or Semicolon:')
           if (d[0].endswith(',') or d[0].endswith(';')) and any ( w.startswith('(') for w in first_words(entry)[0:6]):
             word = d[0][:-1]
             if n(word) in {'better','f.', 'poet.','also','trisyl.',
@@ -783,7 +1020,7 @@ def examine_or_also_and_with_parenth(line):
               # keep it
               g.g('keeping first w in pathen due to dash',
                  [word,line],True)
-              add(apply_change(original,word),entry)
+              add(apply_change(original,word),entry, 'keeping first w in pathen due to dash')
             elif sim(n(original), n(word)) <= 25.0:
               g.g('rejectin first w in parenth pct',
                  [original,word,entry],True)
@@ -792,7 +1029,7 @@ def examine_or_also_and_with_parenth(line):
                   [str(sim(n(original),
                   n(d[0][:-1]))),original,
                    d[0][:-1], line], True)
-              add(apply_change(original, d[0][:-1]), entry)
+              add(apply_change(original, d[0][:-1]), entry, 'Guessing due to Comma or Semicolon:')
           elif d[0] == 'v.' or d[0] == 'cf.':
             g.g('v or cf, passing', [line], True)
           elif c.startswith('a different orthography for'):
@@ -805,26 +1042,31 @@ def examine_or_also_and_with_parenth(line):
                True)
     
 
-def examine_subsequent_additions(line):
+def examine_subsequent_additions(line, header=None):
+  # header is the entry's tokens from read_header(), if scan() has them already.
   entry = line
-  line = repair_dashed_first_word(line)
+  if header is None:
+    header = read_header(entry)
   # That's the end of the searching round.
   # The first and/or/also is done.
   # The parenthetical is done.
   # Now we need to delete parentheticals and examine
   # whether more 'and,also,or's are present.
-  line=re.sub('\(.*?\)', '', line)
+  header = header.repaired.stripped()
+  line = header.line
 
   if 'of or belonging' in line:
     line = re.sub('of or belonging', '', line)
-  first = first_words(line)
+    header = lexer.Header(line)
+  first = header.words()
   original = first[0]
   c = ' '.join(first)
 
+  g.check('and more usu in the pl')
   if b:=re.search('and more usu\. in the plur\.: (\S+),', line):
     g.g('and more usu in the pl', [b.group(1), line], True)
-    add(apply_change(original, b.group(1)), entry)
-  elif b:=re.search(', and ([\w-]+),', ' '.join(line.split()[0:8])):
+    add(apply_change(original, b.group(1)), entry, 'and more usu in the pl')
+  elif g.check(', and S..') and (b:=re.search(', and ([\w-]+),', ' '.join(header.chunks(8)))):
     word = b.group(1)
     if n(word) == 'in':
       word=''
@@ -836,7 +1078,7 @@ def examine_subsequent_additions(line):
       pass
     else:
       g.g(', and S..', [str(sim(n(word), n(original))), b.group(1),line], True)
-      add(apply_change(original, word), entry)
+      add(apply_change(original, word), entry, ', and S..')
 
   # Examples for this;
   # ălo, ălŭi, altum, and ălĭtum, 3, v. a. ; alitus seems to have been first 
@@ -849,8 +1091,8 @@ def examine_subsequent_additions(line):
   # For this:
   # alternē, alternīs, and alternă, advv., v. alternus fin.
   # similarly: 'a, b, and c,' is a structure to pay attention to..
-  if b:=re.search('^([\w-]+), ([\w-]+), (and|or|also) ([\w-]+),', line):
-    d = [b.group(1), b.group(2), b.group(4)]
+  g.check('a, b, and c,')
+  if d := listed(header):
     result = []
     for item in d:
       if n(original).endswith('cox') and n(item) == 'cocis':
@@ -881,14 +1123,14 @@ def examine_subsequent_additions(line):
     g.g('a, b, and c,', result + [line], True) 
     for item in result:
       original = apply_change(original, item)
-      add(original, entry)
+      add(original, entry, 'a, b, and c,')
     # Once we're this deep we should also check for
     # items like:
     # albĭcēris, e, or albĭcērus, a, um, also albĭcērātus, a, um, adj. 
     # Tĭbĕris, is, also contr., Tibris , is or ĭdis,
     # FOR LATER.
     
-  elif 'or' in first or 'and' in first and (first[1] not in {'or', 'and', 'also'}):
+  elif g.check('or __ or ____') and ('or' in first or 'and' in first and (first[1] not in {'or', 'and', 'also'})):
     if len(first) < 3:
       return
     if first[2] == 'or' or first[2] == 'and':
@@ -902,8 +1144,8 @@ def examine_subsequent_additions(line):
         g.g('or __ or ____', [b.group(1), b.group(2), line], True)
         for item in [b.group(1), b.group(2)]:
           original = apply_change(original, item)
-          add(original, entry)
-      elif len(first[3]) >= len(first[0]) and n(first[3][0:len(first[0])-2]) == n(first[0][0:len(first[0])-2]):
+          add(original, entry, 'or __ or ____')
+      elif g.check('measuring trick') and len(first[3]) >= len(first[0]) and n(first[3][0:len(first[0])-2]) == n(first[0][0:len(first[0])-2]):
         if '.' in first[3]:
           pass
         elif n(first[3])[-2] in {'um', 'us'} and n(original).endswith('o'):
@@ -912,18 +1154,68 @@ def examine_subsequent_additions(line):
           pass
         else:
           g.g('measuring trick', [first[3], line], True)
-          add(apply_change(original, first[3]), entry)
+          add(apply_change(original, first[3]), entry, 'measuring trick')
       else:
         g.g('no solution found after __ or', [line], True)
         pass
     # LEFT OFF HERE
-    if re.search('\w+ \w+ (and|or) \w+ \w+',line):
-      #print('guessing to EXCLUDE:',line[0:80],'\n')
-      #reject(line)
-      pass
+
+# Most entries are plain 'word, gen., gender, definition', with no or/and/also and
+# no parenthesis in the header, and none of the rules above can apply to them. The
+# examine_* functions still scan the whole entry (often many kilobytes) several times
+# to find that out, so we first look at just the start of the entry and note which
+# families of rules could apply:
+#
+#   'connector':  word or/and/also ...   (examine_or_also_and_with_parenth, first part)
+#   'parenth':    a parenthesis among the first words   (second part)
+#   'subsequent': or/and/also among the first words once parentheticals and
+#                 'of or belonging' are removed   (examine_subsequent_additions)
+#
+# scan() reads each entry's header once, with read_header() (see lexer.py), and passes
+# the tokens to classify() and the examine_* functions.
+# Every test here is looser than the one it stands in for, on the same text, so the
+# results are the same as running every entry through both functions. Set
+# FAST_PATH = False, or pass --no-fast-path, to check; tests/test_fast_path.py does so
+# for entries that once went wrong.
+FAST_PATH = True
+
+family_counts = {} # family (or 'fast path') -> number of entries
+
+def classify(entry, header=None):
+  # Returns the set of rule families (above) that could apply to entry. header is
+  # the entry's tokens from read_header(), if scan() has them already.
+  families = set()
+  if header is None:
+    header = read_header(entry)
+  words = header.words() # = first_words(entry)
+  if any(a.startswith('(') for a in words[1:]):
+    families.add('parenth')
+
+  # repair_dashed_first_word() may have changed the header; go by what it left.
+  header = header.repaired
+  words = header.words()
+  if len(words) > 1 and words[1] in lexer.CONNECTORS:
+    families.add('connector')
+
+  # As in examine_subsequent_additions(): the parentheticals go, then 'of or
+  # belonging', which brings later words into reach.
+  header = header.stripped()
+  if 'of or belonging' in header.line:
+    header = lexer.Header(header.line.replace('of or belonging', ''))
+  words = header.words()
+  chunks = header.words(9, commas=False)
+  if lexer.CONNECTORS.intersection(words) or 'and' in chunks[0:9]:
+    families.add('subsequent')
+  elif 'and more usu. in the plur.:' in header.line:
+    # Looked for anywhere in the entry.
+    families.add('subsequent')
+
+  for family in families or ['fast path']:
+    family_counts[family] = family_counts.get(family, 0) + 1
+  return families
 
 # Start of program
-g=Guess() # Initialize guess logging
+g = None # Guess logging; initialized by build()
 n = lambda string : normalize(string) # quick code for accent removal
 
 dictionary = {} # Where we store all our headwords and entries.
@@ -934,34 +1226,122 @@ dictionary = {} # Where we store all our headwords and entries.
 # dictionary will be stored as a list[] because
 # one headword may link to multiple L&S dictionary entries.
 
-# Open and read Lewis and Short text dictionary.
-with open(INPUT_FILE, 'r') as f:
-  ls_input = f.read().splitlines()
-
-print(f'{INPUT_FILE} opened. {len(ls_input)} lines in file. Scanning..')
-
-remainders = []
-entry_count = 0
-start = False
-
-# Begin main parsing loop.
-
-# This will examine each entry and make some initial guesses.
-# It will subsequently call examine_or_also_and_with_parenth()
-# and examine_subsequent_additions() for different kinds of
-# analysis. Along the way, any headword variations are stored
-# as keys in dictionary{} pointing to a list: Since one headword
-# can of course point to multiple dictionary entries, the
-# dictionary value is stored as a list. Each entry pointed to
-# by an already existing headword is added to the list.
-for line in ls_input:
-  if line.strip() == 'A':
-    start = True
-  if not start:
-    continue
-  if len(line.strip()) == 1: # Each new letter of the alphabet is introduced
-    print(line)
-    continue                 # by a line with a single letter.
+headword_spill = None # spill.HeadwordSpill during a low-memory build; see build()
+
+# Full builds can also index the English definitions (see english.py).
+ENGLISH_INDEX = False
+
+# With a scheme ('letter' or 'hash'), the outputs are also cut into shards with a
+# manifest (see shard.py).
+SHARDS = None
+SHARD_BUCKETS = shard.BUCKETS
+
+entry_sections = None # shard.Sections while a build is cut into letter shards
+
+def read_input(filename=INPUT_FILE):
+  # Open and read Lewis and Short text dictionary.
+  with open(filename, 'r') as f:
+    ls_input = f.read().splitlines()
+
+  print(f'{filename} opened. {len(ls_input)} lines in file. Scanning..')
+  return ls_input
+
+def stream_input(filename=INPUT_FILE):
+  # The same lines as read_input(), one at a time, for low-memory builds.
+  print(f'{filename} opened. Streaming lines..')
+  with open(filename, 'r') as f:
+    for line in f:
+      yield from line.splitlines() or ['']
+
+# Each letter of the alphabet is introduced by a line with a single letter.
+# For selective builds we remember the byte offset of each of these lines, so we
+# can seek straight to the sections we want instead of reading the whole file.
+# The index is saved next to the input and reused while the input is unchanged
+# (or, where it cannot be saved, kept in memory for this build only).
+SECTION_INDEX_SUFFIX = '.sections'
+
+def section_index(filename=INPUT_FILE):
+  # Returns a list of [letter, byte offset] for every section marker, plus a
+  # final ['', size] marking the end of the file.
+  stat = os.stat(filename)
+  index_file = filename + SECTION_INDEX_SUFFIX
+  try:
+    with open(index_file, 'r') as f:
+      saved = json.load(f)
+    if saved['size'] == stat.st_size and saved['mtime'] == stat.st_mtime_ns:
+      return saved['sections']
+  except (OSError, ValueError, KeyError):
+    pass
+
+  sections = []
+  start = False
+  offset = 0
+  with open(filename, 'rb') as f:
+    for raw in f:
+      line = raw.decode('utf-8').strip()
+      if line == 'A':
+        start = True
+      if start and len(line) == 1:
+        sections.append([line, offset])
+      offset += len(raw)
+  sections.append(['', offset])
+
+  temp = index_file + '.tmp'
+  try:
+    with open(temp, 'w') as f:
+      json.dump({'size': stat.st_size, 'mtime': stat.st_mtime_ns,
+                 'sections': sections}, f)
+    os.replace(temp, index_file)
+  except OSError:
+    pass # e.g. a read-only directory; the index is made again next time
+  return sections
+
+def section_letter(sections, letter):
+  # The section a (normalized, upper case) letter is filed under.
+  letters = [s[0] for s in sections]
+  if letter not in letters and letter in SECTION_ALIASES:
+    letter = SECTION_ALIASES[letter]
+  return letter
+
+def parse_letters(text):
+  # 'D', 'DE', 'd,e' or 'D-F' -> ['D', 'E', 'F']
+  text = re.sub('[\s,]', '', text.upper())
+  letters = []
+  for b in re.finditer('(\w)(?:-(\w))?', text):
+    last = b.group(2) or b.group(1)
+    for i in range(ord(b.group(1)), ord(last) + 1):
+      letters.append(chr(i))
+  return letters
+
+def read_sections(filename, letters):
+  # Reads only the sections for the given letters, using the section index.
+  # The marker lines are kept, so scan() still prints them.
+  sections = section_index(filename)
+  wanted = {section_letter(sections, n(letter).upper()) for letter in letters}
+  ls_input = []
+  with open(filename, 'rb') as f:
+    for i, (letter, offset) in enumerate(sections[:-1]):
+      if letter not in wanted:
+        continue
+      f.seek(offset)
+      data = f.read(sections[i + 1][1] - offset)
+      ls_input.extend(data.decode('utf-8').splitlines())
+
+  print(f'{filename} sections {",".join(sorted(wanted))} read. {len(ls_input)} lines. Scanning..')
+  return ls_input
+
+def headword_key(line):
+  # Normalized first word of a (cleaned up) entry, for headword ranges.
+  return n(first_words(repair_dashed_first_word(line))[0]).replace('-', '')
+
+def partial_name(filename, label):
+  # lewis_short_by_headword.json -> lewis_short_by_headword.DEF.json
+  root, ext = os.path.splitext(filename)
+  return f'{root}.{label}{ext}'
+
+def clean_line(line):
+  # Tidies up one line of input before it is examined. Returns None for
+  # lines we skip.
 
   # This is if the whole entry is in parentheses.
   if line.startswith('('):
@@ -969,144 +1349,493 @@ for line in ls_input:
 
   if line.startswith('-'):
     # Skip these for now.
-    continue
+    return None
 
   # if the line starts with space, or a special ch.
   if line:
     while not line[0].isalpha():
       line=line[1:]
 
-  entry_count += 1
-    
   if 'condictīcĭus- or tĭus, a, um' in line:
     line = re.sub('condictīcĭus- or tĭus', 'condictīcĭus or -tĭus', line)
   if 'Iālysus- or -os, i, m.' in line:
     line = re.sub('Iālysus- or -os, i, m.', 'Iālysus or -os, i, m.', line)
   if 'īcĭo and īco), īci, ictum' in line:
     line = re.sub('īcĭo and īco\), īci, ictum', 'īcĭo and īco, īci, ictum', line)
-  
-  entry = line
-  line = repair_dashed_first_word(line)
-  first = first_words(line)
-
-  if 'dextrorsum or dextrorsus, or uncontracted dextrovorsum (or -ver-sum), adv.' in line:
-    add('dextrorsum', entry)
-    add('dextrorsus', entry)
-    add('dextrovorsum', entry)
-    add('dextroversum', entry)
-    continue
-  if 'ăb, ā, abs, prep. with abl.' in line:
-    add('ăb', entry)
-    add('ā', entry)
-    add('abs', entry)
-    continue
-
-  # File away the first word
-  g.g('first_word', [first[0],line], True)
-  first_keyword = first[0]
+  return line
+
+def scan(ls_input, start=False, headword_range=None):
+  # Begin main parsing loop.
+
+  # This will examine each entry and make some initial guesses.
+  # It will subsequently call examine_or_also_and_with_parenth()
+  # and examine_subsequent_additions() for different kinds of
+  # analysis. Along the way, any headword variations are stored
+  # as keys in dictionary{} pointing to a list: Since one headword
+  # can of course point to multiple dictionary entries, the
+  # dictionary value is stored as a list. Each entry pointed to
+  # by an already existing headword is added to the list.
+  # Pass start=True when ls_input does not begin at the 'A' section (see
+  # read_sections()), and headword_range=(low, high) to only parse entries
+  # whose normalized first word falls in that range; high may be a prefix.
+  # Entries may also be perseus.Entry tuples (see perseus.read_lines()), whose
+  # <orth> forms are filed as headwords too.
+  # Returns the number of entries processed.
+  entry_count = 0
+  family_counts.clear()
+  section = None
+
+  for line in ls_input:
+    orths = None
+    if isinstance(line, perseus.Entry):
+      orths = line.orths
+      line = line.text
+    if line.strip() == 'A':
+      start = True
+    if not start:
+      continue
+    if len(line.strip()) == 1: # Each new letter of the alphabet is introduced
+      print(line)
+      section = line.strip()
+      continue                 # by a line with a single letter.
+
+    line = clean_line(line)
+    if line is None:
+      continue
+
+    if headword_range:
+      key = headword_key(line)
+      if not headword_range[0] <= key or key[:len(headword_range[1])] > headword_range[1]:
+        continue
+
+    entry_count += 1
+    g.start_entry()
+
+    entry = line
+    if entry_sections is not None:
+      entry_sections.add(entry, section)
+    header = read_header(entry)
+    line = header.repaired.line
+    first = header.repaired.words()
+
+    if 'dextrorsum or dextrorsus, or uncontracted dextrovorsum (or -ver-sum), adv.' in line:
+      add('dextrorsum', entry)
+      add('dextrorsus', entry)
+      add('dextrovorsum', entry)
+      add('dextroversum', entry)
+      continue
+    if 'ăb, ā, abs, prep. with abl.' in line:
+      add('ăb', entry)
+      add('ā', entry)
+      add('abs', entry)
+      continue
+
+    # File away the first word
+    g.check('first_word')
+    g.g('first_word', [first[0],line], True)
+    first_keyword = first[0]
     
-  if '.' in first_keyword:
-    first_keyword = first_keyword.replace('.','')
-  if ':' in first_keyword:
-    first_keyword = first_keyword.replace(':', '')
-
-  if first_keyword.strip().endswith('-'):
-    # Many entries are just explanations of prefixes. We will not include these
-    # for now.
-    continue
-
-  if '-' in first_keyword:
-    first_keyword = first_keyword.replace('-', '')
-  if '/' in first_keyword:
-    first_keyword = first_keyword.replace('/', '')
+    if '.' in first_keyword:
+      first_keyword = first_keyword.replace('.','')
+    if ':' in first_keyword:
+      first_keyword = first_keyword.replace(':', '')
+
+    if first_keyword.strip().endswith('-'):
+      # Many entries are just explanations of prefixes. We will not include these
+      # for now.
+      continue
+
+    if '-' in first_keyword:
+      first_keyword = first_keyword.replace('-', '')
+    if '/' in first_keyword:
+      first_keyword = first_keyword.replace('/', '')
   
-  add(first_keyword, entry)
-
-  # There are two of these.
-  if b:=re.search('and usu\. plur\. (\w+)', line):
-    add(b.group(1), entry)
-
-  # File away potential other words in the header:
-  # a or b, and c, sometimes d, etc
-  # a or b (c or d) et alia
-  examine_or_also_and_with_parenth(entry)
-
-  # and this looks for or/and/also that comes after all that.
-  examine_subsequent_additions(entry)
-# End of for loop
-
-print(f'Completed scan of {INPUT_FILE}.')
-print(f'{entry_count} dictionary entries processed.')
-print(f'{len(dictionary)} headwords and variations of headwords found.')
-count = sum(len(dictionary[item]) for item in dictionary)
-print(f'These headwords effect {count} citations.')
-print('')
-
-note = '(One entry can be cited by multiple headwords, and one headword can cite multiple entries. E.g. five entries are cited by "a", one of which is also cited by both "ab" and "abs", and another by "ah", thus in five entries, there are four headwords, and eight citations.)'
-
-import textwrap
-print('\n'.join(textwrap.wrap(note, width=60)) + '\n')
-
-# Write the dictionary to a JSON file
-import json
-with open(JSON_RESULT_FILE, 'w') as json_file:
-    d = {}
-    for key in dictionary:
-      d[key] = list(dictionary[key])
-    json.dump(d, json_file, indent=4)
-    print(f"Saved to {JSON_RESULT_FILE}.")
-
-# now flip the dictionary inside out, and save as text
-# file per notes above.
-result = {}
-for key, values in dictionary.items():
-    for item in values:
-        result.setdefault(item, []).append(key)
-
-with open(TEXT_RESULT_FILE, 'w') as f:
-  for key, values in result.items():
-    # File format: pairs of lines.
-    # Line1: # followed by comma,separated,keywords
-    # Line2: entry these keywords point to.
-    f.write(f'#{",".join(values)}\n{key}\n')
-
-print(f'Saved to {TEXT_RESULT_FILE}.')
-
-# Verify results
-
-KEYWORD = 'dŭcentĭens' # This is a variant of a listed headword.
-
-print('')
-print(f'Verifying JSON file, searching for {KEYWORD}:')
-
-import json
-with open(JSON_RESULT_FILE, 'r') as json_file:
-    loaded_dict = json.load(json_file)
-print(loaded_dict['dŭcentĭens'])
-
-
-LS_DICTIONARY = {}
-lines = 0
-with open(TEXT_RESULT_FILE, 'r') as f:
-  content = f.read().splitlines()
-
-  for line in content:
-    lines += 1
-    line = line.strip()
-    if line.startswith('#'):
-      # This is a keyword line.
-      keywords = dict.fromkeys(keyword for keyword in line[1:].split(','))
+    add(first_keyword, entry, 'first_word')
+
+    # There are two of these.
+    g.check('and usu. plur.')
+    if b:=re.search('and usu\. plur\. (\w+)', line):
+      g.g('and usu. plur.', [b.group(1), line], True)
+      add(b.group(1), entry, 'and usu. plur.')
+
+    # The XML marks the headword and its variants with <orth>. Stems such as
+    # -tius go on the headword, as in the rules below, which still run for the
+    # variants the XML does not mark.
+    g.check('orth')
+    if orths:
+      g.g('orth', orths + [line], True)
+      add(orths[0], entry, 'orth')
+      for orth in orths[1:]:
+        add(apply_change(orths[0], orth), entry, 'orth')
+    g.check(None)
+
+    # File away potential other words in the header:
+    # a or b, and c, sometimes d, etc
+    # a or b (c or d) et alia
+    if not FAST_PATH:
+      g.stage('examine_or_also_and_with_parenth', examine_or_also_and_with_parenth, entry, None, header)
+      g.stage('examine_subsequent_additions', examine_subsequent_additions, entry, header)
+      continue
+
+    families = classify(entry, header)
+    if 'connector' in families or 'parenth' in families:
+      g.stage('examine_or_also_and_with_parenth', examine_or_also_and_with_parenth, entry, families, header)
+
+    # and this looks for or/and/also that comes after all that.
+    if 'subsequent' in families:
+      g.stage('examine_subsequent_additions', examine_subsequent_additions, entry, header)
+  # End of for loop
+  g.finish_entry()
+  return entry_count
+
+def print_statistics(filename, entry_count, headwords=None, citations=None):
+  # A low-memory build passes the headword and citation counts, since
+  # dictionary is empty then.
+  if headwords is None:
+    headwords = len(dictionary)
+    citations = sum(len(dictionary[item]) for item in dictionary)
+  print(f'Completed scan of {filename}.')
+  print(f'{entry_count} dictionary entries processed.')
+  print(f'{headwords} headwords and variations of headwords found.')
+  print(f'These headwords effect {citations} citations.')
+  if family_counts:
+    print(f'{family_counts.get("fast path", 0)} entries took the fast path.')
+  print('')
+
+  note = '(One entry can be cited by multiple headwords, and one headword can cite multiple entries. E.g. five entries are cited by "a", one of which is also cited by both "ab" and "abs", and another by "ah", thus in five entries, there are four headwords, and eight citations.)'
+
+  print('\n'.join(textwrap.wrap(note, width=60)) + '\n')
+
+def write_json(filename=JSON_RESULT_FILE):
+  # Write the dictionary to a JSON file
+  with checksum.open_output(filename) as json_file:
+      d = {}
+      for key in dictionary:
+        d[key] = list(dictionary[key])
+      json.dump(d, json_file, indent=4)
+      print(f"Saved to {filename}.")
+  written = checksum.written[filename]
+  written.headwords = len(d)
+  written.citations = sum(len(values) for values in d.values())
+
+def invert(dictionary):
+  # now flip the dictionary inside out: entry -> list of headwords.
+  result = {}
+  for key, values in dictionary.items():
+      for item in values:
+          result.setdefault(item, []).append(key)
+  return result
+
+def write_text(filename=TEXT_RESULT_FILE):
+  # Save the inverted dictionary as a text file per notes above.
+  result = invert(dictionary)
+
+  with checksum.open_output(filename) as f:
+    for key, values in result.items():
+      # File format: pairs of lines.
+      # Line1: # followed by comma,separated,keywords
+      # Line2: entry these keywords point to.
+      f.write(f'#{",".join(values)}\n{key}\n')
+  written = checksum.written[filename]
+  written.entries = len(result)
+  written.citations = sum(len(values) for values in result.values())
+
+  print(f'Saved to {filename}.')
+
+def write_spilled(json_filename=JSON_RESULT_FILE, text_filename=TEXT_RESULT_FILE):
+  # Both outputs of a low-memory build, sorted on disk (see spill.py).
+  # Returns the number of headwords and citations.
+  return headword_spill.write(json_filename, text_filename)
+
+def write_references():
+  # Resolves the 'v.' and 'cf.' references in the text file (see xref.py).
+  references, pointers = xref.build_references(TEXT_RESULT_FILE)
+  print(f'Saved to {xref.XREF_FILE}. {references} cross-references, {pointers} of them from entries that only point elsewhere.')
+
+def write_glosses():
+  # A short summary of each entry, for lookups that do not need all of it (see gloss.py).
+  glossed = gloss.build_glosses(TEXT_RESULT_FILE)
+  print(f'Saved to {gloss.GLOSS_FILE}. {glossed} entries have a short gloss.')
+
+def write_fingerprint(memory_budget=None):
+  # A digest of every citation, for comparing the next build with this one (see compare.py).
+  # A low-memory build passes its budget, which the sorts keep to.
+  headwords, entries, citations = compare.save_fingerprint(TEXT_RESULT_FILE, memory_budget=memory_budget or compare.MEMORY_BUDGET)
+  print(f'Saved to {compare.FINGERPRINT_FILE}. {citations} citations fingerprinted.')
+
+def read_entry_sections(filename=INPUT_FILE):
+  # The section of each entry of an input, as scan() would note it, for
+  # cutting outputs that are already built into letter shards.
+  sections = shard.Sections()
+  if filename.endswith('.xml'):
+    for entry in perseus.iter_entries(filename):
+      line = clean_line(entry.text)
+      if line is not None:
+        sections.add(line, entry.letter)
+    return sections
+  section = None
+  start = False
+  with open(filename, 'r') as f:
+    for line in f.read().splitlines():
+      if line.strip() == 'A':
+        start = True
+      if not start:
+        continue
+      if len(line.strip()) == 1:
+        section = line.strip()
+        continue
+      line = clean_line(line)
+      if line is not None:
+        sections.add(line, section)
+  return sections
+
+def write_shards(json_filename, text_filename):
+  # Cut both outputs into shards, for consumers that only need some headwords (see shard.py).
+  count = shard.split(json_filename, text_filename, shard.SHARD_DIRECTORY, SHARDS, SHARD_BUCKETS, entry_sections)
+  print(f'Saved {count} shards to {shard.SHARD_DIRECTORY}, listed in {os.path.join(shard.SHARD_DIRECTORY, shard.MANIFEST_FILE)}.')
+
+def write_english_index():
+  # Index the English of every entry, for searching from English (see english.py).
+  terms = english.build_english_index(TEXT_RESULT_FILE)
+  print(f'Saved to {english.ENGLISH_FILE}. {terms} English terms indexed.')
+
+# Pipeline stages for the timing report (see instrument.py): function -> stage name.
+STAGES = {'read_input': 'input read',
+          'read_sections': 'input read',
+          'clean_line': 'line cleanup',
+          'add': 'add',
+          'examine_or_also_and_with_parenth': 'examine_or_also_and_with_parenth',
+          'examine_subsequent_additions': 'examine_subsequent_additions',
+          'write_json': 'JSON write',
+          'write_text': 'text write',
+          'write_spilled': 'spilled output write',
+          'write_references': 'cross-references',
+          'write_glosses': 'glosses',
+          'write_fingerprint': 'fingerprint',
+          'write_shards': 'shards',
+          'write_english_index': 'English index',
+          'verify': 'verification'}
+
+report = None # instrument.Report while a timing report is being made
+
+def start_report(memory=True):
+  # Swaps each stage function for a timed version.
+  global report
+  report = instrument.Report(memory)
+  for function, stage in STAGES.items():
+    globals()[function] = report.wrap(stage, globals()[function])
+  return report
+
+def build(input_file=INPUT_FILE, letters=None, headword_range=None, memory_budget=None):
+  # Runs the whole parse and writes every output file, including the
+  # snapshot (see snapshot.py). Returns the finished dictionary.
+  # With letters (e.g. ['D', 'E']) or headword_range (low, high) only those
+  # sections are read and parsed, and the outputs are written to partial
+  # files such as lewis_short_by_headword.DE.json. No snapshot is written
+  # for partial builds.
+  # input_file may also be the Perseus XML (see perseus.py).
+  # With memory_budget (in bytes) the headword/entry pairs are sorted on disk
+  # instead of being kept in dictionary, which is left empty (see spill.py).
+  # There is no snapshot for these builds either, as it is loaded whole.
+  # With SHARDS, the outputs (partial or not) are also cut into shards.
+  # Full builds also save the cross-references between entries (see xref.py)
+  # and a short gloss of each entry (see gloss.py), a fingerprint of the
+  # build to compare later builds with (see compare.py), and with ENGLISH_INDEX
+  # an index of the English in the entries (see english.py). Low-memory builds
+  # only save the fingerprint: the others are built in memory, several times
+  # over any budget.
+  global g, headword_spill, entry_sections
+  g=Guess() # Initialize guess logging
+  dictionary.clear()
+  checksum.written.clear()
+  entry_sections = shard.Sections() if SHARDS == 'letter' else None
+
+  if headword_range:
+    headword_range = tuple(n(word).replace('-', '') for word in headword_range)
+    first, last = headword_range[0][:1].upper(), headword_range[1][:1].upper()
+    letters = (letters or []) + parse_letters(f'{first}-{last}')
+
+  if memory_budget:
+    headword_spill = spill.HeadwordSpill(memory_budget)
+  try:
+    if input_file.endswith('.xml'):
+      # Perseus XML: streamed, so there is no line count to report.
+      print(f'{input_file} opened. Streaming entries..')
+      wanted = None
+      if letters:
+        wanted = {n(letter).upper() for letter in letters}
+        wanted |= {SECTION_ALIASES[letter] for letter in wanted if letter in SECTION_ALIASES}
+      ls_input = perseus.read_lines(input_file, wanted)
+      if report:
+        ls_input = report.iterate('input read', ls_input)
+      entry_count = scan(ls_input, True, headword_range)
+    elif letters:
+      ls_input = read_sections(input_file, letters)
+      entry_count = scan(ls_input, True, headword_range)
+    elif headword_spill is not None:
+      ls_input = stream_input(input_file)
+      if report:
+        ls_input = report.iterate('input read', ls_input)
+      entry_count = scan(ls_input)
     else:
-      # This is an entry line.
-      for keyword in keywords:
-        if keyword not in LS_DICTIONARY:
-          LS_DICTIONARY[keyword] = []
-        LS_DICTIONARY[keyword].append(line)
+      ls_input = read_input(input_file)
+      entry_count = scan(ls_input)
 
+    json_filename, text_filename = JSON_RESULT_FILE, TEXT_RESULT_FILE
+    if letters:
+      if headword_range:
+        label = '-'.join(headword_range)
+      else:
+        label = ''.join(letters)
+      json_filename = partial_name(JSON_RESULT_FILE, label)
+      text_filename = partial_name(TEXT_RESULT_FILE, label)
 
-print('')
-print(f'Verifying text file, searching for {KEYWORD}:')
-print(LS_DICTIONARY['dŭcentĭens']) # Again, should find the variant.
+    if headword_spill is not None:
+      headwords, citations = write_spilled(json_filename, text_filename)
+      print_statistics(input_file, entry_count, headwords, citations)
+    else:
+      print_statistics(input_file, entry_count)
+      write_json(json_filename)
+      write_text(text_filename)
+  finally:
+    if headword_spill is not None:
+      headword_spill.close()
+      headword_spill = None
+
+  if SHARDS:
+    write_shards(json_filename, text_filename)
+  if letters:
+    return dictionary
+
+  if memory_budget:
+    print('Low-memory build: no snapshot, cross-references, glosses or English index.')
+    write_fingerprint(memory_budget)
+    return dictionary
+
+  snapshot.save_snapshot(dictionary, snapshot.sources(input_file))
+  print(f'Saved to {snapshot.SNAPSHOT_FILE}.')
+  write_references()
+  write_glosses()
+  write_fingerprint()
+  if ENGLISH_INDEX:
+    write_english_index()
+  return dictionary
+
+def verify(check_snapshot=True, mode='stream'):
+  # Verify results
+  # The outputs are checked against the sizes, checksums and counts taken as
+  # they were written (see checksum.py), without loading them whole: with
+  # mode 'stream' each file is read once, with 'sample' only a random sample
+  # of headwords is looked up in each. Returns a list of problems.
+
+  KEYWORD = 'dŭcentĭens' # This is a variant of a listed headword.
+
+  if mode == 'sample' and not dictionary:
+    mode = 'stream' # a low-memory build has nothing in memory to compare with
+
+  if mode == 'stream':
+    problems, json_entries, text_entries = checksum.verify_streaming(JSON_RESULT_FILE, TEXT_RESULT_FILE, KEYWORD)
+    print('')
+    print(f'Verifying JSON file, searching for {KEYWORD}:')
+    print(json_entries)
+    print('')
+    print(f'Verifying text file, searching for {KEYWORD}:')
+    print(text_entries) # Again, should find the variant.
+  else:
+    problems = checksum.verify_sampled(JSON_RESULT_FILE, TEXT_RESULT_FILE, dictionary)
+    print('')
+    print(f'Verifying JSON and text files, {checksum.SAMPLE_SIZE} headwords from each.')
+    print(f'Searching the text file for {KEYWORD}:')
+    with reader.TextDictionary(TEXT_RESULT_FILE) as LS_DICTIONARY:
+      print(LS_DICTIONARY[KEYWORD] if KEYWORD in LS_DICTIONARY else [])
+
+  if check_snapshot:
+    # Read as saved, without building the dictionary load_snapshot() returns.
+    print('')
+    print(f'Verifying snapshot, searching for {KEYWORD}:')
+    data = snapshot.read_snapshot()
+    if data is None:
+      problems.append(f'{snapshot.SNAPSHOT_FILE} is missing or unreadable')
+    else:
+      version, sources, headwords, entries, offsets, ids = data
+      found = {'headwords': len(headwords), 'entries': len(entries), 'citations': len(ids)}
+      for filename in (JSON_RESULT_FILE, TEXT_RESULT_FILE):
+        written = checksum.written.get(filename)
+        for name, count in found.items():
+          expected = getattr(written, name, None)
+          if expected is not None and expected != count:
+            problems.append(f'{snapshot.SNAPSHOT_FILE}: {count} {name}, {filename} has {expected}')
+      if KEYWORD in headwords:
+        i = headwords.index(KEYWORD)
+        print([entries[j] for j in ids[offsets[i]:offsets[i + 1]]])
+      else:
+        print([])
 
-print('')
-print('Execution complete.')
+  print('')
+  if problems:
+    print('Verification FAILED:')
+    print('\n'.join(problems))
+  else:
+    print('Outputs verified.')
+  return problems
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description='Identify Lewis and Short headwords and their variations.')
+  parser.add_argument('--input', default=INPUT_FILE, help=f'lewis-short.txt or the Perseus XML (default {INPUT_FILE})')
+  parser.add_argument('--letters', help='only parse these letter sections, e.g. D or D-F')
+  parser.add_argument('--from', dest='low', metavar='HEADWORD', help='only parse entries from this headword on')
+  parser.add_argument('--to', dest='high', metavar='HEADWORD', help='only parse entries up to this headword (or prefix)')
+  parser.add_argument('--memory-budget', type=int, metavar='MB', help='low-memory build: sort the headwords on disk, in runs of about this many megabytes')
+  parser.add_argument('--no-fast-path', action='store_true', help='run every entry through all the rules (see classify())')
+  parser.add_argument('--shards', choices=shard.SCHEMES, help='also cut the outputs into shards, one per letter section or hash bucket (see shard.py)')
+  parser.add_argument('--shard-buckets', type=int, default=shard.BUCKETS, metavar='N', help=f'number of hash buckets for --shards hash (default {shard.BUCKETS})')
+  parser.add_argument('--english-index', action='store_true', help='also index the English definitions, for english.py')
+  parser.add_argument('--verify', choices=['stream', 'sample', 'none'], default='stream', help='check the outputs by reading each once (default), by looking up a sample of headwords, or not at all (see checksum.py)')
+  parser.add_argument('--report', metavar='FILE', help='save wall time, CPU time and peak memory of each stage as JSON')
+  parser.add_argument('--rule-stats', metavar='FILE', help='save per-rule hits, headwords added and time as JSON')
+  parser.add_argument('--cprofile', metavar='FILE', help='save cProfile statistics for the whole run')
+  args = parser.parse_args()
+
+  if args.no_fast_path:
+    FAST_PATH = False
+  if args.english_index:
+    ENGLISH_INDEX = True
+  if args.rule_stats or args.report:
+    RULE_TIMES = True
+  SHARDS = args.shards
+  SHARD_BUCKETS = args.shard_buckets
+
+  if args.report:
+    start_report()
+  if args.cprofile:
+    import cProfile
+    profile = cProfile.Profile()
+    profile.enable()
+
+  letters = parse_letters(args.letters) if args.letters else None
+  headword_range = None
+  if args.low or args.high:
+    headword_range = (args.low or 'a', args.high or 'z')
+
+  memory_budget = args.memory_budget * 1024 * 1024 if args.memory_budget else None
+  build(args.input, letters, headword_range, memory_budget)
+  problems = []
+  if not letters and not headword_range and args.verify != 'none':
+    problems = verify(check_snapshot=not memory_budget, mode=args.verify)
+
+  if args.cprofile:
+    profile.disable()
+    profile.dump_stats(args.cprofile)
+    print(f'Saved profile to {args.cprofile}.')
+  if args.rule_stats:
+    with open(args.rule_stats, 'w') as f:
+      json.dump(g.rule_statistics(), f, indent=4)
+    print(f'Saved rule statistics to {args.rule_stats}.')
+  if args.report:
+    report.write(args.report, input=args.input, families=family_counts, rules=g.rule_statistics())
+    print(f'Saved stage report to {args.report}.')
+
+  print('')
+  print('Execution complete.')
+  if problems:
+    sys.exit(1) # the outputs did not verify; see above
@@ -0,0 +1,84 @@
+#######################################################################################
+#
+# Perseus XML input
+#
+# INPUT: lat.ls.perseus-eng1.xml / Lewis and Short as distributed by Perseus
+# (available at https://github.com/PerseusDL/lexica/).
+#
+# lewis-short.txt is a flattened version of this file: one line per <entryFree>, with
+# each letter of the alphabet introduced by a line holding just that letter. This
+# module produces the same stream directly from the XML, so main.py can run on the
+# upstream file without a separate conversion step:
+#
+#   python main.py --input lat.ls.perseus-eng1.xml
+#
+# Each entry comes with the <orth> forms of its header, i.e. the headword and the
+# variants the XML marks as such, which main.scan() files as headwords alongside what
+# it finds in the text.
+#
+# The file is read with ElementTree.iterparse and every element is discarded as soon
+# as we are done with it, so memory use does not grow with the size of the input.
+#
+#######################################################################################
+
+import xml.etree.ElementTree as ET
+from collections import namedtuple
+
+# letter: the alphabetic section (<div0 type="alphabetic letter" n="A">)
+# key:    the key attribute of the entry, e.g. 'ab'
+# orths:  the text of each <orth> in the entry's header, e.g. ['ăb', 'ā', 'abs'] or
+#         ['dŭcentĭes', '-ĭens']; those in its senses are left out
+# text:   the whole entry on one line, as in lewis-short.txt
+Entry = namedtuple('Entry', 'letter key orths text')
+
+def local_name(tag):
+  # '{http://www.tei-c.org/ns/1.0}entryFree' -> 'entryFree'
+  return tag.rsplit('}', 1)[-1]
+
+def is_letter_division(elem):
+  return local_name(elem.tag).startswith('div') and 'letter' in elem.get('type', '')
+
+def iter_entries(filename, letters=None):
+  # Yields an Entry for each <entryFree> in the file. If letters is given
+  # (a set of upper case section letters), other sections are skipped.
+  letter = ''
+  stack = [] # currently open elements, so finished ones can be removed from their parent
+  in_entry = 0
+
+  for event, elem in ET.iterparse(filename, events=('start', 'end')):
+    tag = local_name(elem.tag)
+    if event == 'start':
+      if is_letter_division(elem):
+        letter = elem.get('n', '').upper()
+      if tag == 'entryFree':
+        in_entry += 1
+      stack.append(elem)
+      continue
+
+    stack.pop()
+    if tag == 'entryFree':
+      in_entry -= 1
+      if not letters or letter in letters:
+        orths = [' '.join(''.join(o.itertext()).split()) for o in elem if local_name(o.tag) == 'orth']
+        text = ' '.join(''.join(elem.itertext()).split())
+        yield Entry(letter, elem.get('key', ''), orths, text)
+    if in_entry:
+      # Still needed by the enclosing entry.
+      continue
+    elem.clear()
+    if stack:
+      stack[-1].remove(elem)
+
+def read_lines(filename, letters=None):
+  # Yields the input for scan() in the lewis-short.txt layout: a single-letter
+  # line at the start of each section, then an Entry for each entry, whose text
+  # is its line. There is no front matter to skip, so pass these to scan() with
+  # start=True.
+  letter = None
+  for entry in iter_entries(filename, letters):
+    if entry.letter != letter:
+      letter = entry.letter
+      if letter:
+        yield letter
+    if entry.text:
+      yield entry
@@ -0,0 +1,163 @@
+#######################################################################################
+#
+# Lazy reader for lewis_short_by_headword.txt
+#
+# INPUT:  lewis_short_by_headword.txt
+# OUTPUT: lewis_short_by_headword.txt.index
+#
+# Reading the text file the usual way means splitting all of it into lines and copying
+# every entry into a list for each of its headwords. TextDictionary instead scans the
+# file once for the position of each entry and which headwords cite it, and saves that
+# as a small index next to the file:
+#
+#   headwords: every headword, in the order they first appear in the file
+#   starts:    array of unsigned ints; the entries of headwords[i] are
+#              ids[starts[i]:starts[i + 1]]
+#   ids:       array of unsigned ints, entry numbers (the n-th entry in the file)
+#   offsets:   array of unsigned long longs, the byte offset of each entry line
+#   lengths:   array of unsigned ints, the byte length of each entry line
+#
+# The index records the size and modification time of the text file, and is rebuilt
+# when they no longer match. The text file itself is memory-mapped, and an entry is
+# only decoded when it is looked up.
+#
+# Usage:
+#
+#   import reader
+#   LS_DICTIONARY = reader.TextDictionary()
+#   LS_DICTIONARY['dŭcentĭens']   # a list of entries, as in the loop in main.py
+#
+#######################################################################################
+
+import marshal
+import mmap
+import os
+from array import array
+from collections.abc import Mapping
+
+TEXT_RESULT_FILE = 'lewis_short_by_headword.txt'
+INDEX_SUFFIX = '.index'
+
+# Increase this whenever the layout above changes.
+INDEX_VERSION = 1
+MAGIC = b'LSIX'
+
+def pairs(filename=TEXT_RESULT_FILE):
+  # Yields (headwords, entry) for each pair of lines in the text file, for
+  # going through all of it once without an index.
+  with open(filename, 'r') as f:
+    headwords = []
+    for line in f:
+      line = line.strip()
+      if line.startswith('#'):
+        headwords = list(dict.fromkeys(line[1:].split(',')))
+      else:
+        yield headwords, line
+
+def build_index(filename):
+  # Scans the text file; returns (headwords, starts, ids, offsets, lengths).
+  postings = {} # headword -> entry numbers
+  offsets = array('Q')
+  lengths = array('I')
+  headwords = []
+  offset = 0
+  with open(filename, 'rb') as f:
+    for raw in f:
+      line = raw.strip()
+      if line.startswith(b'#'):
+        # A headword line; the next line is their entry.
+        headwords = dict.fromkeys(line[1:].decode('utf-8').split(','))
+      else:
+        number = len(offsets)
+        offsets.append(offset)
+        lengths.append(len(raw.rstrip(b'\n')))
+        for headword in headwords:
+          postings.setdefault(headword, []).append(number)
+      offset += len(raw)
+
+  starts = array('I', [0])
+  ids = array('I')
+  for numbers in postings.values():
+    ids.extend(numbers)
+    starts.append(len(ids))
+  return tuple(postings), starts, ids, offsets, lengths
+
+def read_index(index_file, stat):
+  # The saved index, or None if it is missing, unreadable or out of date.
+  try:
+    with open(index_file, 'rb') as f:
+      if f.read(len(MAGIC)) != MAGIC:
+        return None
+      data = marshal.load(f)
+  except (OSError, EOFError, ValueError, TypeError):
+    return None
+  if not isinstance(data, tuple) or len(data) != 8 or data[0] != INDEX_VERSION:
+    return None
+  version, size, mtime, headwords, starts, ids, offsets, lengths = data
+  if size != stat.st_size or mtime != stat.st_mtime_ns:
+    return None
+  return (headwords, array('I', starts), array('I', ids),
+          array('Q', offsets), array('I', lengths))
+
+def save_index(index_file, stat, index):
+  headwords, starts, ids, offsets, lengths = index
+  data = (INDEX_VERSION, stat.st_size, stat.st_mtime_ns, headwords,
+          starts.tobytes(), ids.tobytes(), offsets.tobytes(), lengths.tobytes())
+  temp = index_file + '.tmp'
+  try:
+    with open(temp, 'wb') as f:
+      f.write(MAGIC)
+      marshal.dump(data, f)
+    os.replace(temp, index_file)
+  except OSError:
+    pass # e.g. a read-only directory; the index is rebuilt next time
+
+class TextDictionary(Mapping):
+  # headword -> list of entries, read from the text file on demand.
+  def __init__(self, filename=TEXT_RESULT_FILE, index_file=None):
+    index_file = index_file or filename + INDEX_SUFFIX
+    self.file = open(filename, 'rb')
+    stat = os.fstat(self.file.fileno())
+    index = read_index(index_file, stat)
+    if index is None:
+      index = build_index(filename)
+      save_index(index_file, stat, index)
+    self.headwords, self.starts, self.ids, self.offsets, self.lengths = index
+    self.numbers = {headword: i for i, headword in enumerate(self.headwords)}
+    if stat.st_size:
+      self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+    else:
+      self.data = b'' # an empty file cannot be mapped
+
+  def entry(self, number):
+    # The n-th entry in the file.
+    offset = self.offsets[number]
+    return self.data[offset:offset + self.lengths[number]].decode('utf-8').strip()
+
+  def entry_numbers(self, headword):
+    # The numbers of the entries of headword, for entry().
+    i = self.numbers[headword]
+    return self.ids[self.starts[i]:self.starts[i + 1]].tolist()
+
+  def __getitem__(self, headword):
+    return [self.entry(number) for number in self.entry_numbers(headword)]
+
+  def __contains__(self, headword):
+    return headword in self.numbers
+
+  def __iter__(self):
+    return iter(self.headwords)
+
+  def __len__(self):
+    return len(self.headwords)
+
+  def close(self):
+    if isinstance(self.data, mmap.mmap):
+      self.data.close()
+    self.file.close()
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *exc):
+    self.close()
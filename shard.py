@@ -0,0 +1,319 @@
+#######################################################################################
+#
+# Sharded outputs
+#
+# INPUT:  lewis_short_by_headword.json, lewis_short_by_headword.txt
+# OUTPUT: shards/lewis_short_by_headword.A.json, .A.txt, ... and shards/manifest.json
+#
+#   python main.py --shards letter
+#   python main.py --shards hash --shard-buckets 16
+#   python shard.py --scheme letter --input lewis-short.txt
+#
+# A consumer that only needs one letter or one headword should not have to load or
+# scan the whole dictionary. split() cuts both outputs into shards:
+#
+#   letter: one shard per section of the input (lewis-short.txt or the XML), as
+#           scan() prints them: the text shard holds the entries read in that
+#           section, and the JSON shard each headword with those of its entries.
+#           A headword whose entries are in more than one section is in each of
+#           their shards.
+#   hash:   a fixed number of shards of about the same size, by a hash of the
+#           headword without accents (so ăb and ab always share a shard).
+#
+# Each shard is in the same format as the output it was cut from, so reader.py and
+# compare.py work on it. For the hash scheme, the JSON shard has the headwords of the
+# shard in the same order with all their entries, and the text shard has every entry
+# cited by one of them, with only those headwords on its # line.
+#
+# Each output is read once, noting only where the lines of each shard are; the shards
+# are then written one after another by copying those lines. manifest.json then lists
+# them, with the size and sha256 of each file as written:
+#
+#   {"version": 2, "scheme": "letter", "buckets": null,
+#    "shards": [{"key": "A", "first": "a", "last": "azymus", "initials": "A",
+#                "headwords": 2123, "citations": 2210, "entries": 2046,
+#                "json": {"file": "lewis_short_by_headword.A.json",
+#                         "size": 1234567, "sha256": "..."},
+#                "text": {...}}, ...]}
+#
+# where first and last are the range of its headwords without accents, and initials
+# the letters they start with (as shard_key() gives them); a lookup reads every shard
+# with the headword's initial. A shard can be checked against its
+# size and sha256 before it is used, or shipped on its own.
+#
+# Usage:
+#
+#   import shard
+#   manifest = shard.Manifest()
+#   shard.lookup(manifest, 'dŭcentĭens') # reads only the shards with D headwords
+#
+#######################################################################################
+
+import argparse
+import hashlib
+import json
+import os
+import re
+from array import array
+
+import reader
+from alphabet import normalize, SECTION_ALIASES
+
+JSON_RESULT_FILE = 'lewis_short_by_headword.json'
+TEXT_RESULT_FILE = 'lewis_short_by_headword.txt'
+SHARD_DIRECTORY = 'shards'
+MANIFEST_FILE = 'manifest.json'
+
+# Increase this whenever the layout changes.
+MANIFEST_VERSION = 2
+
+SCHEMES = ('letter', 'hash')
+BUCKETS = 16
+
+FIRST_WORD = re.compile('[^\s,]*')
+
+def normalized(headword):
+  # A headword without accents, for choosing its shard.
+  return normalize(headword).replace('-', '')
+
+def shard_key(headword, scheme=SCHEMES[0], buckets=BUCKETS):
+  # The key of the shard that holds headword: its hash bucket, or for the
+  # letter scheme the section its first letter would be filed under.
+  word = normalized(headword)
+  if scheme == 'hash':
+    bucket = int.from_bytes(hashlib.blake2b(word.encode(), digest_size=8).digest(), 'little') % buckets
+    return f'{bucket:0{len(str(buckets - 1))}d}'
+  letter = word[:1].upper()
+  letter = SECTION_ALIASES.get(letter, letter)
+  return letter if 'A' <= letter <= 'Z' else '_' # digits, Greek
+
+def shard_name(filename, key):
+  # lewis_short_by_headword.json -> lewis_short_by_headword.A.json
+  root, ext = os.path.splitext(os.path.basename(filename))
+  return f'{root}.{key}{ext}'
+
+def entry_digest(entry):
+  return hashlib.blake2b(entry.encode(), digest_size=8).digest()
+
+class Sections():
+  # entry -> the letter section of the input it was read from, as main.scan()
+  # notes them. Kept by digest, so it costs the same however long the entries.
+  def __init__(self):
+    self.letters = {}
+
+  def add(self, entry, letter):
+    self.letters[entry_digest(entry)] = letter
+
+  def __call__(self, entry):
+    return self.letters.get(entry_digest(entry), '_')
+
+class ShardFile():
+  # A shard being written; keeps its size and sha256 as it goes.
+  def __init__(self, filename):
+    self.file = open(filename, 'wb')
+    self.name = os.path.basename(filename)
+    self.hash = hashlib.sha256()
+    self.size = 0
+
+  def write(self, data):
+    self.file.write(data)
+    self.hash.update(data)
+    self.size += len(data)
+
+  def close(self):
+    self.file.close()
+    return {'file': self.name, 'size': self.size, 'sha256': self.hash.hexdigest()}
+
+def index_json(filename, keys_of):
+  # Goes through a JSON output once; returns key -> array of (headword line
+  # offset, headword line length, entry line offset, entry line length) for
+  # each citation in that shard. keys_of(headword, entry) gives the shard of a
+  # citation. Relies on the layout of json.dump(..., indent=4), as compare.py.
+  citations = {}
+  headword = None
+  offset = 0
+  with open(filename, 'rb') as f:
+    for raw in f:
+      line = raw.strip()
+      if line.startswith(b'"'):
+        if line.endswith(b'['):
+          headword = (offset, len(raw), json.loads(line[:-1].rstrip()[:-1]))
+        elif not line.endswith((b'[]', b'[],')) and headword is not None:
+          key = keys_of(headword[2], json.loads(line.rstrip(b',')))
+          citations.setdefault(key, array('Q')).extend((headword[0], headword[1], offset, len(raw)))
+      offset += len(raw)
+  return citations
+
+def index_text(filename, keys_of):
+  # The same for a text output: key -> array of (offset, length) of each pair
+  # of lines with an entry in that shard. keys_of(headwords, entry) gives the
+  # shards of an entry.
+  entries = {}
+  offset = 0
+  start = 0
+  headwords = []
+  with open(filename, 'rb') as f:
+    for raw in f:
+      if raw.startswith(b'#'):
+        start = offset
+        headwords = list(dict.fromkeys(raw[1:].decode('utf-8').strip().split(',')))
+      else:
+        for key in keys_of(headwords, raw.decode('utf-8').strip()):
+          entries.setdefault(key, array('Q')).extend((start, offset + len(raw) - start))
+      offset += len(raw)
+  return entries
+
+def write_json_shard(source, filename, citations):
+  # Copies the citations of one shard out of the JSON output; returns (file
+  # record, headwords, citations, first, last, initials).
+  shard = ShardFile(filename)
+  count = 0
+  first = last = None
+  initials = set()
+  current = None
+  shard.write(b'{')
+  for i in range(0, len(citations), 4):
+    headword_offset, headword_length, offset, length = citations[i:i + 4]
+    if headword_offset != current:
+      # Laid out as json.dump(..., indent=4) would, as in spill.py.
+      source.seek(headword_offset)
+      line = source.read(headword_length).strip()
+      if current is not None:
+        shard.write(b'\n    ],')
+      shard.write(b'\n    ' + line + b'\n        ')
+      current = headword_offset
+      count += 1
+      headword = json.loads(line[:-1].rstrip()[:-1])
+      initials.add(shard_key(headword))
+      word = normalized(headword)
+      first = word if first is None else min(first, word)
+      last = word if last is None else max(last, word)
+    else:
+      shard.write(b',\n        ')
+    source.seek(offset)
+    shard.write(source.read(length).strip().rstrip(b','))
+  shard.write(b'\n    ]\n}' if count else b'}')
+  return shard.close(), count, len(citations) // 4, first, last, ''.join(sorted(initials))
+
+def write_text_shard(source, filename, entries, headwords_of):
+  # Copies the entries of one shard out of the text output, each with the
+  # headwords headwords_of() keeps; returns (file record, entries).
+  shard = ShardFile(filename)
+  for i in range(0, len(entries), 2):
+    offset, length = entries[i:i + 2]
+    source.seek(offset)
+    names, entry = source.read(length).decode('utf-8').split('\n', 1)
+    shard.write(f'#{",".join(headwords_of(names[1:].split(","), entry.strip()))}\n{entry.strip()}\n'.encode('utf-8'))
+  return shard.close(), len(entries) // 2
+
+def split(json_filename=JSON_RESULT_FILE, text_filename=TEXT_RESULT_FILE,
+          directory=SHARD_DIRECTORY, scheme=SCHEMES[0], buckets=BUCKETS, sections=None):
+  # Cuts both outputs into shards and writes the manifest; returns the number
+  # of shards. For the letter scheme, sections(entry) gives the section an
+  # entry was read from (a Sections, or see main.read_entry_sections()); without
+  # it, the section its first word would be filed under.
+  if scheme not in SCHEMES:
+    raise ValueError(f'unknown shard scheme {scheme!r}')
+  os.makedirs(directory, exist_ok=True)
+  if scheme == 'hash':
+    key_of = lambda headword: shard_key(headword, scheme, buckets)
+    json_keys = lambda headword, entry: key_of(headword)
+    text_keys = lambda headwords, entry: dict.fromkeys(map(key_of, headwords))
+    headwords_in = lambda key: lambda headwords, entry: [h for h in headwords if key_of(h) == key]
+  else:
+    section_of = sections or (lambda entry: shard_key(FIRST_WORD.match(entry).group()))
+    json_keys = lambda headword, entry: section_of(entry)
+    text_keys = lambda headwords, entry: (section_of(entry),)
+    headwords_in = lambda key: lambda headwords, entry: headwords
+
+  # Only where each shard's lines are is kept; the shards are then written one
+  # after another by copying them.
+  json_citations = index_json(json_filename, json_keys)
+  text_entries = index_text(text_filename, text_keys)
+
+  shards = []
+  with open(json_filename, 'rb') as json_source, open(text_filename, 'rb') as text_source:
+    for key in sorted(json_citations.keys() | text_entries.keys()):
+      json_file, headwords, citations, first, last, initials = None, 0, 0, None, None, ''
+      if key in json_citations:
+        json_file, headwords, citations, first, last, initials = write_json_shard(
+          json_source, os.path.join(directory, shard_name(json_filename, key)), json_citations.pop(key))
+      text_file, entries = None, 0
+      if key in text_entries:
+        text_file, entries = write_text_shard(
+          text_source, os.path.join(directory, shard_name(text_filename, key)), text_entries.pop(key), headwords_in(key))
+      shards.append({'key': key, 'first': first, 'last': last, 'initials': initials, 'headwords': headwords,
+                     'citations': citations, 'entries': entries,
+                     'json': json_file, 'text': text_file})
+  manifest = {'version': MANIFEST_VERSION, 'scheme': scheme,
+              'buckets': buckets if scheme == 'hash' else None, 'shards': shards}
+  filename = os.path.join(directory, MANIFEST_FILE)
+  temp = filename + '.tmp'
+  with open(temp, 'w') as f:
+    json.dump(manifest, f, indent=4, ensure_ascii=False)
+  os.replace(temp, filename)
+  return len(shards)
+
+class Manifest():
+  def __init__(self, filename=os.path.join(SHARD_DIRECTORY, MANIFEST_FILE)):
+    with open(filename, 'r') as f:
+      manifest = json.load(f)
+    if manifest.get('version') != MANIFEST_VERSION:
+      raise ValueError(f'{filename} was written by another version of shard.py.')
+    self.directory = os.path.dirname(filename)
+    self.scheme = manifest['scheme']
+    self.buckets = manifest['buckets']
+    self.shards = {shard['key']: shard for shard in manifest['shards']}
+
+  def shards_of(self, headword):
+    # The manifest records of the shards that may hold headword. A letter
+    # shard holds the entries of one section of the input, and a headword's
+    # entries are not always all in the section of its first letter, so that
+    # is every shard with a headword of the same initial.
+    if self.scheme == 'hash':
+      shard = self.shards.get(shard_key(headword, self.scheme, self.buckets))
+      return [shard] if shard else []
+    initial = shard_key(headword)
+    return [shard for shard in self.shards.values() if initial in shard['initials']]
+
+  def path(self, shard, output='text'):
+    # Where the JSON or text file of a shard is.
+    return os.path.join(self.directory, shard[output]['file'])
+
+  def check(self, shard, output='text'):
+    # True if the file of a shard has the size and sha256 the manifest gives.
+    filename = self.path(shard, output)
+    if os.path.getsize(filename) != shard[output]['size']:
+      return False
+    h = hashlib.sha256()
+    with open(filename, 'rb') as f:
+      for block in iter(lambda: f.read(1 << 20), b''):
+        h.update(block)
+    return h.hexdigest() == shard[output]['sha256']
+
+def lookup(manifest, headword):
+  # The entries of headword, read from the text shards that may hold it only.
+  entries = []
+  for shard in manifest.shards_of(headword):
+    if shard['text'] is not None:
+      with reader.TextDictionary(manifest.path(shard)) as dictionary:
+        if headword in dictionary:
+          entries += dictionary[headword]
+  return entries
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description='Cut the outputs of main.py into shards, with a manifest.')
+  parser.add_argument('--json', default=JSON_RESULT_FILE, help=f'JSON output of main.py (default {JSON_RESULT_FILE})')
+  parser.add_argument('--text', default=TEXT_RESULT_FILE, help=f'text output of main.py (default {TEXT_RESULT_FILE})')
+  parser.add_argument('--output', default=SHARD_DIRECTORY, help=f'directory for the shards (default {SHARD_DIRECTORY})')
+  parser.add_argument('--scheme', choices=SCHEMES, default=SCHEMES[0], help='one shard per letter section, or per hash bucket')
+  parser.add_argument('--buckets', type=int, default=BUCKETS, help=f'number of hash buckets (default {BUCKETS})')
+  parser.add_argument('--input', help='lewis-short.txt or the Perseus XML the outputs were built from, for the section of each entry (letter scheme; by default, the section of its first word)')
+  args = parser.parse_args()
+
+  sections = None
+  if args.input and args.scheme == 'letter':
+    import main
+    sections = main.read_entry_sections(args.input)
+  count = split(args.json, args.text, args.output, args.scheme, args.buckets, sections)
+  print(f'Saved {count} shards to {args.output}, listed in {os.path.join(args.output, MANIFEST_FILE)}.')
@@ -0,0 +1,166 @@
+#######################################################################################
+#
+# Snapshot of the built headword index.
+#
+# OUTPUT: lewis_short_by_headword.snapshot
+#
+# Loading lewis_short_by_headword.json means parsing a very large JSON document in
+# which every entry is repeated once for each of its headwords. The snapshot saves the
+# same headword -> entries mapping as compact arrays in marshal format:
+#
+#   headwords: every headword, in the same order as the JSON file
+#   entries:   every dictionary entry once, in the same order as the text file
+#   offsets:   array of unsigned ints; the entries of headwords[i] are
+#              ids[offsets[i]:offsets[i + 1]]
+#   ids:       array of unsigned ints, indexes into entries
+#
+# The file also records a format version, and the size, modification time and sha256
+# of the input text and of the parser (main.py, lexer.py, perseus.py, alphabet.py and
+# folding.py). load_snapshot() only hashes a file again if its size or time has
+# changed. A snapshot that no longer matches is rebuilt by the builder the caller
+# passes (main.build), or refused if there is none: loading should not rewrite every
+# output unless asked to. It does not turn the arrays into lists: the Snapshot it
+# returns looks up the entries of a headword when asked for them.
+#
+# Usage:
+#
+#   import snapshot
+#   LS_DICTIONARY = snapshot.load_snapshot()
+#   LS_DICTIONARY['dŭcentĭens']
+#
+#######################################################################################
+
+import hashlib
+import marshal
+import os
+from array import array
+from collections.abc import Mapping
+
+INPUT_FILE = 'lewis-short.txt'
+SNAPSHOT_FILE = 'lewis_short_by_headword.snapshot'
+
+# Increase this whenever the layout below changes.
+SNAPSHOT_VERSION = 2
+MAGIC = b'LSHW'
+
+PARSER_FILES = [os.path.join(os.path.dirname(os.path.abspath(__file__)), name)
+                for name in ('main.py', 'lexer.py', 'perseus.py', 'alphabet.py', 'folding.py')]
+
+def file_hash(filename):
+  h = hashlib.sha256()
+  with open(filename, 'rb') as f:
+    for block in iter(lambda: f.read(1 << 20), b''):
+      h.update(block)
+  return h.hexdigest()
+
+def sources(input_file=INPUT_FILE):
+  # (size, mtime, sha256) of the input text and of each parser file, so that
+  # either a new lewis-short.txt or a change to the rules makes old snapshots
+  # stale.
+  result = []
+  for filename in [input_file] + PARSER_FILES:
+    stat = os.stat(filename)
+    result.append((stat.st_size, stat.st_mtime_ns, file_hash(filename)))
+  return tuple(result)
+
+def save_snapshot(dictionary, sources, filename=SNAPSHOT_FILE):
+  # dictionary is main.dictionary: headword -> {entry: ''}
+  entry_ids = {}
+  headwords = []
+  offsets = array('I', [0])
+  ids = array('I')
+  for headword, values in dictionary.items():
+    headwords.append(headword)
+    for entry in values:
+      ids.append(entry_ids.setdefault(entry, len(entry_ids)))
+    offsets.append(len(ids))
+
+  data = (SNAPSHOT_VERSION, sources, tuple(headwords), tuple(entry_ids),
+          offsets.tobytes(), ids.tobytes())
+
+  # Write to a temporary file first so a reader never sees half a snapshot.
+  temp = filename + '.tmp'
+  with open(temp, 'wb') as f:
+    f.write(MAGIC)
+    marshal.dump(data, f)
+  os.replace(temp, filename)
+
+def read_snapshot(filename=SNAPSHOT_FILE):
+  # Returns (version, sources, headwords, entries, offsets, ids), or None if
+  # the file is missing or unreadable (e.g. written by another Python version).
+  try:
+    with open(filename, 'rb') as f:
+      if f.read(len(MAGIC)) != MAGIC:
+        return None
+      data = marshal.load(f)
+  except (OSError, EOFError, ValueError, TypeError):
+    return None
+  if not isinstance(data, tuple) or len(data) != 6 or data[0] != SNAPSHOT_VERSION:
+    return None
+  version, sources, headwords, entries, offsets, ids = data
+  return version, sources, headwords, entries, array('I', offsets), array('I', ids)
+
+def is_stale(data, input_file=INPUT_FILE, missing_ok=False):
+  # True if the input or the parser has changed since the snapshot was saved.
+  # A file whose size and modification time are as recorded is not read. A
+  # missing input file (e.g. a snapshot built from the Perseus XML, checked
+  # against lewis-short.txt) makes it stale, unless missing_ok.
+  if data is None:
+    return True
+  recorded = data[1]
+  for filename, (size, mtime, sha256) in zip([input_file] + PARSER_FILES, recorded):
+    try:
+      stat = os.stat(filename)
+    except OSError:
+      if missing_ok:
+        continue # nothing to compare against; trust the snapshot
+      return True
+    if (stat.st_size, stat.st_mtime_ns) == (size, mtime):
+      continue
+    if stat.st_size != size or file_hash(filename) != sha256:
+      return True
+  return False
+
+class Snapshot(Mapping):
+  # headword -> list of entries, in the order of the JSON file.
+  def __init__(self, headwords, entries, offsets, ids):
+    self.headwords = headwords
+    self.entries = entries
+    self.offsets = offsets
+    self.ids = ids
+    self.numbers = {headword: i for i, headword in enumerate(headwords)}
+
+  def __getitem__(self, headword):
+    i = self.numbers[headword]
+    entries = self.entries
+    return [entries[j] for j in self.ids[self.offsets[i]:self.offsets[i + 1]]]
+
+  def __contains__(self, headword):
+    return headword in self.numbers
+
+  def __iter__(self):
+    return iter(self.headwords)
+
+  def __len__(self):
+    return len(self.headwords)
+
+def load_snapshot(filename=SNAPSHOT_FILE, input_file=INPUT_FILE, rebuild=None, check=True, missing_ok=False):
+  # Returns a Snapshot, shaped like lewis_short_by_headword.json. If the
+  # snapshot is missing, of another format version, or out of date, it is
+  # rebuilt with rebuild(input_file) when a builder is given, e.g.
+  #   snapshot.load_snapshot(rebuild=main.build)
+  # which runs the whole build (and so rewrites every output). Without one,
+  # FileNotFoundError or ValueError is raised instead. check=False trusts any
+  # snapshot there is; missing_ok trusts it when input_file is not there.
+  data = read_snapshot(filename)
+  stale = data is None or (check and is_stale(data, input_file, missing_ok))
+  if stale and rebuild is not None:
+    rebuild(input_file)
+    data = read_snapshot(filename)
+    stale = data is None
+  if data is None:
+    raise FileNotFoundError(f'No usable snapshot in {filename}; run python main.py to build one.')
+  if stale:
+    raise ValueError(f'{filename} is out of date with {input_file} or the parser; run python main.py to rebuild it.')
+  version, sources, headwords, entries, offsets, ids = data
+  return Snapshot(headwords, entries, offsets, ids)
@@ -0,0 +1,219 @@
+#######################################################################################
+#
+# Low-memory build
+#
+#   python main.py --memory-budget 64
+#
+# A normal build keeps every headword -> entry pair in main.dictionary, then makes a
+# full copy of it for the JSON file and an inverted one for the text file. With a
+# memory budget, add() hands each pair to a HeadwordSpill instead. Entry texts are
+# appended to a temporary file as they are parsed, and each pair becomes a small
+# record that points into it:
+#
+#   (headword, sequence number, entry digest, offset, length)
+#
+# The records are sorted on disk in runs that fit the budget, then merged. Both
+# outputs come out of a few such sorts, in exactly the order a normal build writes
+# them:
+#
+#   1. by headword: the first sequence number of each headword gives its place in
+#      the JSON file; repeated pairs (the same entry text twice) are dropped here
+#   2. by (headword place, sequence number): the JSON file, written as it streams
+#   3. by entry digest: the headwords of each entry, in JSON order
+#   4. by the place an entry is first cited: the text file
+#
+# Only the sort buffers and one entry at a time are held in memory, whatever the size
+# of the input.
+#
+#######################################################################################
+
+import hashlib
+import heapq
+import itertools
+import json
+import marshal
+import os
+import shutil
+import tempfile
+from operator import itemgetter
+
+import checksum
+
+# Rough size in memory of one sort record (a tuple of a headword, a digest and a
+# few ints), used to turn the budget into a number of records per run.
+RECORD_SIZE = 400
+MINIMUM_RUN = 1000
+
+# Records are written to run files in blocks of this many, and at most this many
+# runs are merged at once; more runs are first merged into fewer, longer ones.
+BLOCK_SIZE = 1024
+MERGE_WIDTH = 16
+
+def write_run(directory, records):
+  # Saves sorted records to a new run file and returns its name.
+  fd, filename = tempfile.mkstemp(suffix='.run', dir=directory)
+  with open(fd, 'wb') as f:
+    block = []
+    for record in records:
+      block.append(record)
+      if len(block) == BLOCK_SIZE:
+        marshal.dump(block, f)
+        block = []
+    if block:
+      marshal.dump(block, f)
+  return filename
+
+def read_run(filename):
+  # Yields the records of a run file, then deletes it.
+  try:
+    with open(filename, 'rb') as f:
+      while True:
+        try:
+          block = marshal.load(f)
+        except EOFError:
+          break
+        yield from block
+  finally:
+    os.remove(filename)
+
+class ExternalSort():
+  # Sorts tuples that may not all fit in memory: add() them all, then iterate
+  # over sorted() once.
+  def __init__(self, directory, run_length):
+    self.directory = directory
+    self.run_length = run_length
+    self.records = []
+    self.runs = []
+
+  def add(self, record):
+    self.records.append(record)
+    if len(self.records) >= self.run_length:
+      self.spill()
+
+  def spill(self):
+    self.records.sort()
+    self.runs.append(write_run(self.directory, self.records))
+    self.records = []
+
+  def sorted(self):
+    if not self.runs:
+      # It all fitted; no need to go to disk.
+      records, self.records = self.records, []
+      records.sort()
+      yield from records
+      return
+    if self.records:
+      self.spill()
+    runs, self.runs = self.runs, []
+    while len(runs) > MERGE_WIDTH:
+      runs = [write_run(self.directory, heapq.merge(*map(read_run, runs[i:i + MERGE_WIDTH])))
+              for i in range(0, len(runs), MERGE_WIDTH)]
+    yield from heapq.merge(*map(read_run, runs))
+
+class HeadwordSpill():
+  # Collects the headword -> entry pairs of a build on disk; see above.
+  def __init__(self, budget, directory=None):
+    # budget is in bytes. Two sorts are filled or drained at the same time
+    # while the outputs are written, so each gets half.
+    self.directory = tempfile.mkdtemp(prefix='ls-spill-', dir=directory)
+    self.run_length = max(MINIMUM_RUN, budget // 2 // RECORD_SIZE)
+    self.pairs = ExternalSort(self.directory, self.run_length)
+    self.entries = open(os.path.join(self.directory, 'entries'), 'w+b')
+    self.size = 0 # of the entries file
+    self.sequence = 0
+
+    # The entry being parsed.
+    self.entry = None
+    self.digest = None
+    self.offset = 0
+    self.length = 0
+    self.headwords = set()
+
+  def add(self, headword, entry):
+    # Records one pair. Returns False if the entry already has this headword.
+    if entry != self.entry:
+      data = entry.encode()
+      self.entries.write(data)
+      self.entry = entry
+      self.digest = hashlib.blake2b(data, digest_size=16).digest()
+      self.offset = self.size
+      self.length = len(data)
+      self.size += len(data)
+      self.headwords = set()
+    if headword in self.headwords:
+      return False
+    self.headwords.add(headword)
+    self.pairs.add((headword, self.sequence, self.digest, self.offset, self.length))
+    self.sequence += 1
+    return True
+
+  def entry_text(self, offset, length):
+    self.entries.seek(offset)
+    return self.entries.read(length).decode()
+
+  def write(self, json_filename, text_filename):
+    # Writes both outputs, in the same format and order as write_json() and
+    # write_text() in main.py. Returns the number of headwords and citations.
+    self.entries.flush()
+    self.entry = None
+
+    # 1. Place each headword by its first pair.
+    by_place = ExternalSort(self.directory, self.run_length)
+    headwords = 0
+    for headword, pairs in itertools.groupby(self.pairs.sorted(), key=itemgetter(0)):
+      headwords += 1
+      place = None
+      digests = set()
+      for headword, sequence, digest, offset, length in pairs:
+        if digest in digests:
+          continue
+        digests.add(digest)
+        if place is None:
+          place = sequence
+        by_place.add((place, sequence, headword, digest, offset, length))
+
+    # 2. The JSON file, laid out as json.dump(..., indent=4) would.
+    by_entry = ExternalSort(self.directory, self.run_length)
+    citations = 0
+    with checksum.open_output(json_filename) as f:
+      f.write('{')
+      current = None
+      for place, sequence, headword, digest, offset, length in by_place.sorted():
+        value = json.dumps(self.entry_text(offset, length))
+        if place != current:
+          if current is not None:
+            f.write('\n    ],')
+          f.write(f'\n    {json.dumps(headword)}: [\n        {value}')
+          current = place
+        else:
+          f.write(f',\n        {value}')
+        citations += 1
+        by_entry.add((digest, place, sequence, headword, offset, length))
+      f.write('\n    ]\n}' if current is not None else '}')
+    checksum.written[json_filename].headwords = headwords
+    checksum.written[json_filename].citations = citations
+    print(f'Saved to {json_filename}.')
+
+    # 3. Gather the headwords of each entry; it goes where it is first cited.
+    by_citation = ExternalSort(self.directory, self.run_length)
+    for digest, pairs in itertools.groupby(by_entry.sorted(), key=itemgetter(0)):
+      pairs = list(pairs) # one entry's headwords
+      digest, place, sequence, headword, offset, length = pairs[0]
+      by_citation.add((place, sequence, ','.join(pair[3] for pair in pairs), offset, length))
+
+    # 4. The text file.
+    entries = 0
+    with checksum.open_output(text_filename) as f:
+      for place, sequence, headwords_of_entry, offset, length in by_citation.sorted():
+        f.write(f'#{headwords_of_entry}\n{self.entry_text(offset, length)}\n')
+        entries += 1
+    checksum.written[text_filename].entries = entries
+    checksum.written[text_filename].citations = citations
+    print(f'Saved to {text_filename}.')
+
+    return headwords, citations
+
+  def close(self):
+    # Removes the temporary files.
+    self.entries.close()
+    shutil.rmtree(self.directory, ignore_errors=True)
@@ -0,0 +1,79 @@
+# The outputs pass verification as written, and a changed or truncated file is
+# caught by the streaming check; the sampled one catches what it samples.
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import checksum
+
+# headword -> entries, as main.dictionary
+DICTIONARY = {'ăb': ['ăb, ā, abs, prep. with abl., from'],
+              'ā': ['ăb, ā, abs, prep. with abl., from', 'ā, interj., ah!'],
+              'abs': ['ăb, ā, abs, prep. with abl., from'],
+              'dŭcentĭens': ['dŭcentĭes or -ĭens, adv., two hundred times']}
+
+@pytest.fixture
+def outputs(tmp_path, monkeypatch):
+  monkeypatch.chdir(tmp_path) # Guess writes to results/
+  (tmp_path / 'results').mkdir()
+  import main
+  monkeypatch.setattr(main, 'dictionary', {headword: dict.fromkeys(entries, '') for headword, entries in DICTIONARY.items()})
+  monkeypatch.setattr(checksum, 'written', {})
+  json_filename, text_filename = str(tmp_path / 'out.json'), str(tmp_path / 'out.txt')
+  main.write_json(json_filename)
+  main.write_text(text_filename)
+  return json_filename, text_filename
+
+def corrupt(filename, old, new):
+  # Replaces old with new in a file, in place.
+  with open(filename, 'rb') as f:
+    data = f.read()
+  assert old in data
+  with open(filename, 'wb') as f:
+    f.write(data.replace(old, new, 1))
+
+def test_written(outputs):
+  json_filename, text_filename = outputs
+  for filename in outputs:
+    assert checksum.written[filename].size == os.path.getsize(filename)
+  assert checksum.written[json_filename].headwords == 4
+  assert checksum.written[text_filename].entries == 3
+  assert checksum.written[json_filename].citations == checksum.written[text_filename].citations == 5
+
+def test_verify_as_written(outputs):
+  problems, json_entries, text_entries = checksum.verify_streaming(*outputs, 'dŭcentĭens')
+  assert problems == []
+  assert json_entries == text_entries == DICTIONARY['dŭcentĭens']
+  assert checksum.verify_sampled(*outputs, DICTIONARY, seed=0) == []
+
+@pytest.mark.parametrize('which', [0, 1])
+def test_changed_byte(outputs, which):
+  # The same size, so only the hash tells.
+  corrupt(outputs[which], b'from', b'frum')
+  problems, json_entries, text_entries = checksum.verify_streaming(*outputs)
+  assert len(problems) == 1 and 'sha256' in problems[0] and outputs[which] in problems[0]
+  # With this few headwords, a hundred samples take in every one.
+  problems = checksum.verify_sampled(*outputs, DICTIONARY, seed=0)
+  assert problems and all('do not match' in problem and outputs[which] in problem for problem in problems)
+
+def test_truncated(outputs):
+  json_filename, text_filename = outputs
+  with open(text_filename, 'rb+') as f:
+    f.truncate(os.path.getsize(text_filename) - len('ā, interj., ah!\n'.encode()))
+  problems, json_entries, text_entries = checksum.verify_streaming(*outputs)
+  assert any(problem.startswith(f'{text_filename}: size') for problem in problems)
+  assert any(problem.startswith(f'{text_filename}: sha256') for problem in problems)
+  assert checksum.verify_sampled(*outputs, DICTIONARY) == [
+    f'{text_filename}: size {os.path.getsize(text_filename)} does not match the {checksum.written[text_filename].size} written']
+
+def test_lost_citation(outputs):
+  # A headword dropped from the text file: it no longer agrees with the JSON file.
+  json_filename, text_filename = outputs
+  corrupt(text_filename, b'#\xc4\x83b,\xc4\x81,abs\n', b'#\xc4\x83b,\xc4\x81\n')
+  checksum.written.clear() # as for outputs from an earlier run
+  problems, json_entries, text_entries = checksum.verify_streaming(*outputs)
+  assert problems == [f'{json_filename} has 4 headwords and 5 citations, {text_filename} 3 and 4']
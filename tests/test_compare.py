@@ -0,0 +1,82 @@
+# Fingerprints of the same build, from its JSON or its text output, compare equal;
+# lost and gained citations, changed entries and new headwords are reported.
+
+import io
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import compare
+import spill
+
+def build(n=120):
+  # headword -> entries, as main.dictionary: some entries under several headwords.
+  dictionary = {}
+  for i in range(n):
+    entry = f'vŏcābŭlum{i}, i, n., a word: Cic.'
+    dictionary.setdefault(f'vŏcābŭlum{i}', []).append(entry)
+    if i % 3 == 0:
+      dictionary.setdefault(f'vōx{i % 7}', []).append(entry)
+  return dictionary
+
+def write_json(filename, dictionary):
+  # As main.write_json().
+  with open(filename, 'w') as f:
+    json.dump(dictionary, f, indent=4)
+
+def write_text(filename, dictionary):
+  # As main.write_text().
+  inverted = {}
+  for headword, entries in dictionary.items():
+    for entry in entries:
+      inverted.setdefault(entry, []).append(headword)
+  with open(filename, 'w') as f:
+    for entry, headwords in inverted.items():
+      f.write(f'#{",".join(headwords)}\n{entry}\n')
+
+def fingerprint(tmp_path, name, dictionary, write=write_json):
+  filename = str(tmp_path / name)
+  write(filename, dictionary)
+  # No budget to speak of: the sorts are cut into runs of spill.MINIMUM_RUN.
+  compare.save_fingerprint(filename, filename + '.fingerprint', memory_budget=0)
+  return compare.Fingerprint(filename + '.fingerprint')
+
+@pytest.mark.parametrize('run, width', [(1000, 16), (4, 2)])
+def test_identical_builds(tmp_path, monkeypatch, run, width):
+  monkeypatch.setattr(spill, 'MINIMUM_RUN', run)
+  monkeypatch.setattr(spill, 'MERGE_WIDTH', width)
+  dictionary = build()
+  old = fingerprint(tmp_path, 'old.json', dictionary)
+  new = fingerprint(tmp_path, 'new.txt', dictionary, write_text)
+  out = io.StringIO()
+  counts = compare.compare(old, new, out)
+  assert not any(counts.values())
+  assert out.getvalue() == ''
+  assert len(list(new.headwords())) == len(dictionary)
+
+def test_differences(tmp_path):
+  old = build()
+  new = build()
+  new['vōx0'].remove('vŏcābŭlum0, i, n., a word: Cic.') # a citation lost
+  new.setdefault('nōmen', []).append('vŏcābŭlum1, i, n., a word: Cic.') # a headword gained
+  new['vŏcābŭlum2'] = ['vŏcābŭlum2, i, n., a name: Cic.'] # an entry changed
+  out = io.StringIO()
+  counts = compare.compare(fingerprint(tmp_path, 'old.json', old), fingerprint(tmp_path, 'new.json', new), out)
+  assert counts == {'entries removed': 1, 'entries added': 1, 'entries changed': 2,
+                    'citations removed': 2, 'citations added': 2,
+                    'headwords removed': 0, 'headwords added': 1}
+  report = out.getvalue().splitlines()
+  assert '    - vōx0' in report
+  assert 'Headwords added: nōmen' in report
+
+def test_not_a_fingerprint(tmp_path):
+  filename = tmp_path / 'old.fingerprint'
+  filename.write_bytes(b'{}')
+  with pytest.raises(ValueError):
+    compare.Fingerprint(str(filename))
+  with pytest.raises(ValueError):
+    compare.open_fingerprint(str(filename), str(tmp_path))
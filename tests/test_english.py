@@ -0,0 +1,54 @@
+# Postings survive their LEB128 encoding, and a search finds the entries whose
+# definitions hold every word of the query.
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import english
+import reader
+
+@pytest.mark.parametrize('numbers', [[], [0], [0, 1, 2], [127], [128], [5, 300, 16384, 2**32 - 1],
+                                     list(range(0, 100000, 977))])
+def test_encode_decode(numbers):
+  assert english.decode(english.encode(numbers)) == numbers
+
+def test_encoding():
+  # Differences, seven bits to a byte, low bits first.
+  assert english.encode([1, 3, 131]) == bytes([1, 2, 0x80, 0x01])
+
+def test_terms():
+  text = 'to plough again, Cic. Off. 1, 2; adj. Ἀλκμαίων ărātro the ploughman'
+  assert list(english.terms(text)) == ['plough', 'again', 'ploughman']
+
+TEXT = '''#ărātro
+ărātro, āre, v. a., to plough again: Cato, R. R. 5, 4.
+#ăro
+ăro, āvi, ātum, 1, v. a., to plough, till: Cic.
+#ăbăcus
+ăbăcus, i, m., a table for counting: Cic.
+'''
+
+@pytest.fixture
+def index(tmp_path):
+  text_filename = str(tmp_path / 'lewis_short_by_headword.txt')
+  with open(text_filename, 'w') as f:
+    f.write(TEXT)
+  filename = str(tmp_path / 'lewis_short_by_headword.english')
+  english.build_english_index(text_filename, filename)
+  return text_filename, english.EnglishIndex(filename)
+
+def test_search(index):
+  text_filename, index = index
+  assert not index.is_stale(text_filename)
+  assert index.postings('plough') == [0, 1]
+  assert index.search('plough') == [0, 1]
+  assert index.search('Plough again') == [0]
+  assert index.search('plough table') == []
+  assert index.search('nowhere') == []
+  assert index.search('ărātro') == [] # Latin with vowel marks is not a term
+  with reader.TextDictionary(text_filename) as dictionary:
+    assert english.lookup(dictionary, index, 'counting') == [dictionary.entry(2)]
@@ -0,0 +1,107 @@
+# Every headword of the text file can be looked up in the exported StarDict and dictd
+# indexes, and the .dict.dz files read both as gzip and chunk by chunk.
+
+import gzip
+import os
+import struct
+import sys
+import zlib
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import export
+
+TEXT = '''#ăb,ā,abs
+ăb, ā, abs, prep. with abl., from
+#ā,Ā
+ā, interj., ah!
+#dŭcentĭes,dŭcentĭens
+dŭcentĭes or -ĭens, adv., two hundred times
+'''
+
+# headword -> entries
+EXPECTED = {'ăb': ['ăb, ā, abs, prep. with abl., from'],
+            'ā': ['ăb, ā, abs, prep. with abl., from', 'ā, interj., ah!'],
+            'abs': ['ăb, ā, abs, prep. with abl., from'],
+            'Ā': ['ā, interj., ah!'],
+            'dŭcentĭes': ['dŭcentĭes or -ĭens, adv., two hundred times'],
+            'dŭcentĭens': ['dŭcentĭes or -ĭens, adv., two hundred times']}
+
+@pytest.fixture
+def exported(tmp_path, monkeypatch):
+  # Small chunks, so the entries are spread over several of them.
+  monkeypatch.setattr(export, 'CHUNK_LENGTH', 16)
+  filename = tmp_path / 'lewis_short_by_headword.txt'
+  filename.write_text(TEXT, encoding='utf-8')
+  directory = str(tmp_path / 'export')
+  counts = export.export(str(filename), directory)
+  return directory, counts
+
+def read_chunked(filename, offset, length):
+  # Reads data from a dictzip file through its chunk table, as dictd does.
+  with open(filename, 'rb') as f:
+    data = f.read()
+  assert data[3] & 0x04 # FEXTRA
+  extra_length, = struct.unpack('<H', data[10:12])
+  extra = data[12:12 + extra_length]
+  assert extra[0:2] == b'RA'
+  # 'RA', subfield length, version, chunk length, chunk count, chunk sizes
+  version, chunk_length, count = struct.unpack('<HHH', extra[4:10])
+  sizes = struct.unpack(f'<{count}H', extra[10:10 + 2 * count])
+  assert chunk_length == export.CHUNK_LENGTH and count > 1
+  start = data.index(b'\0', 12 + extra_length) + 1 # after the name
+  result = b''
+  for i in range(offset // chunk_length, (offset + length - 1) // chunk_length + 1):
+    chunk_start = start + sum(sizes[:i])
+    result += zlib.decompressobj(-zlib.MAX_WBITS).decompress(data[chunk_start:chunk_start + sizes[i]])
+  first = offset // chunk_length * chunk_length
+  return result[offset - first:offset - first + length]
+
+def test_stardict(exported):
+  directory, counts = exported
+  base = os.path.join(directory, 'stardict', export.NAME)
+  with open(base + '.idx', 'rb') as f:
+    index = f.read()
+  data = gzip.open(base + '.dict.dz').read()
+
+  found = {}
+  words = []
+  position = 0
+  while position < len(index):
+    end = index.index(b'\0', position)
+    word = index[position:end].decode('utf-8')
+    offset, size = struct.unpack('>II', index[end + 1:end + 9])
+    found.setdefault(word, []).append(data[offset:offset + size].decode('utf-8'))
+    assert read_chunked(base + '.dict.dz', offset, size) == data[offset:offset + size]
+    words.append(word)
+    position = end + 9
+  assert {word: sorted(entries) for word, entries in found.items()} == {word: sorted(entries) for word, entries in EXPECTED.items()}
+  assert words == sorted(words, key=export.stardict_key)
+  assert counts['stardict'] == len(words)
+
+  with open(base + '.ifo', encoding='utf-8') as f:
+    ifo = f.read().splitlines()
+  assert f'wordcount={len(words)}' in ifo
+  assert f'idxfilesize={len(index)}' in ifo
+
+def test_dictd(exported):
+  directory, counts = exported
+  base = os.path.join(directory, 'dictd', export.NAME)
+  data = gzip.open(base + '.dict.dz').read()
+  found = {}
+  with open(base + '.index', encoding='utf-8') as f:
+    lines = f.read().splitlines()
+  for line in lines:
+    word, offset, length = line.split('\t')
+    offset, length = (sum(export.BASE64.index(digit) * 64 ** i for i, digit in enumerate(reversed(number)))
+                      for number in (offset, length))
+    found.setdefault(word, []).append(data[offset:offset + length].decode('utf-8').rstrip('\n'))
+  assert found['00-database-utf8'] == ['00-database-utf8']
+  assert {word: sorted(entries) for word, entries in found.items() if not word.startswith('00-')} == {word: sorted(entries) for word, entries in EXPECTED.items()}
+  assert counts['dictd'] == len(lines)
+
+@pytest.mark.parametrize('number, digits', [(0, 'A'), (63, '/'), (64, 'BA'), (4095, '//')])
+def test_dictd_number(number, digits):
+  assert export.dictd_number(number) == digits
@@ -0,0 +1,49 @@
+# classify() must never send an entry down the fast path when one of the
+# examine_* functions would have found a headword in it.
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 'of or belonging' is taken out before examine_subsequent_additions() counts its
+# words, which brings ', and fōos,' into reach.
+OF_OR_BELONGING = 'fŏo,a,b,c,d,e,f,g,h,i,j,k x y z of or belonging q , and fōos, bar: Cic.'
+
+@pytest.fixture
+def main(tmp_path, monkeypatch):
+  monkeypatch.chdir(tmp_path) # Guess writes to results/
+  (tmp_path / 'results').mkdir()
+  import main
+  monkeypatch.setattr(main, 'g', main.Guess())
+  monkeypatch.setattr(main, 'dictionary', {})
+  return main
+
+def headwords(main, monkeypatch, entry, fast_path):
+  monkeypatch.setattr(main, 'FAST_PATH', fast_path)
+  main.dictionary.clear()
+  main.scan([entry], start=True)
+  return set(main.dictionary)
+
+# A parenthesis in the middle of 'and more usu. in the plur.:', which is only there
+# once the parentheticals are removed.
+PLURAL_WITH_PARENTHESIS = 'fŏo, i, m., a small round thing made of hard oak wood for the table, and more usu.(sc. res) in the plur.: fŏi, ōrum, things: Cic.'
+
+# entry -> a headword the full cascade finds in it
+CASES = {OF_OR_BELONGING: 'fōos',
+         PLURAL_WITH_PARENTHESIS: 'fŏi',
+         'fŏo, i, m., a thing, and more usu. in the plur.: fŏi, ōrum, things: Cic.': 'fŏi',
+         'adulescens (ădŏl-), entis, adj., young: Cic.': 'ădŏlescens',
+         'Alcmaeo, Alcmaeon, ŏnis, and Alcmaeus, i, m. , = Ἀλκμαίων, a hero': 'Alcmaeus',
+         'albĭcēris, e, or albĭcērus, a, um, adj., whitish: Plin.': 'albĭcērus',
+         'dŭcentĭes or -ĭens, adv., two hundred times: Plaut.': 'dŭcentĭens',
+         'antĕāquam or antea quam, v. antea, IV.': 'antĕāquam',
+         'ăbăcus, i, m., = ἄβαξ, a table: Cic.': 'ăbăcus'}
+
+@pytest.mark.parametrize('entry, headword', CASES.items())
+def test_fast_path_finds_the_same_headwords(main, monkeypatch, entry, headword):
+  full = headwords(main, monkeypatch, entry, False)
+  assert headword in full
+  assert headwords(main, monkeypatch, entry, True) == full
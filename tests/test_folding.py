@@ -0,0 +1,32 @@
+# normalize() must give the same result for precomposed and decomposed input.
+
+import os
+import sys
+import unicodedata
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import alphabet
+import folding
+
+@pytest.mark.parametrize('ch', sorted(alphabet.table))
+def test_table_letters_fold_the_same_decomposed(ch):
+  assert alphabet.normalize(unicodedata.normalize('NFD', ch)) == alphabet.normalize(unicodedata.normalize('NFC', ch))
+
+def test_every_letter_folds_the_same_decomposed():
+  letters = [chr(i) for low, high in folding.ALPHABETS for i in range(low, high + 1)]
+  assert [ch for ch in letters
+          if alphabet.normalize(unicodedata.normalize('NFD', ch)) != alphabet.normalize(ch)] == []
+
+def test_table_still_wins():
+  assert alphabet.normalize('ἅ') == 'a'
+  assert alphabet.normalize('ǽ') == 'ae'
+  assert alphabet.normalize('dŭcentĭens') == 'ducentiens'
+
+def test_cache_is_rebuilt(tmp_path):
+  filename = str(tmp_path / 'folding.table')
+  built = folding.translation_table(alphabet.table, filename)
+  assert os.path.exists(filename)
+  assert folding.translation_table(alphabet.table, filename) == built
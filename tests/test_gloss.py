@@ -0,0 +1,51 @@
+# Each entry is summarized by its principal parts, part of speech and first gloss,
+# and the saved glosses are looked up by headword.
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import gloss
+import reader
+
+# entry -> (parts, pos, gloss)
+ENTRIES = {
+  'ăbŏlĕo, ēvi (ui), ĭtum, 2, v. a., orig., to retard the growth of: Cic.': ('ēvi (ui), ĭtum, 2', 'v. a.', 'to retard the growth of'),
+  'ăb, ā, abs, prep. with abl., from, away from. I. Of space: Cic.': ('ā, abs', 'prep. with abl.', 'from, away from'),
+  'damnāticĭus (or -tius), a, um, adj. damno, condemned, Cic. Ver. 5, 1.': ('a, um', 'adj.', 'condemned, Cic. Ver. 5, 1'),
+  'Alcmaeo, ŏnis, m., = Ἀλκμαίων, a hero of Argos: Cic.': ('ŏnis', 'm.', 'a hero of Argos'),
+  'ălo, ălŭi, altum, 3, v. a. ; to nourish, support: Cic.': ('ălŭi, altum, 3', 'v. a.', 'to nourish, support'),
+  'dŭcentĭes or -ĭens, adv., two hundred times: Plaut.': ('', 'adv.', 'two hundred times'),
+  'antĕāquam or antea quam, v. antea, IV.': ('', '', ''),
+  'ālium, a word of unknown meaning': ('', '', 'a word of unknown meaning')}
+
+@pytest.mark.parametrize('entry, expected', ENTRIES.items())
+def test_summarize(entry, expected):
+  summary = gloss.summarize(['x'], entry)
+  assert summary.forms == ['x']
+  assert (summary.parts, summary.pos, summary.gloss) == expected
+
+def test_long_gloss_is_shortened():
+  summary = gloss.summarize(['x'], 'x, i, m., ' + 'a long gloss, ' * 20 + 'at last: Cic.')
+  assert summary.gloss.endswith('…')
+  assert len(summary.gloss) <= gloss.GLOSS_LENGTH + 1
+  assert 'a long gloss' in summary.gloss and ',…' not in summary.gloss
+
+def test_build_and_lookup(tmp_path):
+  text_filename = str(tmp_path / 'lewis_short_by_headword.txt')
+  with open(text_filename, 'w') as f:
+    f.write('#ăb,ā,abs\năb, ā, abs, prep. with abl., from, away from: Cic.\n'
+            '#ā\nā, interj., ah!: Plaut.\n'
+            '#antĕāquam\nantĕāquam or antea quam, v. antea, IV.\n')
+  filename = str(tmp_path / 'lewis_short_by_headword.gloss')
+  assert gloss.build_glosses(text_filename, filename) == 2
+
+  glosses = gloss.Glosses(filename)
+  assert len(glosses) == 3
+  assert not glosses.is_stale(text_filename)
+  with reader.TextDictionary(text_filename) as dictionary:
+    assert [summary.gloss for summary in gloss.lookup(dictionary, glosses, 'ā')] == ['from, away from', 'ah!']
+    assert gloss.lookup(dictionary, glosses, 'abs') == [gloss.Summary(['ăb', 'ā', 'abs'], 'ā, abs', 'prep. with abl.', 'from, away from')]
@@ -0,0 +1,49 @@
+# A Header must give the same words as the splits and regexes it replaced.
+
+import os
+import re
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import lexer
+
+ENTRIES = ['ăbŏlĕo, ēvi (ui), ĭtum, 2, v. a., to destroy',
+           'condictīcĭus or -tĭus, a, um, adj., agreed upon',
+           'Alcmaeo, Alcmaeon, ŏnis, and Alcmaeus, i, m. , = Ἀλκμαίων, a hero',
+           'multātĭcus, or, archaic, ‡ moltā-tĭcus, a, um; adj.',
+           'ab(c)d (e f) g, (h',
+           ', leading and trailing, ',
+           '']
+
+def test_tokens():
+  assert lexer.tokenize('aff- (-tius), or Ἐρύθεια; ‡ x') == [
+    ('stem', 'aff-', 0, 4), ('open', '(', 5, 6), ('stem', '-tius', 6, 11),
+    ('close', ')', 11, 12), ('comma', ',', 12, 13), ('connector', 'or', 14, 16),
+    ('greek', 'Ἐρύθεια', 17, 24), ('semicolon', ';', 24, 25), ('dagger', '‡', 26, 27),
+    ('word', 'x', 28, 29)]
+
+@pytest.mark.parametrize('entry', ENTRIES)
+def test_words(entry):
+  header = lexer.Header(entry)
+  for number in (1, 9, 12):
+    assert header.words(number) == re.split(r'\s+', entry.replace(',', ' '))[0:number]
+    assert header.words(number, commas=False) == re.split(r'\s+', entry)[0:number]
+  assert header.chunks(9) == entry.split()[0:9]
+  assert header.spans(5) == [m.span() for m in re.finditer(r'\S+', entry)][0:5]
+
+@pytest.mark.parametrize('entry', ENTRIES)
+def test_stripped(entry):
+  header = lexer.Header(entry)
+  assert header.stripped(1).line == re.sub(r'\(.*?\)', '', entry, 1)
+  stripped = header.stripped()
+  assert stripped.line == re.sub(r'\(.*?\)', '', entry)
+  assert stripped.words() == re.split(r'\s+', stripped.line.replace(',', ' '))[0:12]
+  assert stripped.spans(5) == [m.span() for m in re.finditer(r'\S+', stripped.line)][0:5]
+
+@pytest.mark.parametrize('entry', ENTRIES)
+def test_parenthetical(entry):
+  b = re.search(r'^.*?\((.*?)\)', ' '.join(entry.split()[0:20]))
+  assert lexer.Header(entry).parenthetical(20) == (b.group(1) if b else None)
@@ -0,0 +1,49 @@
+# The Perseus XML is read as a stream of entries with the <orth> forms of their
+# headers, which scan() files as headwords.
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import perseus
+
+XML = '''<?xml version="1.0" encoding="utf-8"?>
+<TEI.2><text><body>
+<div0 type="alphabetic letter" n="A"><head lang="la">A</head>
+<entryFree id="n1" type="main" key="abacus"><orth extent="full" lang="la">ăbăcus</orth>, i, m., <sense n="I" level="1">a table; dim. <orth>abacŭlus</orth>, Plin.</sense></entryFree>
+</div0>
+<div0 type="alphabetic letter" n="D"><head lang="la">D</head>
+<entryFree id="n2" type="main" key="ducenties"><orth extent="full" lang="la">dŭcentĭes</orth>, <orth>-ĭens</orth>, <pos>adv.</pos>, two hundred times.</entryFree>
+</div0>
+</body></text></TEI.2>
+'''
+
+@pytest.fixture
+def xml_file(tmp_path):
+  path = tmp_path / 'ls.xml'
+  path.write_text(XML, encoding='utf-8')
+  return str(path)
+
+def test_read_lines(xml_file):
+  lines = list(perseus.read_lines(xml_file))
+  assert [line if isinstance(line, str) else line.key for line in lines] == ['A', 'abacus', 'D', 'ducenties']
+  abacus, ducenties = lines[1], lines[3]
+  assert abacus.orths == ['ăbăcus'] # not abacŭlus, which is in a sense
+  assert abacus.text.startswith('ăbăcus, i, m., a table; dim. abacŭlus')
+  assert ducenties.orths == ['dŭcentĭes', '-ĭens']
+
+def test_letters(xml_file):
+  assert [entry.key for entry in perseus.iter_entries(xml_file, {'D'})] == ['ducenties']
+
+def test_scan_files_the_orths(xml_file, tmp_path, monkeypatch):
+  monkeypatch.chdir(tmp_path) # Guess writes to results/
+  (tmp_path / 'results').mkdir()
+  import main
+  monkeypatch.setattr(main, 'g', main.Guess())
+  monkeypatch.setattr(main, 'dictionary', {})
+  assert main.scan(perseus.read_lines(xml_file), start=True) == 2
+  # No rule reads a variant from "dŭcentĭes, -ĭens,"; only the <orth> gives it.
+  assert set(main.dictionary) == {'ăbăcus', 'dŭcentĭes', 'dŭcentĭens'}
@@ -0,0 +1,62 @@
+# TextDictionary looks up the same entries as a dictionary read from the whole text
+# file, from the saved index as well as from a fresh one.
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import reader
+
+# headword -> entries, as main.dictionary
+DICTIONARY = {'ăb': ['ăb, ā, abs, prep. with abl., from'],
+              'ā': ['ăb, ā, abs, prep. with abl., from', 'ā, interj., ah!'],
+              'abs': ['ăb, ā, abs, prep. with abl., from'],
+              'dŭcentĭens': ['dŭcentĭes or -ĭens, adv., two hundred times']}
+
+def write_text(filename, dictionary):
+  # As main.write_text().
+  inverted = {}
+  for headword, entries in dictionary.items():
+    for entry in entries:
+      inverted.setdefault(entry, []).append(headword)
+  with open(filename, 'w') as f:
+    for entry, headwords in inverted.items():
+      f.write(f'#{",".join(headwords)}\n{entry}\n')
+
+@pytest.fixture
+def text_file(tmp_path):
+  filename = str(tmp_path / 'lewis_short_by_headword.txt')
+  write_text(filename, DICTIONARY)
+  return filename
+
+def test_lookup(text_file):
+  with reader.TextDictionary(text_file) as d:
+    assert os.path.exists(text_file + reader.INDEX_SUFFIX)
+    assert dict(d.items()) == DICTIONARY
+    assert list(d) == list(DICTIONARY)
+    assert 'ā' in d and 'a' not in d
+    with pytest.raises(KeyError):
+      d['a']
+
+  # Again, from the saved index.
+  with reader.TextDictionary(text_file) as d:
+    assert d['ā'] == DICTIONARY['ā']
+
+def test_index_is_rebuilt_when_the_file_changes(text_file):
+  reader.TextDictionary(text_file).close()
+  changed = dict(DICTIONARY, vōx=['vōx, vōcis, f., a voice'])
+  write_text(text_file, changed)
+  with reader.TextDictionary(text_file) as d:
+    assert dict(d.items()) == changed
+
+def test_empty_file(tmp_path):
+  filename = tmp_path / 'empty.txt'
+  filename.write_text('')
+  with reader.TextDictionary(str(filename)) as d:
+    assert len(d) == 0
+
+def test_pairs(text_file):
+  assert list(reader.pairs(text_file))[0] == (['ăb', 'ā', 'abs'], 'ăb, ā, abs, prep. with abl., from')
@@ -0,0 +1,43 @@
+# Each headword in rule_statistics() goes to the rule that found it, and each rule
+# is timed whether or not it fires.
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+ENTRIES = ['rĕpello, reppuli (less correctly repuli or rĕpūli), pulsum, 3, v. a., to drive back: Cic.',
+           'lŭcŭmo or lŭcŏmo, ōnis, m., a prince: Cic.',
+           'ăbăcus, i, m., = ἄβαξ, a table: Cic.',
+           'fŏo, i, m., a thing, and usu. plur. fŏi, things: Cic.']
+
+@pytest.fixture
+def rules(tmp_path, monkeypatch):
+  monkeypatch.chdir(tmp_path) # Guess writes to results/
+  (tmp_path / 'results').mkdir()
+  import main
+  monkeypatch.setattr(main, 'RULE_TIMES', True)
+  monkeypatch.setattr(main, 'g', main.Guess())
+  monkeypatch.setattr(main, 'dictionary', {})
+  main.scan(ENTRIES, start=True)
+  main.g.finish_entry()
+  return main.g.rule_statistics()
+
+def test_headwords_go_to_the_rule_that_found_them(rules):
+  scan = rules['(scan)']['rules']
+  assert scan['first_word']['headwords'] == 4
+  assert scan['and usu. plur.']['headwords'] == 1
+  parenth = rules['examine_or_also_and_with_parenth']['rules']
+  assert parenth['less correctly-rejected'] == {'entries': 1, 'headwords': 0, 'seconds': 0.0}
+  assert parenth['less correctly']['headwords'] == 1 # rĕpūli
+  assert parenth['approvd_second_found_after_orandalso']['headwords'] == 1 # lŭcŏmo
+  for stage in rules.values():
+    assert sum(rule['headwords'] for rule in stage['rules'].values()) == stage['headwords']
+
+def test_rules_that_do_not_fire_are_timed(rules):
+  parenth = rules['examine_or_also_and_with_parenth']['rules']
+  # lŭcŭmo has no third form after 'or lŭcŏmo', but it was looked for.
+  assert parenth['positively found third']['entries'] == 0
+  assert parenth['positively found third']['seconds'] > 0
@@ -0,0 +1,78 @@
+# The shards hold every citation of the outputs they were cut from, and
+# lookup() finds a headword's entries in them.
+
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import compare
+import reader
+import shard
+
+# headword -> entries, as main.dictionary; the section each entry was read in.
+DICTIONARY = {'ăb': ['ăb, ā, abs, prep. with abl., from'],
+              'ā': ['ăb, ā, abs, prep. with abl., from', 'ā, interj., ah!'],
+              'abs': ['ăb, ā, abs, prep. with abl., from'],
+              'bēta': ['bēta, ae, f., beet', 'Bēta, the Greek letter, v. beta'],
+              'dŭcentĭens': ['dŭcentĭes or -ĭens, adv., two hundred times']}
+SECTIONS = {'ăb, ā, abs, prep. with abl., from': 'A', 'ā, interj., ah!': 'A',
+            'bēta, ae, f., beet': 'B', 'Bēta, the Greek letter, v. beta': 'A',
+            'dŭcentĭes or -ĭens, adv., two hundred times': 'D'}
+
+@pytest.fixture
+def outputs(tmp_path):
+  # Written as main.write_json() and main.write_text() would.
+  json_filename = str(tmp_path / 'lewis_short_by_headword.json')
+  text_filename = str(tmp_path / 'lewis_short_by_headword.txt')
+  with open(json_filename, 'w') as f:
+    json.dump(DICTIONARY, f, indent=4)
+  inverted = {}
+  for headword, entries in DICTIONARY.items():
+    for entry in entries:
+      inverted.setdefault(entry, []).append(headword)
+  with open(text_filename, 'w') as f:
+    for entry, headwords in inverted.items():
+      f.write(f'#{",".join(headwords)}\n{entry}\n')
+  return json_filename, text_filename, str(tmp_path / 'shards')
+
+def sections():
+  result = shard.Sections()
+  for entry, letter in SECTIONS.items():
+    result.add(entry, letter)
+  return result
+
+@pytest.mark.parametrize('scheme, sections', [('letter', sections), ('letter', None), ('hash', None)])
+def test_shards_hold_every_citation(outputs, scheme, sections):
+  json_filename, text_filename, directory = outputs
+  shard.split(json_filename, text_filename, directory, scheme, 4, sections and sections())
+  manifest = shard.Manifest(os.path.join(directory, shard.MANIFEST_FILE))
+
+  citations = sorted((headword, json.dumps(entry)) for headword, entries in DICTIONARY.items() for entry in entries)
+  found = []
+  for record in manifest.shards.values():
+    assert manifest.check(record, 'json') and manifest.check(record, 'text')
+    with open(manifest.path(record, 'json')) as f:
+      json.load(f) # each shard is a JSON file of its own
+    found += compare.json_lines(manifest.path(record, 'json'))
+  assert sorted(found) == citations
+
+  pairs = sorted((headword, entry) for headwords, entry in reader.pairs(text_filename) for headword in headwords)
+  assert sorted((headword, entry) for record in manifest.shards.values()
+                for headwords, entry in reader.pairs(manifest.path(record))
+                for headword in headwords) == pairs
+
+  for headword, entries in DICTIONARY.items():
+    assert sorted(shard.lookup(manifest, headword)) == sorted(entries)
+
+def test_letter_shards_follow_the_input_sections(outputs):
+  json_filename, text_filename, directory = outputs
+  shard.split(json_filename, text_filename, directory, 'letter', sections=sections())
+  manifest = shard.Manifest(os.path.join(directory, shard.MANIFEST_FILE))
+  a = [entry for headwords, entry in reader.pairs(manifest.path(manifest.shards['A']))]
+  assert 'Bēta, the Greek letter, v. beta' in a
+  assert sorted(manifest.shards) == ['A', 'B', 'D']
+  assert manifest.shards['A']['initials'] == 'AB'
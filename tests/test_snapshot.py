@@ -0,0 +1,64 @@
+# load_snapshot() gives back what was saved, and rebuilds or refuses a stale
+# snapshot rather than trusting it.
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import snapshot
+
+DICTIONARY = {'ăb': {'ăb, ā, abs, prep.': ''},
+              'ā': {'ăb, ā, abs, prep.': ''},
+              'dŭcentĭens': {'dŭcentĭes or -ĭens, adv.': '', 'dŭcentĭens, adv.': ''}}
+
+@pytest.fixture
+def saved(tmp_path):
+  input_file = tmp_path / 'lewis-short.txt'
+  input_file.write_text('A\n')
+  filename = str(tmp_path / 'test.snapshot')
+  snapshot.save_snapshot(DICTIONARY, snapshot.sources(str(input_file)), filename)
+  return filename, input_file
+
+def test_roundtrip(saved):
+  filename, input_file = saved
+  loaded = snapshot.load_snapshot(filename, str(input_file))
+  assert list(loaded) == list(DICTIONARY)
+  assert {headword: loaded[headword] for headword in loaded} == {
+    headword: list(entries) for headword, entries in DICTIONARY.items()}
+  assert 'ab' not in loaded
+
+def test_touched_but_unchanged(saved):
+  filename, input_file = saved
+  os.utime(input_file, ns=(0, 0))
+  assert len(snapshot.load_snapshot(filename, str(input_file))) == len(DICTIONARY)
+
+def test_stale_is_refused_without_a_builder(saved):
+  filename, input_file = saved
+  input_file.write_text('A\nB\n')
+  with pytest.raises(ValueError):
+    snapshot.load_snapshot(filename, str(input_file))
+  assert len(snapshot.load_snapshot(filename, str(input_file), check=False)) == len(DICTIONARY)
+
+def test_stale_is_rebuilt_with_a_builder(saved):
+  filename, input_file = saved
+  input_file.write_text('A\nB\n')
+  built = []
+  def rebuild(name):
+    built.append(name)
+    snapshot.save_snapshot({'b': {'b, n.': ''}}, snapshot.sources(name), filename)
+  assert list(snapshot.load_snapshot(filename, str(input_file), rebuild)) == ['b']
+  assert built == [str(input_file)]
+
+def test_missing_input_is_stale(saved, tmp_path):
+  filename, input_file = saved
+  elsewhere = str(tmp_path / 'lewis-short.xml')
+  with pytest.raises(ValueError):
+    snapshot.load_snapshot(filename, elsewhere)
+  assert len(snapshot.load_snapshot(filename, elsewhere, missing_ok=True)) == len(DICTIONARY)
+
+def test_missing_snapshot(tmp_path):
+  with pytest.raises(FileNotFoundError):
+    snapshot.load_snapshot(str(tmp_path / 'none.snapshot'))
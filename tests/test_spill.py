@@ -0,0 +1,55 @@
+# A low-memory build writes the same files as a normal one, however many runs its
+# sorts are cut into.
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import spill
+
+def pairs():
+  # headword, entry, in the order add() would see them: each entry's headwords
+  # together, some headwords in several entries, some entry texts twice, and
+  # some headwords twice in one entry.
+  for i in range(300):
+    entry = f'vŏcābŭlum{i % 250}, i, n., a word: Cic.'
+    yield f'vŏcābŭlum{i % 250}', entry
+    yield f'vŏcābŭlum{i % 250}', entry
+    if i % 3 == 0:
+      yield f'vōx{i % 7}', entry
+    if i % 5 == 0:
+      yield 'nōmen', entry
+
+@pytest.fixture
+def main(tmp_path, monkeypatch):
+  monkeypatch.chdir(tmp_path) # Guess writes to results/
+  (tmp_path / 'results').mkdir()
+  import main
+  monkeypatch.setattr(main, 'dictionary', {})
+  return main
+
+@pytest.mark.parametrize('run, width', [(1000, 16), (4, 2)])
+def test_spilled_outputs_match_a_normal_build(main, tmp_path, monkeypatch, run, width):
+  for headword, entry in pairs():
+    main.dictionary.setdefault(headword, {})[entry] = ''
+  main.write_json(str(tmp_path / 'normal.json'))
+  main.write_text(str(tmp_path / 'normal.txt'))
+
+  # With (4, 2), every sort is cut into runs of 4 records and merged two at a time.
+  monkeypatch.setattr(spill, 'MINIMUM_RUN', run)
+  monkeypatch.setattr(spill, 'MERGE_WIDTH', width)
+  headword_spill = spill.HeadwordSpill(0, str(tmp_path))
+  try:
+    for headword, entry in pairs():
+      headword_spill.add(headword, entry)
+    headwords, citations = headword_spill.write(str(tmp_path / 'spilled.json'), str(tmp_path / 'spilled.txt'))
+  finally:
+    headword_spill.close()
+
+  assert headwords == len(main.dictionary)
+  assert citations == sum(len(entries) for entries in main.dictionary.values())
+  for suffix in ['json', 'txt']:
+    assert (tmp_path / f'spilled.{suffix}').read_bytes() == (tmp_path / f'normal.{suffix}').read_bytes()
@@ -0,0 +1,75 @@
+# References after 'v.' and 'cf.' resolve to the entries of their headword; pointer
+# entries redirect to them, and circles of pointers are found.
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import reader
+import xref
+
+# Entry numbers as in the text file: 0 points to 1, 2 to 0 (so on to 1), 3 and 4 to
+# each other, 5 into that circle.
+TEXT = '''#antĕāquam
+antĕāquam or antea quam, v. antea, IV.
+#antĕā
+antĕā, adv., before: Cic. Off. 1, 2; cf. antequam; v. Ov. M. 1, 2.
+#antequam
+antequam, v. anteaquam.
+#alpha
+alpha, v. beta.
+#beta
+beta, v. alpha.
+#gamma
+gamma, v. beta.
+#ărātro
+ărātro, āre, v. a., to plough: Cato.
+'''
+
+@pytest.mark.parametrize('entry, words, pointer', [
+  ('antĕāquam or antea quam, v. antea, IV.', ['antea'], True),
+  ('ărātro, āre, v. a., to plough, cf. aro: Cato.', ['aro'], False),
+  ('a thing: Ov. M. 1, 2; v. h. v. and v. infra.', [], False),
+  ('alternē, and alternă, advv., v. alternus fin.', ['alternus'], True)])
+def test_references(entry, words, pointer):
+  assert xref.references(entry) == (words, pointer)
+
+def test_resolve_redirects():
+  # 0 -> 1 -> 2; 3 -> 4 -> 5 -> 3; 6 -> 4; 7 -> 7
+  resolved, cycles = xref.resolve_redirects([1, 2, -1, 4, 5, 3, 4, 7])
+  assert list(resolved) == [2, 2, 2, -1, -1, -1, -1, -1]
+  assert sorted(sorted(cycle) for cycle in cycles) == [[3, 4, 5], [7]]
+
+@pytest.fixture
+def built(tmp_path):
+  text_filename = str(tmp_path / 'lewis_short_by_headword.txt')
+  with open(text_filename, 'w') as f:
+    f.write(TEXT)
+  filename = str(tmp_path / 'lewis_short_by_headword.xref')
+  counts = xref.build_references(text_filename, filename)
+  return text_filename, xref.CrossReferences(filename), counts
+
+def test_build_references(built):
+  text_filename, references, (targets, pointers) = built
+  assert pointers == 5 # all but antĕā and ărātro
+  assert references.targets(1) == [2] # cf. antequam; not Ov.
+  assert references.targets(6) == []
+  assert [references.redirect(number) for number in range(7)] == [1, None, 0, 4, 3, 4, None]
+  assert [references.resolve(number) for number in range(7)] == [1, 1, 1, None, None, None, 6]
+  assert [sorted(cycle) for cycle in references.cycles] == [[3, 4]]
+  assert not references.is_stale(text_filename)
+
+def test_lookup(built):
+  text_filename, references, counts = built
+  with reader.TextDictionary(text_filename) as dictionary:
+    assert xref.lookup(dictionary, references, 'antequam') == [dictionary.entry(1)]
+    assert xref.lookup(dictionary, references, 'alpha') == [dictionary.entry(3)] # a circle: left as it is
+
+def test_stale(built):
+  text_filename, references, counts = built
+  with open(text_filename, 'a') as f:
+    f.write('#delta\ndelta, a letter.\n')
+  assert references.is_stale(text_filename)
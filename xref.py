@@ -0,0 +1,193 @@
+#######################################################################################
+#
+# Cross-references between entries
+#
+# INPUT:  lewis_short_by_headword.txt
+# OUTPUT: lewis_short_by_headword.xref
+#
+# Many entries refer the reader to another one with 'v.' (vide) or 'cf.' (confer), and
+# some are nothing but such a pointer:
+#
+#   antĕāquam or antea quam, v. antea, IV.
+#   alternē, alternīs, and alternă, advv., v. alternus fin.
+#
+# The parser only recognizes these in order to skip them. build_references() resolves
+# the word after each 'v.' or 'cf.' to the entries of that headword (comparing without
+# accents, as the references are usually written without them), and saves the result
+# with entries numbered as in the text file (see reader.py):
+#
+#   starts:    array of unsigned ints; the entries referred to by entry i are
+#              targets[starts[i]:starts[i + 1]]
+#   targets:   array of unsigned ints, entry numbers
+#   redirects: array of ints; for an entry that is only a pointer, the entry it
+#              points to, otherwise -1
+#   resolved:  array of ints; where following the redirects from each entry ends
+#              up (the entry itself if it is not a pointer), or -1 if they go round
+#              in a circle
+#   cycles:    each circle of redirects, as a tuple of entry numbers
+#
+# Verb classes ('v. a.', 'v. n.', 'v. dep.') and 'v. h. v.', 'v. infra' and the like
+# are not references. Neither is a word that is not a headword, e.g. 'cf. Neue'.
+#
+# Usage:
+#
+#   import reader, xref
+#   LS_DICTIONARY = reader.TextDictionary()
+#   references = xref.CrossReferences()
+#   xref.lookup(LS_DICTIONARY, references, 'antĕāquam') # entries, pointers followed
+#
+#######################################################################################
+
+import marshal
+import os
+import re
+from array import array
+
+import reader
+from alphabet import normalize
+
+TEXT_RESULT_FILE = 'lewis_short_by_headword.txt'
+XREF_FILE = 'lewis_short_by_headword.xref'
+
+# Increase this whenever the layout above changes.
+XREF_VERSION = 1
+MAGIC = b'LSXR'
+
+# 'v.' or 'cf.', the word after it, and whether that word ends in a period.
+# references() checks that it is a word of its own and not the end of e.g. 'Ov.',
+# which is much faster than a look-behind here.
+REFERENCE = re.compile('(?:v|cf)\.\s+([^\s,.;:()\[\]]+)(\.?)')
+
+# Words after 'v.' that are abbreviations, not headwords: verb classes (ărātro,
+# āre, v. a.), h. v. (hanc vocem, this word).
+ABBREVIATIONS = {'a', 'n', 'dep', 'freq', 'inch', 'impers', 'desid', 'intens', 'defect',
+                 'act', 'neutr', 'h', 'hh', 'v'}
+NOT_HEADWORDS = {'infra', 'supra', 'sub', 'in', 'the', 'also', 'and', 'or', 'under'}
+
+# An entry is only a pointer if it has no definition or citations (no colon), and no
+# more than this much text after its first reference.
+POINTER_TAIL = 40
+
+def references(entry):
+  # The referenced words in an entry, and whether the entry is only a pointer.
+  words = []
+  pointer = False
+  for m in REFERENCE.finditer(entry):
+    before = entry[m.start() - 1:m.start()]
+    if before.isalnum() or before in ('.', '_'):
+      continue
+    word = m.group(1)
+    if m.group(2) and word in ABBREVIATIONS:
+      continue
+    if word.lower() in NOT_HEADWORDS or not any(ch.isalpha() for ch in word):
+      continue
+    if not words:
+      pointer = ':' not in entry and len(entry) - m.end() <= POINTER_TAIL
+    words.append(word)
+  return words, pointer
+
+def resolve_redirects(redirects):
+  # Follows every chain of redirects; returns (resolved, cycles) as described above.
+  resolved = array('i', [-2]) * len(redirects) # -2: not yet known
+  cycles = []
+  for start in range(len(redirects)):
+    path = []
+    on_path = {}
+    number = start
+    while resolved[number] == -2 and redirects[number] != -1 and number not in on_path:
+      on_path[number] = len(path)
+      path.append(number)
+      number = redirects[number]
+    if resolved[number] != -2:
+      end = resolved[number]
+    elif redirects[number] == -1:
+      end = resolved[number] = number
+    else:
+      # Back at an entry on this path: everything from it on is a circle, and
+      # whatever leads into a circle has nowhere to end.
+      cycles.append(tuple(path[on_path[number]:]))
+      end = -1
+    for number in path:
+      resolved[number] = end
+  return resolved, cycles
+
+def build_references(text_filename=TEXT_RESULT_FILE, filename=XREF_FILE):
+  # Resolves the references in the text output and saves them; returns the
+  # number of references and the number of pointer entries.
+  stat = os.stat(text_filename)
+  with reader.TextDictionary(text_filename) as dictionary:
+    by_word = {} # headword without accents -> entry numbers
+    for headword in dictionary:
+      by_word.setdefault(normalize(headword), []).extend(dictionary.entry_numbers(headword))
+
+    starts = array('I', [0])
+    targets = array('I')
+    entry_count = len(dictionary.offsets)
+    redirects = array('i', [-1]) * entry_count
+    for number in range(entry_count):
+      words, pointer = references(dictionary.entry(number))
+      for word in words:
+        candidates = [target for target in by_word.get(normalize(word), []) if target != number]
+        if not candidates:
+          continue
+        if pointer and redirects[number] == -1:
+          redirects[number] = candidates[0]
+        for target in candidates:
+          if target not in targets[starts[-1]:]:
+            targets.append(target)
+      starts.append(len(targets))
+
+  resolved, cycles = resolve_redirects(redirects)
+  data = (XREF_VERSION, stat.st_size, stat.st_mtime_ns, starts.tobytes(), targets.tobytes(),
+          redirects.tobytes(), resolved.tobytes(), tuple(cycles))
+  temp = filename + '.tmp'
+  with open(temp, 'wb') as f:
+    f.write(MAGIC)
+    marshal.dump(data, f)
+  os.replace(temp, filename)
+  return len(targets), sum(1 for target in redirects if target != -1)
+
+class CrossReferences():
+  def __init__(self, filename=XREF_FILE):
+    with open(filename, 'rb') as f:
+      if f.read(len(MAGIC)) != MAGIC:
+        raise ValueError(f'{filename} is not a cross-reference file.')
+      data = marshal.load(f)
+    if not isinstance(data, tuple) or len(data) != 8 or data[0] != XREF_VERSION:
+      raise ValueError(f'{filename} was written by another version of xref.py.')
+    version, self.size, self.mtime, starts, targets, redirects, resolved, self.cycles = data
+    self.starts = array('I', starts)
+    self.target_numbers = array('I', targets)
+    self.redirects = array('i', redirects)
+    self.resolved = array('i', resolved)
+
+  def is_stale(self, text_filename=TEXT_RESULT_FILE):
+    # True if the text file has changed since the references were built.
+    stat = os.stat(text_filename)
+    return (self.size, self.mtime) != (stat.st_size, stat.st_mtime_ns)
+
+  def targets(self, number):
+    # The entries that entry number refers to.
+    return self.target_numbers[self.starts[number]:self.starts[number + 1]].tolist()
+
+  def redirect(self, number):
+    # The entry a pointer entry points to, or None.
+    target = self.redirects[number]
+    return None if target == -1 else target
+
+  def resolve(self, number):
+    # The entry at the end of the redirects from entry number (itself if it is
+    # not a pointer), or None if they go round in a circle.
+    target = self.resolved[number]
+    return None if target == -1 else target
+
+def lookup(dictionary, references, headword):
+  # The entries of headword in a reader.TextDictionary, with each pointer entry
+  # replaced by the entry it leads to.
+  result = []
+  for number in dictionary.entry_numbers(headword):
+    target = references.resolve(number)
+    entry = dictionary.entry(number if target is None else target)
+    if entry not in result:
+      result.append(entry)
+  return result